@@ -0,0 +1,79 @@
+"""
+Микробенчмарк: стоимость одного элемента выдачи от коннектора до байтов ответа.
+
+old: SearchItem (полная Pydantic-валидация + HttpUrl) -> SearchResponse -> jsonable_encoder + json.dumps
+new: make_item (доверенный Item) -> FastJSONResponse.render
+
+Запуск из backend/:  python bench/bench_items.py [--items 150] [--rounds 200]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.models.items import make_item  # noqa: E402
+from app.models.search import SearchItem, SearchResponse  # noqa: E402
+
+
+def raw_rows(n: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "title": f"owner/repo-{i}",
+            "url": f"https://github.com/owner/repo-{i}",
+            "snippet": "A fairly typical repository description " * 3,
+            "score": i * 7,
+            "timestamp": now,
+        }
+        for i in range(n)
+    ]
+
+
+def old_path(rows: list[dict]) -> bytes:
+    items = [SearchItem(source="github", **r) for r in rows]
+    resp = SearchResponse(query="q", sources=["github"], items=items)
+    # так FastAPI обрабатывает response_model: валидация + jsonable_encoder + json.dumps
+    validated = SearchResponse.model_validate(resp.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def new_path(rows: list[dict]) -> bytes:
+    items = [make_item(source="github", **r) for r in rows]
+    body = {"query": "q", "sources": ["github"], "items": items, "errors": [], "cache": {}, "took_ms": None}
+    return FastJSONResponse(body).body
+
+
+def bench(fn, rows: list[dict], rounds: int) -> float:
+    fn(rows)  # прогрев
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(rows)
+    return (time.perf_counter() - start) / rounds / len(rows) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=150, help="элементов в ответе (limit=50 x 3 источника)")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = raw_rows(args.items)
+    old_us = bench(old_path, rows, args.rounds)
+    new_us = bench(new_path, rows, args.rounds)
+
+    print(f"items per response: {args.items}")
+    print(f"old (pydantic + jsonable_encoder): {old_us:7.2f} us/item")
+    print(f"new (Item + FastJSONResponse):     {new_us:7.2f} us/item")
+    print(f"speedup: x{old_us / new_us:.1f}")
+
+
+if __name__ == "__main__":
+    main()
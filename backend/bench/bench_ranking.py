@@ -0,0 +1,117 @@
+"""
+Микробенчмарк стадии merge: синтетические кандидаты от трёх источников, часть — дубликаты
+одного документа под разными URL (http/https, www., utm_*, слэш в конце).
+
+old:  items.sort(key=(score, timestamp), reverse=True)[:k] — сырой score, без дедупликации
+sort: та же оценка, дедупликация всех кандидатов и полная сортировка
+new:  RankingStage.rank — heapify + извлечение до k уникальных (канонизируются только извлечённые)
+
+Запуск из backend/:  python bench/bench_ranking.py [--items 10000] [--k 20] [--rounds 50]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.models.items import Item  # noqa: E402
+from app.services.ranking import Ranker, RankingStage, canonical_url  # noqa: E402
+
+_URL_VARIANTS = (
+    lambda u: u,
+    lambda u: u.replace("https://", "http://"),
+    lambda u: u.replace("https://", "https://www."),
+    lambda u: u + "/",
+    lambda u: u + "?utm_source=hn&utm_medium=rss",
+)
+
+
+def synthetic_items(n: int, dup_rate: float, seed: int = 0) -> list[Item]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    sources = (("github", 50_000), ("hackernews", 2_000), ("rss", None))
+    items: list[Item] = []
+    for i in range(n):
+        source, max_score = sources[i % 3]
+        if items and rng.random() < dup_rate:
+            # тот же документ из другого источника и под другим URL
+            url = rng.choice(_URL_VARIANTS)(f"https://example.com/post/{rng.randrange(len(items))}")
+        else:
+            url = f"https://example.com/post/{i}"
+        items.append(
+            Item(
+                source=source,
+                title=f"title {i}",
+                url=url,
+                score=rng.randint(0, max_score) if max_score else None,
+                timestamp=now - timedelta(hours=rng.uniform(0, 2000)),
+            )
+        )
+    return items
+
+
+def old_path(items: list[Item], k: int) -> list[Item]:
+    items = list(items)
+    items.sort(key=lambda x: ((x.score or 0), (x.timestamp or 0)), reverse=True)
+    return items[:k]
+
+
+def full_sort_path(items: list[Item], k: int) -> list[Item]:
+    score = Ranker().score
+    best: dict[str, tuple[float, Item]] = {}
+    for item in items:
+        key = canonical_url(item.url)
+        rank = score(item)
+        prev = best.get(key)
+        if prev is None or rank > prev[0]:
+            best[key] = (rank, item)
+    ranked = sorted(best.values(), key=lambda t: t[0], reverse=True)
+    return [item for _, item in ranked[:k]]
+
+
+def bench(fn, items: list[Item], k: int, rounds: int) -> float:
+    fn(items, k)  # прогрев
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(items, k)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--dup-rate", type=float, default=0.2)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    items = synthetic_items(args.items, args.dup_rate)
+    stage = RankingStage()
+
+    print(f"candidates: {args.items}, k: {args.k}, dup rate: {args.dup_rate}")
+    for n in sorted({args.items // 100, args.items // 10, args.items}):
+        sample = items[:n]
+        old_ms = bench(old_path, sample, args.k, args.rounds)
+        sort_ms = bench(full_sort_path, sample, args.k, args.rounds)
+        new_ms = bench(stage.rank, sample, args.k, args.rounds)
+        print(
+            f"n={n:>6}  old sort (raw score, no dedup): {old_ms:7.2f} ms   "
+            f"dedup all + full sort: {sort_ms:7.2f} ms   heap top-k + lazy dedup: {new_ms:7.2f} ms"
+        )
+        assert [i.url for i in stage.rank(sample, args.k)] == [i.url for i in full_sort_path(sample, args.k)]
+
+    top = stage.rank(items, args.k)
+    assert len({canonical_url(i.url) for i in top}) == len(top)
+    unique = len({canonical_url(i.url) for i in items})
+    print(f"distinct documents: {unique} of {args.items} candidates")
+    print(f"sources in top-{args.k}: " + ", ".join(f"{s}={sum(i.source == s for i in top)}" for s in ("github", "hackernews", "rss")))
+    old_top = old_path(items, args.k)
+    print(f"sources in old top-{args.k}: " + ", ".join(f"{s}={sum(i.source == s for i in old_top)}" for s in ("github", "hackernews", "rss")))
+
+
+if __name__ == "__main__":
+    main()
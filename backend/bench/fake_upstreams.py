@@ -0,0 +1,173 @@
+"""
+Фейковые upstream'ы для бенчмарков: GitHub search, Algolia HN и RSS в тех же формах,
+что разбирают connectors/*. Один локальный HTTP-сервер, маршрутизация по Host.
+
+Поведение задаётся профилем (JSON в FAKE_UPSTREAM_PROFILE): задержка, джиттер,
+доля ошибок и размер ответа — отдельно для каждого upstream'а.
+
+Запуск отдельно:  python bench/fake_upstreams.py --port 9100
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+# слова, из которых собираются заголовки; запросы бенчмарка берутся отсюда же, чтобы RSS что-то находил
+VOCABULARY = [
+    "python", "rust", "async", "database", "kubernetes", "compiler", "react", "linux",
+    "postgres", "cache", "http", "parser", "graph", "search", "security", "cloud",
+]
+
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    items: int = 30  # сколько всего записей у upstream'а на запрос, по всем страницам (для RSS — в фиде)
+    snippet_chars: int = 200
+
+
+@dataclass
+class FakeProfile:
+    github: UpstreamProfile = field(default_factory=UpstreamProfile)
+    hackernews: UpstreamProfile = field(default_factory=UpstreamProfile)
+    rss: UpstreamProfile = field(default_factory=lambda: UpstreamProfile(latency_ms=150.0, items=200))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FakeProfile":
+        return cls(**{k: UpstreamProfile(**v) for k, v in data.items()})
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def _title(rng: random.Random, i: int) -> str:
+    return " ".join(rng.sample(VOCABULARY, 3)) + f" {i}"
+
+
+def _snippet(rng: random.Random, chars: int) -> str:
+    words: list[str] = []
+    total = 0
+    while total < chars:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        total += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def _iso(ts: datetime) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def build_app(profile: FakeProfile) -> Starlette:
+    now = datetime.now(timezone.utc)
+    # RSS-фид статичен: собираем один раз, ETag позволяет проверить conditional GET
+    rss_rng = random.Random(0)
+    rss_items = "".join(
+        "<item>"
+        f"<title>{escape(_title(rss_rng, i))}</title>"
+        f"<link>https://rss.fake/post/{i}</link>"
+        f"<description>{escape(_snippet(rss_rng, profile.rss.snippet_chars))}</description>"
+        f"<pubDate>{format_datetime(now - timedelta(minutes=i))}</pubDate>"
+        "</item>"
+        for i in range(profile.rss.items)
+    )
+    rss_body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>fake</title>{rss_items}</channel></rss>'
+    rss_etag = f'"{hashlib.md5(rss_body.encode()).hexdigest()[:16]}"'
+
+    async def behave(p: UpstreamProfile) -> Response | None:
+        delay = max(0.0, random.gauss(p.latency_ms, p.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if p.error_rate and random.random() < p.error_rate:
+            return Response("upstream error", status_code=503)
+        return None
+
+    async def github_search(request: Request) -> Response:
+        p = profile.github
+        if (err := await behave(p)) is not None:
+            return err
+        per_page = int(request.query_params.get("per_page", 30))
+        first = (int(request.query_params.get("page", 1)) - 1) * per_page
+        rng = random.Random(f"{request.query_params.get('q', '')}:{first}")
+        items = [
+            {
+                "full_name": f"owner{i}/{rng.choice(VOCABULARY)}-{i}",
+                "html_url": f"https://github.com/owner{i}/repo-{i}",
+                "description": _snippet(rng, p.snippet_chars),
+                "stargazers_count": rng.randint(0, 50_000),
+                "pushed_at": _iso(now - timedelta(hours=rng.randint(0, 2000))),
+            }
+            for i in range(first, min(first + per_page, p.items))
+        ]
+        return JSONResponse({"total_count": p.items, "items": items}, headers={"X-RateLimit-Remaining": "9999"})
+
+    async def algolia_search(request: Request) -> Response:
+        p = profile.hackernews
+        if (err := await behave(p)) is not None:
+            return err
+        per_page = int(request.query_params.get("hitsPerPage", 20))
+        first = int(request.query_params.get("page", 0)) * per_page
+        rng = random.Random(f"{request.query_params.get('query', '')}:{first}")
+        hits = [
+            {
+                "title": _title(rng, i),
+                "url": f"https://news.fake/{i}",
+                "story_text": _snippet(rng, p.snippet_chars),
+                "points": rng.randint(0, 2000),
+                "created_at": _iso(now - timedelta(hours=rng.randint(0, 2000))),
+            }
+            for i in range(first, min(first + per_page, p.items))
+        ]
+        return JSONResponse({"hits": hits, "nbHits": p.items})
+
+    async def rss_feed(request: Request) -> Response:
+        if (err := await behave(profile.rss)) is not None:
+            return err
+        if request.headers.get("if-none-match") == rss_etag:
+            return Response(status_code=304, headers={"ETag": rss_etag})
+        return Response(rss_body, media_type="application/rss+xml", headers={"ETag": rss_etag})
+
+    async def ok(request: Request) -> Response:
+        return JSONResponse({"ok": True})
+
+    async def dispatch(request: Request) -> Response:
+        host = request.headers.get("host", "").split(":")[0]
+        path = request.url.path
+        if host == "api.github.com" and path == "/search/repositories":
+            return await github_search(request)
+        if host == "hn.algolia.com" and path == "/api/v1/search":
+            return await algolia_search(request)
+        if host == "api.github.com" or host == "hacker-news.firebaseio.com":
+            # пробы /v1/sources
+            return await ok(request)
+        return await rss_feed(request)
+
+    return Starlette(routes=[Route("/{path:path}", dispatch)])
+
+
+def app_from_env() -> Starlette:
+    raw = os.environ.get("FAKE_UPSTREAM_PROFILE")
+    profile = FakeProfile.from_dict(json.loads(raw)) if raw else FakeProfile()
+    return build_app(profile)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    uvicorn.run(app_from_env(), host="127.0.0.1", port=args.port, log_level="warning")
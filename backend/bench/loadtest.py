@@ -0,0 +1,258 @@
+"""
+Нагрузочный тест /v1/search без внешней сети.
+
+Поднимает фейковые upstream'ы (bench/fake_upstreams.py) и API (bench/serve_app.py)
+отдельными процессами, гоняет запросы с заданной конкурентностью и считает
+p50/p95/p99, RPS и пиковый RSS процесса API по каждому сценарию.
+Результаты сравниваются с сохранённым baseline.
+
+    python bench/loadtest.py                          # все сценарии, сравнение с bench/baseline.json
+    python bench/loadtest.py -s hot_query -s flaky    # только выбранные
+    python bench/loadtest.py --save-baseline          # записать текущие цифры как baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from fake_upstreams import VOCABULARY, FakeProfile, UpstreamProfile
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+
+@dataclass
+class Scenario:
+    description: str
+    concurrency: int = 20
+    requests: int = 500
+    sources: list[str] = field(default_factory=lambda: ["github", "hackernews", "rss"])
+    limit: int = 20
+    distinct_queries: int = 0  # 0 — каждый запрос уникальный (кэш не помогает)
+    profile: FakeProfile = field(default_factory=FakeProfile)
+    env: dict[str, str] = field(default_factory=dict)  # переопределения Settings для процесса API
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "hot_query": Scenario(
+        description="один популярный запрос: кэш + склейка одинаковых запросов",
+        distinct_queries=1,
+    ),
+    "cold_unique": Scenario(
+        description="все запросы разные, кэш выключен: чистая стоимость fan-out",
+        env={"CACHE_ENABLED": "false"},
+    ),
+    "large_payload": Scenario(
+        description="limit=50 и длинные описания: нагрузка на парсинг и сериализацию",
+        limit=50,
+        env={"CACHE_ENABLED": "false"},
+        profile=FakeProfile(
+            github=UpstreamProfile(items=50, snippet_chars=1500),
+            hackernews=UpstreamProfile(items=50, snippet_chars=1500),
+            rss=UpstreamProfile(latency_ms=150, items=2000, snippet_chars=1500),
+        ),
+    ),
+    "flaky": Scenario(
+        description="20% ошибок и большой джиттер у GitHub",
+        env={"CACHE_ENABLED": "false"},
+        profile=FakeProfile(github=UpstreamProfile(latency_ms=120, jitter_ms=80, error_rate=0.2)),
+    ),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float | None:
+    # Linux: VmRSS из /proc; на других ОС память не меряем
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+async def wait_ready(url: str, timeout_s: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def drive(base_url: str, scenario: Scenario, pid: int) -> dict:
+    rng = random.Random(42)
+    if scenario.distinct_queries:
+        pool = [" ".join(rng.sample(VOCABULARY, 2)) for _ in range(scenario.distinct_queries)]
+        queries = [rng.choice(pool) for _ in range(scenario.requests)]
+    else:
+        queries = [f"{rng.choice(VOCABULARY)} {i}" for i in range(scenario.requests)]
+
+    latencies: list[float] = []
+    failures = 0
+    partial = 0
+    peak_mb = rss_mb(pid) or 0.0
+    next_idx = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal next_idx, failures, partial
+        while next_idx < len(queries):
+            q = queries[next_idx]
+            next_idx += 1
+            params = [("q", q), ("limit", str(scenario.limit))] + [("sources", s) for s in scenario.sources]
+
+            start = time.perf_counter()
+            try:
+                r = await client.get("/v1/search", params=params)
+            except httpx.HTTPError:
+                failures += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if r.status_code != 200:
+                failures += 1
+            elif r.json().get("errors"):
+                partial += 1
+
+    async def sample_memory() -> None:
+        nonlocal peak_mb
+        while True:
+            peak_mb = max(peak_mb, rss_mb(pid) or 0.0)
+            await asyncio.sleep(0.1)
+
+    limits = httpx.Limits(max_connections=scenario.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        sampler = asyncio.create_task(sample_memory())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(scenario.concurrency)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    latencies.sort()
+    return {
+        "requests": len(queries),
+        "failures": failures,
+        "partial": partial,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "peak_rss_mb": round(peak_mb, 1) if peak_mb else None,
+    }
+
+
+def run_scenario(name: str, scenario: Scenario) -> dict:
+    upstream_port, app_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "FAKE_UPSTREAM_PROFILE": scenario.profile.to_json(),
+        "RSS_FEEDS_CSV": "https://rss.fake/feed",
+        "DATABASE_URL": "",
+        **scenario.env,
+    }
+
+    procs: list[subprocess.Popen] = []
+    try:
+        procs.append(
+            subprocess.Popen([sys.executable, str(BENCH_DIR / "fake_upstreams.py"), "--port", str(upstream_port)], env=env)
+        )
+        # API стартует только после upstream'ов: иначе первый прогон RSS-ingester'а уйдёт в пустоту
+        asyncio.run(wait_ready(f"http://127.0.0.1:{upstream_port}/health"))
+
+        api = subprocess.Popen(
+            [
+                sys.executable,
+                str(BENCH_DIR / "serve_app.py"),
+                "--port",
+                str(app_port),
+                "--upstream-port",
+                str(upstream_port),
+            ],
+            env=env,
+        )
+        procs.append(api)
+        base_url = f"http://127.0.0.1:{app_port}"
+        asyncio.run(wait_ready(f"{base_url}/health"))
+        return asyncio.run(drive(base_url, scenario, api.pid))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+def compare(name: str, current: dict, baseline: dict | None) -> str:
+    line = (
+        f"{name:14} rps={current['rps']:8.1f}  p50={current['p50_ms']:7.1f}  "
+        f"p95={current['p95_ms']:7.1f}  p99={current['p99_ms']:7.1f}  "
+        f"rss={current['peak_rss_mb']}MB  fail={current['failures']}  partial={current['partial']}"
+    )
+    if not baseline:
+        return line
+    deltas = []
+    for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+        if baseline.get(key):
+            deltas.append(f"{key} {(current[key] - baseline[key]) / baseline[key] * 100:+.0f}%")
+    return line + "\n" + " " * 15 + "vs baseline: " + ", ".join(deltas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="можно несколько раз")
+    parser.add_argument("--requests", type=int, help="переопределить число запросов в сценариях")
+    parser.add_argument("--concurrency", type=int, help="переопределить конкурентность")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="записать результаты в файл")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results: dict[str, dict] = {}
+
+    for name in args.scenario or list(SCENARIOS):
+        scenario = SCENARIOS[name]
+        if args.requests:
+            scenario.requests = args.requests
+        if args.concurrency:
+            scenario.concurrency = args.concurrency
+        print(f"# {name}: {scenario.description}", flush=True)
+        results[name] = run_scenario(name, scenario)
+        print(compare(name, results[name], baseline.get(name)), flush=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Запуск API Fusion для бенчмарка: всё исходящее HTTP уходит в локальный фейковый upstream
+(настоящий TCP и настоящие пулы соединений, но без GitHub/Algolia/RSS).
+
+    python bench/serve_app.py --port 9000 --upstream-port 9100
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Подменяет адрес назначения, сохраняя Host: фейковый сервер маршрутизирует по нему."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, port: int) -> None:
+        self.inner = inner
+        self.port = port
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.port)
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--upstream-port", type=int, default=9100)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    from app.core.http import http_clients
+    from app.main import app
+
+    http_clients.wrap_transport = lambda inner: RedirectTransport(inner, args.upstream_port)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Стоимость холодного старта воркера: сколько стоит import app.main, какие модули самые
+дорогие и сколько памяти (max RSS) занято после импорта.
+
+Каждый прогон — отдельный процесс `python -X importtime`, как новый воркер uvicorn.
+С --eager дополнительно импортируются коннекторы, feedparser и модели БД — так видно,
+сколько экономит ленивая загрузка (столько платил бы каждый воркер при старте).
+
+Запуск из backend/:  python bench/startup_report.py [--runs 5] [--top 15] [--eager]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# модули, которые приложение грузит лениво: в отчёте видно, попали ли они в старт
+HEAVY = ("sqlalchemy", "feedparser", "app.db.models", "app.connectors.github", "app.services.rss_index")
+
+EAGER = "import app.connectors.github, app.connectors.hackernews, app.connectors.rss, app.db.models, app.services.logs, feedparser; "
+
+_CHILD = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{eager}import app.main
+took = (time.perf_counter() - t0) * 1000
+print("@@" + json.dumps({{
+    "import_ms": took,
+    "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_once(eager: bool) -> tuple[dict, list[tuple[int, int, str]]]:
+    code = _CHILD.format(eager=EAGER if eager else "", heavy=HEAVY)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+        # без DATABASE_URL из .env: считаем старт воркера, а не подключение к БД
+        env={"PATH": "", "DATABASE_URL": ""},
+    )
+    summary = json.loads(next(line[2:] for line in proc.stdout.splitlines() if line.startswith("@@")))
+
+    # строки вида "import time:  self [us] | cumulative | имя" (имя с отступом по вложенности)
+    rows: list[tuple[int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return summary, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--eager", action="store_true", help="сравнить с импортом всего сразу")
+    args = parser.parse_args()
+
+    modes = [False, True] if args.eager else [False]
+    for eager in modes:
+        run_once(eager)  # прогрев: .pyc и page cache
+        results = [run_once(eager) for _ in range(args.runs)]
+        summaries = [s for s, _ in results]
+        import_ms = sorted(s["import_ms"] for s in summaries)
+        rss_mb = statistics.median(s["maxrss_kb"] for s in summaries) / 1024
+
+        print(f"== {'eager (connectors + feedparser + sqlalchemy)' if eager else 'app.main'}, {args.runs} runs")
+        print(f"import: median {statistics.median(import_ms):.0f} ms, min {import_ms[0]:.0f} ms, max {import_ms[-1]:.0f} ms")
+        print(f"max RSS: {rss_mb:.1f} MB, modules: {summaries[0]['modules']}")
+        print(f"heavy modules loaded: {', '.join(summaries[0]['heavy']) or 'none'}")
+
+        # самые дорогие пакеты верхнего уровня (сумма self time их модулей) — из медианного прогона
+        _, rows = sorted(results, key=lambda r: r[0]["import_ms"])[len(results) // 2]
+        packages: dict[str, int] = {}
+        for self_us, _, name in rows:
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0) + self_us
+        print(f"top {args.top} packages by self time:")
+        for name, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
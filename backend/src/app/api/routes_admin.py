@@ -0,0 +1,78 @@
+import asyncio
+import hmac
+import threading
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import ProfilerBusyError, profiler
+from app.core.responses import FastJSONResponse
+from app.core.tracing import tracer
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    # без ADMIN_TOKEN эндпоинтов как будто нет
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/traces", response_class=FastJSONResponse)
+async def traces(
+    limit: int = Query(default=20, ge=1, le=200),
+    min_ms: float | None = Query(default=None, ge=0, description="только трассы не короче"),
+    kept: Literal["head", "slow", "error"] | None = Query(default=None),
+):
+    # последние сохранённые трассы процесса, новые первыми
+    out = []
+    for t in reversed(tracer.recent):
+        if min_ms is not None and t["duration_ms"] < min_ms:
+            continue
+        if kept is not None and t["kept"] != kept:
+            continue
+        out.append(t)
+        if len(out) == limit:
+            break
+    return FastJSONResponse(out)
+
+
+@router.get("/traces/{trace_id}", response_class=FastJSONResponse)
+async def trace(trace_id: str):
+    data = tracer.find(trace_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Trace not found (not kept or already evicted)")
+    return FastJSONResponse(data)
+
+
+@router.post("/profile")
+async def profile(
+    seconds: float = Query(default=5.0, gt=0),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+    format: Literal["json", "collapsed"] = Query(default="json", description="collapsed — для flamegraph.pl / speedscope"),
+    top: int = Query(default=30, ge=1, le=500),
+):
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(status_code=422, detail=f"seconds must be <= {settings.profile_max_seconds}")
+    # обработчик выполняется в потоке event loop — его и сэмплируем, сам сэмплер — в отдельном потоке
+    loop_thread = threading.get_ident()
+    try:
+        result = await asyncio.to_thread(profiler.run, loop_thread, seconds, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return FastJSONResponse(
+        {
+            "seconds": result.seconds,
+            "interval_ms": result.interval_ms,
+            "samples": result.samples,
+            "top": result.top(top),
+        }
+    )
@@ -1,9 +1,66 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 
+from app.core.compression import compressor
 from app.core.config import settings
+from app.connectors.registry import connector_registry
+from app.core.executor import cpu_executor, loop_monitor
+from app.core.http import http_clients
+from app.core.metrics import metrics
+from app.core.profiler import profiler
+from app.core.responses import conditional_stats
+from app.core.tracing import tracer
+from app.services.aggregator import connector_flight
+from app.services.batch import batch_runner
+from app.services.cache import search_cache
+from app.services.compose import compose_engine
+from app.services.disk_cache import disk_cache
+from app.services.circuit_breaker import circuit_breakers
+from app.services.hedging import hedger
+from app.services.quota import quota_scheduler
+from app.services.logs import log_writer
+from app.services.pagination import page_cache
+from app.services.ranking import ranking
+from app.services.sources_status import health_monitor
 
 router = APIRouter()
 
 @router.get("/health")
 async def health():
     return {"status": "ok", "app": settings.app_name, "env": settings.environment}
+
+
+@router.get("/stats")
+async def stats():
+    # внутренняя статистика процесса (пулы соединений и т.п.)
+    return {
+        "http": http_clients.stats(),
+        "cache": search_cache.stats(),
+        "cache_l2": disk_cache.stats(),
+        "pages": page_cache.stats(),
+        "batch": batch_runner.stats(),
+        "compose": compose_engine.stats(),
+        "ranking": ranking.stats(),
+        "singleflight": connector_flight.stats(),
+        "hedging": hedger.stats(),
+        "circuit": circuit_breakers.stats(),
+        "quota": quota_scheduler.stats(),
+        "connectors": connector_registry.stats(),
+        # статистика фоновых частей коннекторов (rss) — только если они уже загружены
+        **connector_registry.service_stats(),
+        "health": health_monitor.stats(),
+        "cpu": cpu_executor.stats(),
+        "loop": loop_monitor.stats(),
+        "logs": log_writer.stats(),
+        "metrics": metrics.stats(),
+        "tracing": tracer.stats(),
+        "profiler": profiler.stats(),
+        "compression": compressor.stats(),
+        "conditional": conditional_stats(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Prometheus text exposition format 0.0.4
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
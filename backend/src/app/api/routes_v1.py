@@ -1,65 +1,317 @@
-from fastapi import APIRouter, Query
+import time
+
+from fastapi import APIRouter, HTTPException, Query
 from starlette.requests import Request
-from app.services.sources_status import get_sources_status
+from starlette.responses import StreamingResponse
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, dumps, etag_headers, make_etag, not_modified
+from app.core.timing import mark_handler_done
+from app.services.sources_status import health_monitor
 
 
 
-from app.models.search import SearchResponse, SourceName
-from app.services.aggregator import aggregate_search
+from app.models.search import BatchSearchRequest, BatchSearchResponse, SearchPageResponse, SearchResponse, SourceName
+from app.services.aggregator import AggregateResult, aggregate_search, merge_results, stream_search
+from app.models.compose import ComposeRequest
+from app.services.batch import batch_log_fields, batch_runner
+from app.services.compose import RecipeError, compose_engine, plan
+from app.services.pagination import InvalidCursorError, search_page
 
 import asyncio
-from datetime import datetime, timezone
-
-from app.services.source_probe import probe_github, probe_hackernews, probe_rss
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select, desc
-from app.db.models import RequestLog
+from app.connectors.registry import connector_registry
 from app.db.session import get_sessionmaker
-from app.models.logs import LogRow
+from app.models.items import UtcDatetime
+from app.models.logs import Granularity, LogRow, LogStatsResponse
+from app.models.sources import SourceStatus
 
 router = APIRouter(prefix="/v1", tags=["v1"])
 
-AVAILABLE_SOURCES: list[SourceName] = ["github", "hackernews", "rss"]
+DEFAULT_SOURCES: list[SourceName] = connector_registry.default_sources()
+
+
+def _took_ms(request: Request) -> int | None:
+    # started_at ставит RequestMetaMiddleware
+    started_at = getattr(request.state, "started_at", None)
+    if started_at is None:
+        return None
+    return int((time.perf_counter() - started_at) * 1000)
+
+
+def _search_log_fields(q: str, sources: list[SourceName], limit: int, result: AggregateResult) -> dict:
+    return {
+        "q": q,
+        "sources": list(sources),
+        "limit": limit,
+        "items_count": len(result.items),
+        "errors": [e.model_dump() for e in result.errors],
+        "cache": result.cache,
+    }
 
 
-@router.get("/search", response_model=SearchResponse)
+def _search_etag(q: str, sources: list[SourceName], result: AggregateResult) -> str:
+    # took_ms и cache в тег не входят: тот же результат из кэша и от источников — один тег;
+    # а раз тело с этим тегом отличается в этих полях, тег слабый
+    return make_etag(q, *sources, *result.items, *result.errors, weak=True)
+
+
+def _search_body(q: str, sources: list[SourceName], result: AggregateResult, took_ms: int | None) -> dict:
+    # форма SearchResponse; элементы — уже проверенные Item, повторно не валидируем
+    return {
+        "query": q,
+        "sources": sources,
+        "items": result.items,
+        "errors": result.errors,
+        "cache": result.cache,
+        "took_ms": took_ms,
+    }
+
+
+@router.get("/search", response_model=SearchResponse, response_class=FastJSONResponse)
 async def search(
     request: Request,
     q: str = Query(min_length=1, max_length=200),
-    sources: list[SourceName] = Query(default=["github", "hackernews"]),
+    sources: list[SourceName] = Query(default=DEFAULT_SOURCES),
+    limit: int = Query(default=20, ge=1, le=50),
+    budget_ms: int | None = Query(default=None, ge=50, le=30000),
+):
+    result = await aggregate_search(q=q, sources=sources, limit=limit, budget_ms=budget_ms)
+    # middleware запишет это в RequestLog
+    request.state.search_log = _search_log_fields(q, sources, limit, result)
+    mark_handler_done()
+    # результат уже есть у клиента — не сериализуем и не отправляем его повторно
+    etag = _search_etag(q, sources, result)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return FastJSONResponse(_search_body(q, sources, result, _took_ms(request)), headers=etag_headers(etag))
+
+@router.get("/search/page", response_model=SearchPageResponse, response_class=FastJSONResponse)
+async def search_paged(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    sources: list[SourceName] = Query(default=DEFAULT_SOURCES),
+    limit: int = Query(default=20, ge=1, le=50),
+    cursor: str | None = Query(default=None, max_length=2000, description="next_cursor из предыдущей страницы"),
+    budget_ms: int | None = Query(default=None, ge=50, le=30000),
+):
+    """
+    Постраничная выдача: первая страница — без cursor, следующие — с next_cursor
+    и теми же q/sources (limit можно менять).
+    """
+    try:
+        result = await search_page(q=q, sources=sources, limit=limit, cursor=cursor, budget_ms=budget_ms)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    request.state.search_log = _search_log_fields(q, sources, limit, result)
+    mark_handler_done()
+    body = _search_body(q, sources, result, _took_ms(request))
+    return FastJSONResponse({**body, "next_cursor": result.next_cursor})
+
+@router.post("/search/batch", response_model=BatchSearchResponse, response_class=FastJSONResponse)
+async def search_batch(request: Request, body: BatchSearchRequest):
+    """
+    Много подзапросов в одном вызове: выполняются параллельно (с общим на процесс
+    ограничением), одинаковые — один раз; результаты — в порядке запроса.
+    """
+    if len(body.queries) > settings.batch_max_queries:
+        raise HTTPException(status_code=422, detail=f"Too many queries in batch (max {settings.batch_max_queries})")
+
+    queries = [(bq.q, bq.sources, bq.limit) for bq in body.queries]
+    entries = await batch_runner.run(queries, budget_ms=body.budget_ms)
+    # весь батч — одна строка RequestLog
+    request.state.search_log = batch_log_fields(entries)
+    mark_handler_done()
+    return FastJSONResponse(
+        {
+            "results": [
+                {**_search_body(e.q, e.sources, e.result, e.took_ms), "same_as": e.same_as}
+                for e in entries
+            ],
+            "took_ms": _took_ms(request),
+        }
+    )
+
+@router.get("/search/stream")
+async def search_stream(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    sources: list[SourceName] = Query(default=DEFAULT_SOURCES),
     limit: int = Query(default=20, ge=1, le=50),
+    budget_ms: int | None = Query(default=None, ge=50, le=30000),
+):
+    """
+    NDJSON: по строке на источник в порядке готовности (форма SearchSourceFrame),
+    последней строкой — объединённая выдача (форма SearchDoneFrame).
+    """
+    async def frames():
+        results = []
+        async for r in stream_search(q=q, sources=sources, limit=limit, budget_ms=budget_ms):
+            results.append(r)
+            # источник мог отдать больше limit кандидатов для ранжирования — клиенту столько не нужно
+            frame = {"type": "source", "source": r.source, "items": r.items[:limit], "error": r.error, "cache": r.cache}
+            yield dumps(frame) + b"\n"
+
+        merged = merge_results(results, limit)
+        request.state.search_log = _search_log_fields(q, sources, limit, merged)
+        done = {"type": "done", **_search_body(q, sources, merged, _took_ms(request))}
+        yield dumps(done) + b"\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+@router.post("/compose")
+async def compose(request: Request, recipe: ComposeRequest):
+    """
+    Рецепт — DAG шагов (search, filter, merge, dedup, sort, take); шаги выполняются,
+    как только готовы их входы. NDJSON: по строке на завершённый шаг с таймингами
+    (форма ComposeStepFrame), последней строкой — результат шага output (ComposeDoneFrame).
+    """
+    try:
+        order, signatures = plan(recipe)
+    except RecipeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    output = recipe.output or recipe.steps[-1].id
+    searches = [s for s in recipe.steps if s.op == "search"]
+
+    async def frames():
+        runs = {}
+        async for run in compose_engine.run(recipe, order, signatures):
+            runs[run.id] = run
+            yield dumps(run.frame()) + b"\n"
+
+        result = runs[output]
+        errors = [r.error for r in runs.values() if r.error is not None]
+        steps_ms_total = sum(r.finished_ms - r.started_ms for r in runs.values())
+        # рецепт — одна строка RequestLog, шаги — в details
+        request.state.search_log = {
+            "q": ("compose: " + " | ".join(dict.fromkeys(s.q for s in searches)))[:300],
+            "sources": list(dict.fromkeys(s.source for s in searches)),
+            "limit": sum(s.limit for s in searches),
+            "items_count": len(result.items),
+            "errors": [e.model_dump() for e in errors],
+            "cache": None,
+            "details": [
+                {k: v for k, v in r.frame().items() if k not in ("type", "error")} for r in runs.values()
+            ],
+        }
+        done = {
+            "type": "done",
+            "output": output,
+            "items": result.items,
+            "errors": errors,
+            "took_ms": _took_ms(request),
+            "steps_ms_total": steps_ms_total,
+        }
+        yield dumps(done) + b"\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+@router.get("/logs", response_model=list[LogRow], response_class=FastJSONResponse)
+async def logs(
+    request: Request,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: int | None = Query(default=None, ge=1, description="X-Next-Cursor из предыдущей страницы"),
+    since: UtcDatetime | None = Query(default=None, description="ts >= since (без зоны — UTC)"),
+    until: UtcDatetime | None = Query(default=None, description="ts < until (без зоны — UTC)"),
+    source: SourceName | None = Query(default=None),
+    has_errors: bool | None = Query(default=None),
 ):
-    items, errors = await aggregate_search(q=q, sources=sources, limit=limit)
-    resp = SearchResponse(query=q, sources=sources, items=items, errors=errors)
-    resp.took_ms = getattr(request.state, "took_ms", None)
-    
-    return resp
-
-@router.get("/logs", response_model=list[LogRow])
-async def logs(limit: int = Query(default=50, ge=1, le=200)):
     sessionmaker = get_sessionmaker()
     if sessionmaker is None:
-        return []
+        return FastJSONResponse([])
+
+    # SQLAlchemy и модели — только при включённой БД (см. db/session.py)
+    from sqlalchemy import String, cast, desc, select
+
+    from app.db.models import RequestLog
+
+    # keyset-пагинация: WHERE id < cursor вместо OFFSET — каждая страница стоит одинаково
+    stmt = select(RequestLog).order_by(desc(RequestLog.id)).limit(limit)
+    if cursor is not None:
+        stmt = stmt.where(RequestLog.id < cursor)
+    if since is not None:
+        stmt = stmt.where(RequestLog.ts >= since)
+    if until is not None:
+        stmt = stmt.where(RequestLog.ts < until)
+    if has_errors is not None:
+        stmt = stmt.where(RequestLog.errors_count > 0 if has_errors else RequestLog.errors_count == 0)
+    if source is not None:
+        # sources — JSON-массив; текстовый поиск одинаково работает в SQLite и Postgres
+        stmt = stmt.where(cast(RequestLog.sources, String).like(f'%"{source}"%'))
 
     async with sessionmaker() as session:
-        stmt = select(RequestLog).order_by(desc(RequestLog.id)).limit(limit)
         res = await session.execute(stmt)
         rows = res.scalars().all()
 
-    return [
-        LogRow(
-            id=r.id,
-            ts=r.ts,
-            request_id=r.request_id,
-            q=r.q,
-            sources=r.sources,
-            took_ms=r.took_ms,
-            items_count=r.items_count,
-            errors_count=r.errors_count,
+    # строки журнала не меняются после записи: страницу определяют их id
+    etag = make_etag(*(r.id for r in rows))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
+    # следующая страница — в заголовке, тело остаётся списком LogRow
+    headers = etag_headers(etag)
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = str(rows[-1].id)
+
+    # строки из БД и так типизированы — собираем форму LogRow без Pydantic
+    return FastJSONResponse(
+        [
+            {
+                "id": r.id,
+                "ts": r.ts,
+                "request_id": r.request_id,
+                "q": r.q,
+                "sources": r.sources,
+                "took_ms": r.took_ms,
+                "items_count": r.items_count,
+                "errors_count": r.errors_count,
+                "cache": r.cache,
+                "details": r.details,
+            }
+            for r in rows
+        ],
+        headers=headers,
+    )
+
+
+@router.get("/logs/stats", response_model=LogStatsResponse, response_class=FastJSONResponse)
+async def logs_stats(
+    minutes: int = Query(default=60, ge=1, le=30 * 24 * 60),
+    granularity: Granularity | None = Query(default=None, description="по умолчанию minute для окна до 6 часов"),
+    source: SourceName | None = Query(default=None),
+):
+    granularity = granularity or ("minute" if minutes <= 360 else "hour")
+    since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+    sessionmaker = get_sessionmaker()
+    if sessionmaker is None:
+        return FastJSONResponse(
+            {
+                "granularity": granularity,
+                "since": since,
+                "source": source or "*",
+                "totals": {"count": 0, "errors": 0, "error_rate": 0.0},
+                "by_source": {},
+                "buckets": [],
+            }
         )
-        for r in rows
-    ]
 
-@router.get("/sources")
-async def sources(force: bool = False):
-    return await get_sources_status(force=force)
+    from app.services.log_rollups import read_stats
+
+    # только агрегаты request_log_rollups: стоимость не зависит от размера request_logs
+    async with sessionmaker() as session:
+        return FastJSONResponse(await read_stats(session, since, granularity, source))
+
+@router.get("/sources", response_model=list[SourceStatus], response_class=FastJSONResponse)
+async def sources(
+    request: Request,
+    force: bool = Query(default=False, deprecated=True, description="игнорируется: статус обновляет фоновый монитор"),
+):
+    # только память: клиент не может заставить сервис ходить наружу
+    snapshot, etag = health_monitor.snapshot_with_etag()
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return FastJSONResponse(snapshot, headers=etag_headers(etag))
@@ -1,16 +1,23 @@
+import json
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
 
 from app.core.config import settings
-from app.models.search import SearchItem
+from app.core.executor import cpu_executor
+from app.models.items import Item, make_item
 
 
 GITHUB_SEARCH_URL = "https://api.github.com/search/repositories"
 
 
-async def search_github(client: httpx.AsyncClient, q: str, limit: int) -> list[SearchItem]:
+async def search_github(client: httpx.AsyncClient, q: str, limit: int) -> list[Item]:
+    return await fetch_github_page(client, q, page=0, per_page=min(limit, 50))
+
+
+async def fetch_github_page(client: httpx.AsyncClient, q: str, page: int, per_page: int) -> list[Item]:
+    """Одна страница выдачи; page считается с нуля (у GitHub — с единицы)."""
     headers = {}
     if settings.github_token:
         headers["Authorization"] = f"Bearer {settings.github_token}"
@@ -19,19 +26,23 @@ async def search_github(client: httpx.AsyncClient, q: str, limit: int) -> list[S
         "q": q,
         "sort": "stars",
         "order": "desc",
-        "per_page": min(limit, 50),
+        "per_page": per_page,
+        "page": page + 1,
     }
 
     r = await client.get(GITHUB_SEARCH_URL, params=params, headers=headers)
     r.raise_for_status()
-    data: dict[str, Any] = r.json()
+    # разбор JSON + нормализация — CPU-работа, большие ответы уходят в пул
+    return await cpu_executor.run(parse_github, r.content, per_page, size=len(r.content), timing="parse-github")
+
+
+def parse_github(content: bytes, limit: int) -> list[Item]:
+    data: dict[str, Any] = json.loads(content)
 
-    items: list[SearchItem] = []
+    items: list[Item] = []
     for repo in data.get("items", []):
         url = repo.get("html_url")
         name = repo.get("full_name")
-        if not url or not name:
-            continue
 
         pushed_at = repo.get("pushed_at")
         ts = None
@@ -41,15 +52,15 @@ async def search_github(client: httpx.AsyncClient, q: str, limit: int) -> list[S
             except Exception:
                 ts = None
 
-        items.append(
-            SearchItem(
-                source="github",
-                title=name,
-                url=url,
-                snippet=repo.get("description") or None,
-                score=int(repo.get("stargazers_count") or 0) if repo.get("stargazers_count") is not None else None,
-                timestamp=ts or datetime.now(timezone.utc),
-            )
+        item = make_item(
+            source="github",
+            title=name,
+            url=url,
+            snippet=repo.get("description"),
+            score=int(repo.get("stargazers_count") or 0) if repo.get("stargazers_count") is not None else None,
+            timestamp=ts or datetime.now(timezone.utc),
         )
+        if item is not None:
+            items.append(item)
 
     return items[:limit]
\ No newline at end of file
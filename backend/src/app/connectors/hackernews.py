@@ -1,26 +1,35 @@
+import json
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
 
-from app.models.search import SearchItem
+from app.core.executor import cpu_executor
+from app.models.items import Item, make_item
 
 
 ALGOLIA_URL = "https://hn.algolia.com/api/v1/search"
 
 
-async def search_hn(client: httpx.AsyncClient, q: str, limit: int) -> list[SearchItem]:
-    params = {"query": q, "tags": "story", "hitsPerPage": min(limit, 50)}
+async def search_hn(client: httpx.AsyncClient, q: str, limit: int) -> list[Item]:
+    return await fetch_hn_page(client, q, page=0, per_page=min(limit, 50))
+
+
+async def fetch_hn_page(client: httpx.AsyncClient, q: str, page: int, per_page: int) -> list[Item]:
+    """Одна страница выдачи Algolia (page с нуля, как и у самого Algolia)."""
+    params = {"query": q, "tags": "story", "hitsPerPage": per_page, "page": page}
     r = await client.get(ALGOLIA_URL, params=params)
     r.raise_for_status()
-    data: dict[str, Any] = r.json()
+    return await cpu_executor.run(parse_hn, r.content, per_page, size=len(r.content), timing="parse-hackernews")
+
+
+def parse_hn(content: bytes, limit: int) -> list[Item]:
+    data: dict[str, Any] = json.loads(content)
 
-    items: list[SearchItem] = []
+    items: list[Item] = []
     for hit in data.get("hits", []):
         title = hit.get("title") or hit.get("story_title")
         url = hit.get("url") or hit.get("story_url")
-        if not title or not url:
-            continue
 
         created_at = hit.get("created_at")
         ts = None
@@ -30,15 +39,15 @@ async def search_hn(client: httpx.AsyncClient, q: str, limit: int) -> list[Searc
             except Exception:
                 ts = None
 
-        items.append(
-            SearchItem(
-                source="hackernews",
-                title=title,
-                url=url,
-                snippet=hit.get("story_text") or None,
-                score=int(hit.get("points") or 0) if hit.get("points") is not None else None,
-                timestamp=ts or datetime.now(timezone.utc),
-            )
+        item = make_item(
+            source="hackernews",
+            title=title,
+            url=url,
+            snippet=hit.get("story_text"),
+            score=int(hit.get("points") or 0) if hit.get("points") is not None else None,
+            timestamp=ts or datetime.now(timezone.utc),
         )
+        if item is not None:
+            items.append(item)
 
     return items[:limit]
\ No newline at end of file
@@ -0,0 +1,234 @@
+import importlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Literal
+
+import httpx
+
+from app.core.config import settings
+from app.models.items import Item
+
+log = logging.getLogger("api-fusion")
+
+# группа entry points, через которую пакеты добавляют свои коннекторы:
+#   [project.entry-points."api_fusion.connectors"]
+#   mysource = "mypkg.connector:SPEC"
+ENTRY_POINT_GROUP = "api_fusion.connectors"
+
+# (client, q, limit) -> выдача источника
+ConnectorFn = Callable[[httpx.AsyncClient, str, int], Awaitable[list[Item]]]
+# (client, q, page, per_page) -> одна страница выдачи источника; page считается с нуля
+PageFn = Callable[[httpx.AsyncClient, str, int, int], Awaitable[list[Item]]]
+
+
+@dataclass(frozen=True)
+class ConnectorSpec:
+    """
+    Описание коннектора. Код — ссылки вида "модуль:атрибут": модуль импортируется
+    при первом обращении, а не при старте воркера.
+
+    Политики — значения по умолчанию; переменные окружения (timeout_<name>_seconds,
+    cache_ttl_<name>_seconds, quota_<name>_per_minute, rank_scale_<name>) важнее.
+    """
+
+    name: str
+    search: str  # ConnectorFn
+    page: str | None = None  # PageFn; без него источник не участвует в /v1/search/page
+    probe: str | None = None  # async (timeout_s) -> ProbeResult для фонового монитора
+    # объект со start() / async stop() / stats(): фоновая часть коннектора (ingester RSS)
+    service: str | None = None
+    timeout_s: float | None = None  # None — http_timeout_seconds
+    cache_ttl_s: float | None = None  # None — cache_ttl_default_seconds
+    quota_per_minute: float | None = None  # None — без ограничения
+    rank_scale: float | None = None  # None — rank_scale_default
+    default: bool = False  # входит в sources по умолчанию
+    # поиск без сети (локальный индекс): без breaker'а, квоты и hedging, вызовы и пробы
+    # ничего не говорят о доступности его выдачи
+    local: bool = False
+
+
+BUILTIN_CONNECTORS = (
+    ConnectorSpec(
+        name="github",
+        search="app.connectors.github:search_github",
+        page="app.connectors.github:fetch_github_page",
+        probe="app.services.source_probe:probe_github",
+        cache_ttl_s=300.0,
+        quota_per_minute=10.0,  # search API без токена; с токеном GitHub сам сообщит 30
+        rank_scale=10_000.0,
+        default=True,
+    ),
+    ConnectorSpec(
+        name="hackernews",
+        search="app.connectors.hackernews:search_hn",
+        page="app.connectors.hackernews:fetch_hn_page",
+        probe="app.services.source_probe:probe_hackernews",
+        cache_ttl_s=60.0,
+        quota_per_minute=150.0,  # Algolia: ~10000 запросов в час с IP
+        rank_scale=1_000.0,
+        default=True,
+    ),
+    ConnectorSpec(
+        name="rss",
+        search="app.connectors.rss:search_rss",
+        page="app.connectors.rss:fetch_rss_page",
+        probe="app.services.source_probe:probe_rss",
+        service="app.services.rss_index:rss_ingester",
+        # поиск по локальному индексу: квота upstream'у не нужна, здоровье фидов пишет ingester
+        cache_ttl_s=120.0,
+        local=True,
+    ),
+)
+
+
+def _csv(value: str) -> list[str]:
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+
+def _specs_from(obj: Any, origin: str) -> list[ConnectorSpec]:
+    specs = list(obj) if isinstance(obj, (list, tuple)) else [obj]
+    for spec in specs:
+        if not isinstance(spec, ConnectorSpec):
+            raise TypeError(f"{origin}: expected ConnectorSpec, got {type(spec).__name__}")
+    return specs
+
+
+def _resolve(ref: str) -> Any:
+    module, _, attr = ref.partition(":")
+    obj = importlib.import_module(module)
+    for part in attr.split(".") if attr else ():
+        obj = getattr(obj, part)
+    return obj
+
+
+def discover_connectors() -> list[ConnectorSpec]:
+    """
+    Встроенные коннекторы + entry points группы api_fusion.connectors + connectors_extra_csv.
+    Загружаются только модули с описаниями (ConnectorSpec), код коннекторов — позже.
+    Коннектор с тем же именем заменяет ранее найденный.
+    """
+    found: dict[str, ConnectorSpec] = {spec.name: spec for spec in BUILTIN_CONNECTORS}
+
+    if settings.connectors_entry_points:
+        from importlib.metadata import entry_points
+
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                for spec in _specs_from(ep.load(), f"entry point {ep.name}"):
+                    found[spec.name] = spec
+            except Exception as e:
+                # сломанный плагин не должен валить воркер
+                log.warning(f"Connector entry point {ep.name} skipped: {e!r}")
+
+    for ref in _csv(settings.connectors_extra_csv):
+        for spec in _specs_from(_resolve(ref), ref):
+            found[spec.name] = spec
+
+    enabled = _csv(settings.connectors_enabled_csv)
+    if enabled:
+        unknown = [name for name in enabled if name not in found]
+        if unknown:
+            raise ValueError(f"Unknown connectors in CONNECTORS_ENABLED_CSV: {', '.join(unknown)}")
+        return [found[name] for name in enabled]
+    return list(found.values())
+
+
+class ConnectorRegistry:
+    """
+    Реестр источников: имена, политики и ленивый импорт кода коннекторов.
+    Ссылки разрешаются один раз; время первого импорта пишется в stats().
+    """
+
+    def __init__(self, specs: list[ConnectorSpec]) -> None:
+        if not specs:
+            raise ValueError("No connectors enabled")
+        self._specs = {spec.name: spec for spec in specs}
+        self._resolved: dict[str, Any] = {}
+        self._load_ms: dict[str, dict[str, float]] = {spec.name: {} for spec in specs}
+        self._services: list[Any] = []
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs
+
+    def names(self) -> tuple[str, ...]:
+        return tuple(self._specs)
+
+    def spec(self, name: str) -> ConnectorSpec | None:
+        return self._specs.get(name)
+
+    def default_sources(self) -> list[str]:
+        return [name for name, spec in self._specs.items() if spec.default] or list(self._specs)[:1]
+
+    def pageable(self, name: str) -> bool:
+        spec = self._specs.get(name)
+        return spec is not None and spec.page is not None
+
+    def local(self, name: str) -> bool:
+        spec = self._specs.get(name)
+        return spec is not None and spec.local
+
+    def probed(self) -> list[str]:
+        return [name for name, spec in self._specs.items() if spec.probe]
+
+    def _get(self, name: str, kind: str) -> Any:
+        key = f"{name}.{kind}"
+        obj = self._resolved.get(key)
+        if obj is None:
+            ref = getattr(self._specs[name], kind)
+            if ref is None:
+                raise KeyError(f"Connector {name} has no {kind}")
+            start = time.perf_counter()
+            obj = self._resolved[key] = _resolve(ref)
+            self._load_ms[name][kind] = round((time.perf_counter() - start) * 1000, 2)
+        return obj
+
+    def search_fn(self, name: str) -> ConnectorFn:
+        return self._get(name, "search")
+
+    def page_fn(self, name: str) -> PageFn:
+        return self._get(name, "page")
+
+    def probe_fn(self, name: str) -> Callable[..., Awaitable[Any]]:
+        return self._get(name, "probe")
+
+    def start(self) -> None:
+        # фоновые части коннекторов нужны сразу (индекс RSS наполняется до первого запроса)
+        for name, spec in self._specs.items():
+            if spec.service:
+                service = self._get(name, "service")
+                service.start()
+                self._services.append(service)
+
+    async def stop(self) -> None:
+        services, self._services = self._services, []
+        for service in reversed(services):
+            await service.stop()
+
+    def service_stats(self) -> dict[str, Any]:
+        return {
+            name: self._resolved[f"{name}.service"].stats()
+            for name in self._specs
+            if f"{name}.service" in self._resolved
+        }
+
+    def stats(self) -> dict[str, Any]:
+        # import_ms — сколько стоил первый импорт каждой части; пусто — ещё не загружалась
+        return {
+            name: {
+                "timeout_s": settings.timeout_for(name),
+                "cache_ttl_s": settings.cache_ttl_for(name),
+                "quota_per_minute": settings.quota_per_minute_for(name),
+                "pageable": spec.page is not None,
+                "probe": spec.probe is not None,
+                "local": spec.local,
+                "import_ms": self._load_ms[name],
+            }
+            for name, spec in self._specs.items()
+        }
+
+
+connector_registry = ConnectorRegistry(discover_connectors())
+
+# имена источников для валидации запросов и OpenAPI — из реестра, а не списком в моделях
+SourceName = Literal[connector_registry.names()]
@@ -1,58 +1,21 @@
-from datetime import datetime, timezone
+import asyncio
 
-import feedparser
 import httpx
 
 from app.core.config import settings
-from app.models.search import SearchItem
+from app.core.deadline import clip_timeout
+from app.models.items import Item
+from app.services.rss_index import rss_index, rss_ingester
 
 
-def _contains_q(text: str | None, q: str) -> bool:
-    if not text:
-        return False
-    return q.lower() in text.lower()
+async def search_rss(client: httpx.AsyncClient, q: str, limit: int) -> list[Item]:
+    # фиды обновляет фоновый ingester, здесь — только поиск по локальному индексу.
+    # ждём лишь самый первый прогон после старта процесса
+    await asyncio.wait_for(rss_ingester.wait_ready(), timeout=clip_timeout(settings.timeout_for("rss")))
+    return rss_index.search(q, limit)
 
 
-async def search_rss(client: httpx.AsyncClient, q: str, limit: int) -> list[SearchItem]:
-    items: list[SearchItem] = []
-
-    for feed_url in settings.rss_feeds:
-        r = await client.get(feed_url)
-        r.raise_for_status()
-
-        feed = feedparser.parse(r.text)
-        for entry in feed.entries:
-            title = getattr(entry, "title", None)
-            link = getattr(entry, "link", None)
-            summary = getattr(entry, "summary", None)
-
-            if not link or not title:
-                continue
-
-            # простой фильтр по q
-            if not (_contains_q(title, q) or _contains_q(summary, q)):
-                continue
-
-            # timestamp (если есть)
-            ts = datetime.now(timezone.utc)
-            if getattr(entry, "published_parsed", None):
-                try:
-                    ts = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-                except Exception:
-                    pass
-
-            items.append(
-                SearchItem(
-                    source="rss",
-                    title=title,
-                    url=link,
-                    snippet=summary or None,
-                    score=None,
-                    timestamp=ts,
-                )
-            )
-
-            if len(items) >= limit:
-                return items[:limit]
-
-    return items[:limit]
\ No newline at end of file
+async def fetch_rss_page(client: httpx.AsyncClient, q: str, page: int, per_page: int) -> list[Item]:
+    # у локального индекса страницы — просто смещение в отсортированной выдаче
+    await asyncio.wait_for(rss_ingester.wait_ready(), timeout=clip_timeout(settings.timeout_for("rss")))
+    return rss_index.search(q, per_page, offset=page * per_page)
@@ -0,0 +1,170 @@
+import gzip
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.executor import cpu_executor
+from app.core.responses import encoded_etag
+
+try:
+    # brotli опционален: без него отдаём только gzip
+    import brotli
+except ImportError:
+    brotli = None
+
+# NDJSON и SSE клиент читает по мере прихода — их не буферизуем и не сжимаем
+_STREAMING_TYPES = ("application/x-ndjson", "text/event-stream")
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Кодировка из Accept-Encoding с учётом q; при равном весе br лучше gzip."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def _compress(encoding: str, body: bytes, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # mtime=0: одинаковое тело — одинаковые байты (и ETag сжатого представления остаётся честным)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+@dataclass
+class CompressionCounters:
+    compressed: int = 0
+    skipped_small: int = 0  # меньше compression_min_bytes
+    skipped_streaming: int = 0  # тело пришло несколькими частями
+    identity: int = 0  # клиент не принимает ни gzip, ни br
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+class Compressor:
+    def __init__(self) -> None:
+        self.counters = CompressionCounters()
+
+    async def compress(self, encoding: str, body: bytes) -> bytes | None:
+        """None — сжатие не уменьшило тело."""
+        level = settings.compression_brotli_quality if encoding == "br" else settings.compression_gzip_level
+        # большие тела — в пул (zlib и brotli отпускают GIL), мелкие дешевле сжать на месте
+        out = await cpu_executor.run(_compress, encoding, body, level, size=len(body), timing="compress")
+        if len(out) >= len(body):
+            return None
+        self.counters.compressed += 1
+        self.counters.bytes_in += len(body)
+        self.counters.bytes_out += len(out)
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **asdict(self.counters),
+            "encodings": ["br", "gzip"] if brotli is not None else ["gzip"],
+            "ratio": round(self.counters.bytes_out / self.counters.bytes_in, 3) if self.counters.bytes_in else None,
+        }
+
+
+compressor = Compressor()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов по Accept-Encoding (чистый ASGI, как RequestMetaMiddleware).
+    Сжимается только ответ, тело которого пришло целиком и не меньше порога:
+    стримы (NDJSON поиска и compose) уходят как есть, без буферизации.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        start: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith(_STREAMING_TYPES):
+                    passthrough = True
+                elif message["status"] == 304:
+                    # 304 подтверждает закэшированный ответ — с тем же Vary
+                    headers.add_vary_header("Accept-Encoding")
+                    passthrough = True
+                elif not content_type.startswith(_COMPRESSIBLE_TYPES):
+                    passthrough = True
+                else:
+                    # ответ зависит от Accept-Encoding, даже если этот клиент получит его несжатым
+                    headers.add_vary_header("Accept-Encoding")
+                    if encoding is None:
+                        compressor.counters.identity += 1
+                        passthrough = True
+                if passthrough:
+                    await send(message)
+                else:
+                    # решение — по первому куску тела
+                    start = message
+                return
+
+            body = message.get("body", b"")
+            passthrough = True
+            if message.get("more_body", False):
+                compressor.counters.skipped_streaming += 1
+                await send(start)
+                await send(message)
+                return
+            if len(body) < settings.compression_min_bytes:
+                compressor.counters.skipped_small += 1
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await compressor.compress(encoding, body)
+            if compressed is None:
+                await send(start)
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag is not None:
+                headers["ETag"] = encoded_etag(etag, encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,12 +8,153 @@ class Settings(BaseSettings):
     environment: str = "local"
 
     http_timeout_seconds: float = 3.0
+
+    # пул HTTP-соединений (один клиент на источник, живёт весь процесс)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = False  # нужен пакет h2, иначе откатываемся на HTTP/1.1
+    # лимиты пула по источникам, CSV вида "github=10,rss=30"
+    http_pool_limits_csv: str = ""
+
+    # коннекторы: встроенные + entry points группы api_fusion.connectors + ссылки "модуль:атрибут"
+    # на ConnectorSpec (или список) в connectors_extra_csv; connectors_enabled_csv — какие включены и в каком порядке
+    connectors_entry_points: bool = True
+    connectors_extra_csv: str = ""
+    connectors_enabled_csv: str = ""
+
+    # таймауты по источникам (если не заданы — из описания коннектора, иначе http_timeout_seconds)
+    timeout_github_seconds: float | None = None
+    timeout_hackernews_seconds: float | None = None
+    timeout_rss_seconds: float | None = None
+    # общий бюджет на один /v1/search; можно переопределить параметром budget_ms
+    search_budget_ms: int = 5000
+    # хеджирование: второй запрос, если первый дольше наблюдаемого p95 источника
+    hedge_enabled: bool = False
+    hedge_min_samples: int = 20
+    hedge_min_delay_ms: int = 50
+    # circuit breaker по источнику: после N отказов подряд источник не вызывается breaker_open_seconds
+    breaker_enabled: bool = True
+    breaker_failure_threshold: int = 5
+    breaker_slow_call_ms: int = 2500  # успешный, но более медленный ответ считается отказом
+    breaker_open_seconds: float = 10.0
+    breaker_max_open_seconds: float = 120.0
+    breaker_half_open_max_calls: int = 1  # одновременных пробных вызовов в half_open
+    breaker_half_open_successes: int = 2  # успехов подряд, чтобы закрыться
+    # квоты upstream'ов (token bucket, в минуту); уточняются по заголовкам X-RateLimit-*.
+    # не заданы — из описания коннектора (app/connectors/registry.py); там None — без ограничения
+    quota_enabled: bool = True
+    quota_github_per_minute: float | None = None
+    quota_hackernews_per_minute: float | None = None
+    quota_rss_per_minute: float | None = None
+    quota_max_wait_ms: int = 1000  # сколько интерактивный запрос может ждать токен
+    # входящий rate limit на /v1: token bucket на клиента (API-ключ или IP)
+    rate_limit_enabled: bool = True
+    rate_limit_per_minute: float = 120.0
+    rate_limit_burst: float | None = 30.0  # None — равен лимиту в минуту
+    rate_limit_api_key_header: str = "x-api-key"
+    rate_limit_api_key_per_minute: float | None = 600.0  # None — как для IP
+    # выданные ключи через запятую; чужой ключ считается по IP, иначе каждый случайный ключ — новый bucket
+    rate_limit_api_keys_csv: str = ""
+    rate_limit_trust_forwarded: bool = False  # брать IP из X-Forwarded-For (только за своим прокси)
+    rate_limit_trusted_hops: int = 1  # сколько своих прокси дописывают X-Forwarded-For перед нами
+    rate_limit_path_prefix: str = "/v1"
+    # memory — на процесс; redis — общий для воркеров (нужен пакет redis); local_shared — локальная замена
+    rate_limit_backend: Literal["memory", "redis", "local_shared"] = "memory"
+    rate_limit_redis_url: str | None = None
+    rate_limit_max_keys: int = 100_000
+    # фоновый мониторинг источников для /v1/sources
+    health_probe_interval_seconds: float = 30.0
+    health_probe_jitter: float = 0.2  # интервал случайно сдвигается на ±20%
+    health_probe_timeout_seconds: float = 3.0
+    health_history_size: int = 50  # сколько последних проверок держим на источник
+
     github_token: str | None = None
 
     # CSV строка (простая и надёжная для env)
     rss_feeds_csv: str = "https://hnrss.org/newest"
+    # фоновое обновление RSS-индекса
+    rss_refresh_interval_seconds: float = 120.0
+    rss_max_entries: int = 5000
+    rss_max_entry_age_hours: float = 72.0
 
     database_url: str | None = None
+    # запись request_logs: очередь в памяти + пачки в фоне
+    log_queue_size: int = 10_000
+    log_batch_size: int = 200
+    log_flush_interval_ms: int = 1000
+    log_overflow_policy: Literal["drop_new", "drop_oldest"] = "drop_new"
+    log_shutdown_timeout_seconds: float = 5.0
+    # сколько хранить минутные/часовые агрегаты логов (request_log_rollups)
+    log_rollup_minute_retention_hours: float = 48.0
+    log_rollup_hour_retention_days: float = 90.0
+
+    # пул для CPU-работы (парсинг ответов): thread | process | none
+    cpu_pool_kind: Literal["thread", "process", "none"] = "thread"
+    cpu_pool_workers: int = 2
+    # payload меньше порога разбирается прямо в event loop
+    cpu_inline_threshold_bytes: int = 64 * 1024
+    # мониторинг задержек event loop
+    loop_lag_interval_ms: int = 100
+    loop_stall_threshold_ms: int = 50
+    # окно, за которое /metrics и /stats считают квантили (p50/p95/p99)
+    metrics_window_seconds: float = 60.0
+    # трассировка: спаны пишутся на каждый запрос, сохраняются доля tracing_sample_rate (head)
+    # и все медленные / с ошибками (tail); входящий traceparent с флагом sampled — тоже
+    tracing_enabled: bool = True
+    tracing_sample_rate: float = 0.01
+    tracing_slow_ms: int = 1000
+    tracing_max_spans: int = 500  # на трассу, остальные только считаются
+    tracing_buffer_size: int = 200  # последние сохранённые трассы для /admin/traces
+    # экспорт сохранённых трасс: none | jsonl (свой формат) | otlp_json (JSON OTLP, строка на трассу)
+    tracing_export: Literal["none", "jsonl", "otlp_json"] = "none"
+    tracing_export_path: str = "traces.jsonl"
+    tracing_queue_size: int = 1000
+    tracing_flush_interval_ms: int = 1000
+    # /admin/* (трассы, профилировщик): заголовок X-Admin-Token; без токена эндпоинты выключены
+    admin_token: str | None = None
+    profile_max_seconds: float = 30.0
+    # сжатие ответов: gzip, br — если установлен пакет brotli; потоковые ответы не сжимаются
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024  # мельче — сжатие не окупает CPU
+    compression_gzip_level: int = 5
+    compression_brotli_quality: int = 4
+
+    # in-memory кэш результатов по источникам
+    cache_enabled: bool = True
+    cache_max_entries: int = 1000  # на каждый источник
+    # TTL по источникам; не заданы — из описания коннектора, иначе cache_ttl_default_seconds
+    cache_ttl_github_seconds: float | None = None
+    cache_ttl_hackernews_seconds: float | None = None
+    cache_ttl_rss_seconds: float | None = None
+    cache_ttl_default_seconds: float = 60.0
+    # сколько после истечения TTL ещё отдаём устаревший ответ, обновляя его в фоне
+    cache_stale_seconds: float = 300.0
+    # L2 под in-memory кэшем: файл SQLite (WAL), общий для воркеров хоста и переживающий рестарт; пусто — выключен
+    cache_l2_path: str | None = None
+    cache_l2_max_mb: float = 256.0
+    cache_l2_busy_timeout_ms: int = 200  # сколько ждать блокировку файла другим воркером
+    cache_l2_maintenance_interval_seconds: float = 60.0  # чистка истёкших и вытеснение по размеру
+    cache_l2_warm_entries: int = 500  # сколько последних записей поднимать в память при старте воркера
+    # POST /v1/search/batch: сколько подзапросов в одном батче и сколько выполняется одновременно (на процесс)
+    batch_max_queries: int = 50
+    batch_max_concurrency: int = 8
+    # POST /v1/compose: сколько живут результаты локальных шагов рецептов (мемо между рецептами)
+    compose_memo_ttl_seconds: float = 30.0
+    compose_memo_max_entries: int = 1000
+    # постраничная выдача /v1/search/page: размер страницы upstream'а и сколько страниц читаем вглубь
+    search_page_size: int = 30
+    search_max_pages: int = 10
+    # ранжирование выдачи: score нормируется по шкале источника (log1p(score) / log1p(шкала), не выше 1)
+    # не задана — из описания коннектора, иначе rank_scale_default
+    rank_scale_github: float | None = None
+    rank_scale_hackernews: float | None = None
+    rank_scale_default: float = 100.0
+    rank_unscored: float = 0.3  # нормированный score записей без score (RSS)
+    rank_recency_weight: float = 0.3  # доля давности в итоговой оценке
+    rank_half_life_hours: float = 72.0
+    # сколько кандидатов брать у каждого источника перед дедупликацией и top-k (0 — столько же, сколько limit)
+    rank_candidates_per_source: int = 0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -19,5 +162,44 @@ class Settings(BaseSettings):
     def rss_feeds(self) -> list[str]:
         return [s.strip() for s in self.rss_feeds_csv.split(",") if s.strip()]
 
+    @property
+    def rate_limit_api_keys(self) -> frozenset[str]:
+        return frozenset(s.strip() for s in self.rate_limit_api_keys_csv.split(",") if s.strip())
+
+    # политики источников: переменная окружения, иначе описание коннектора, иначе общий default.
+    # Реестр импортируется здесь, а не на уровне модуля: он сам читает settings
+    def _connector_policy(self, source: str, field: str, spec_attr: str) -> float | None:
+        value = getattr(self, field, None)
+        if value is not None:
+            return value
+        from app.connectors.registry import connector_registry
+
+        spec = connector_registry.spec(source)
+        return getattr(spec, spec_attr) if spec is not None else None
+
+    def timeout_for(self, source: str) -> float:
+        value = self._connector_policy(source, f"timeout_{source}_seconds", "timeout_s")
+        return value if value is not None else self.http_timeout_seconds
+
+    def quota_per_minute_for(self, source: str) -> float | None:
+        return self._connector_policy(source, f"quota_{source}_per_minute", "quota_per_minute")
+
+    def cache_ttl_for(self, source: str) -> float:
+        value = self._connector_policy(source, f"cache_ttl_{source}_seconds", "cache_ttl_s")
+        return value if value is not None else self.cache_ttl_default_seconds
+
+    def rank_scale_for(self, source: str) -> float:
+        value = self._connector_policy(source, f"rank_scale_{source}", "rank_scale")
+        return value if value is not None else self.rank_scale_default
+
+    @property
+    def http_pool_limits(self) -> dict[str, int]:
+        limits: dict[str, int] = {}
+        for pair in self.http_pool_limits_csv.split(","):
+            name, _, value = pair.partition("=")
+            if name.strip() and value.strip().isdigit():
+                limits[name.strip()] = int(value)
+        return limits
+
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Абсолютный дедлайн запроса (по monotonic-часам)."""
+
+    expires_at: float
+
+    @classmethod
+    def after_ms(cls, ms: int) -> "Deadline":
+        return cls(expires_at=time.monotonic() + ms / 1000)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+# дедлайн текущего запроса; задачи, созданные внутри, наследуют его через контекст
+current_deadline: ContextVar[Deadline | None] = ContextVar("current_deadline", default=None)
+
+
+def clip_timeout(timeout_s: float) -> float:
+    """Таймаут одного вызова, урезанный до остатка бюджета запроса."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return timeout_s
+    return min(timeout_s, deadline.remaining())
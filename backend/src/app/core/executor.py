@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.timing import record
+
+log = logging.getLogger("api-fusion")
+
+T = TypeVar("T")
+
+
+@dataclass
+class CpuCounters:
+    inline_calls: int = 0
+    inline_ms: float = 0.0  # сколько CPU-работы выполнено прямо в event loop
+    offloaded_calls: int = 0
+    offloaded_ms: float = 0.0
+
+
+class CpuExecutor:
+    """
+    Пул для CPU-работы (парсинг и нормализация ответов), чтобы не блокировать event loop.
+    Маленькие payload'ы (меньше порога) обрабатываются inline — пересылка в пул дороже самой работы.
+    """
+
+    def __init__(self) -> None:
+        self._pool: Executor | None = None
+        self.counters = CpuCounters()
+
+    def start(self) -> None:
+        if self._pool is not None or settings.cpu_pool_kind == "none":
+            return
+        if settings.cpu_pool_kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=settings.cpu_pool_workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=settings.cpu_pool_workers, thread_name_prefix="cpu")
+
+    def stop(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int = 0, timing: str | None = None) -> T:
+        """timing — имя этапа для Server-Timing текущего запроса (например "parse-github")."""
+        if self._pool is None or size < settings.cpu_inline_threshold_bytes:
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                self.counters.inline_calls += 1
+                self.counters.inline_ms += ms
+                if timing:
+                    record(timing, ms)
+                    metrics.stage_duration.observe(ms / 1000, timing)
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, functools.partial(fn, *args))
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.counters.offloaded_calls += 1
+            self.counters.offloaded_ms += ms
+            if timing:
+                record(timing, ms)
+                metrics.stage_duration.observe(ms / 1000, timing)
+
+    def stats(self) -> dict[str, Any]:
+        data = asdict(self.counters)
+        data["inline_ms"] = round(data["inline_ms"], 1)
+        data["offloaded_ms"] = round(data["offloaded_ms"], 1)
+        data["pool"] = settings.cpu_pool_kind if self._pool is not None else None
+        return data
+
+
+@dataclass
+class LoopLagCounters:
+    samples: int = 0
+    stalls: int = 0  # сколько раз loop опоздал больше порога
+    max_lag_ms: float = 0.0
+    total_lag_ms: float = 0.0
+
+
+class LoopLagMonitor:
+    """Меряет, насколько event loop опаздывает проснуться: прямой индикатор блокирующей работы."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self.counters = LoopLagCounters()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        interval = settings.loop_lag_interval_ms / 1000
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag_ms = max((time.perf_counter() - start - interval) * 1000, 0.0)
+
+            s = self.counters
+            s.samples += 1
+            s.total_lag_ms += lag_ms
+            s.max_lag_ms = max(s.max_lag_ms, lag_ms)
+            if lag_ms >= settings.loop_stall_threshold_ms:
+                s.stalls += 1
+                log.debug(f"Event loop stalled for {lag_ms:.1f}ms")
+
+    def stats(self) -> dict[str, Any]:
+        s = self.counters
+        return {
+            "samples": s.samples,
+            "stalls": s.stalls,
+            "max_lag_ms": round(s.max_lag_ms, 1),
+            "avg_lag_ms": round(s.total_lag_ms / s.samples, 2) if s.samples else None,
+        }
+
+
+cpu_executor = CpuExecutor()
+loop_monitor = LoopLagMonitor()
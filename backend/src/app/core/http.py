@@ -1,11 +1,183 @@
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable
+
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import current_trace, tracer
+
+log = logging.getLogger("api-fusion")
+
+USER_AGENT = "api-fusion/0.1"
+
+# этапы httpcore (trace-расширение) -> спаны; DNS httpcore отдельно не сообщает, он внутри connect
+_HTTP_STEPS = {
+    "connection.connect_tcp": "http-connect",
+    "connection.start_tls": "http-tls",
+    "http11.send_request_headers": "http-send",
+    "http2.send_request_headers": "http-send",
+    # от отправки запроса до заголовков ответа: ожидание upstream'а + первый байт
+    "http11.receive_response_headers": "http-wait",
+    "http2.receive_response_headers": "http-wait",
+    "http11.receive_response_body": "http-body",
+    "http2.receive_response_body": "http-body",
+}
+
+
+def _traced(inner: Callable[[str, dict], Awaitable[None]]) -> Callable[[str, dict], Awaitable[None]]:
+    """trace-хук для запроса внутри трассы: пары started/complete этапов -> спаны."""
+    started: dict[str, float] = {}
+
+    async def hook(event_name: str, info: dict) -> None:
+        await inner(event_name, info)
+        step, _, phase = event_name.rpartition(".")
+        if step not in _HTTP_STEPS:
+            return
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase in ("complete", "failed"):
+            begin = started.pop(step, None)
+            if begin is not None:
+                error = type(info.get("exception")).__name__ if phase == "failed" else None
+                tracer.add_span(_HTTP_STEPS[step], begin, time.perf_counter(), error=error)
+
+    return hook
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_client(
+    max_connections: int | None = None,
+    timeout_s: float | None = None,
+    event_hooks: dict[str, list] | None = None,
+    wrap_transport: Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None = None,
+) -> httpx.AsyncClient:
+    max_connections = max_connections or settings.http_max_connections
+    timeout_s = timeout_s or settings.http_timeout_seconds
+
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(settings.http_max_keepalive_connections, max_connections),
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+        http2=settings.http2_enabled and _http2_available(),
+    )
+    if wrap_transport is not None:
+        transport = wrap_transport(transport)
 
-def make_client() -> httpx.AsyncClient:
     return httpx.AsyncClient(
-        timeout=httpx.Timeout(settings.http_timeout_seconds),
+        timeout=httpx.Timeout(timeout_s),
+        transport=transport,
+        event_hooks=event_hooks,
         headers={
-            "User-Agent": "api-fusion/0.1",
+            "User-Agent": USER_AGENT,
         },
-    )
\ No newline at end of file
+    )
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        reused = max(self.requests - self.connections_opened, 0)
+        data["reused"] = reused
+        data["reuse_ratio"] = round(reused / self.requests, 3) if self.requests else None
+        return data
+
+
+class HttpClients:
+    """
+    Реестр долгоживущих httpx-клиентов: отдельный пул соединений на каждый источник.
+    Запускается/останавливается в lifespan, общий для коннекторов и проб.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, PoolStats] = {}
+        # обёртка над транспортом пула (бенчмарки направляют запросы в фейковые upstream'ы)
+        self.wrap_transport: Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport] | None = None
+        # подписчики на ответы пулов: (source, response), например учёт квот по X-RateLimit-*
+        self.response_listeners: list[Callable[[str, httpx.Response], None]] = []
+
+    async def start(self) -> None:
+        if settings.http2_enabled and not _http2_available():
+            log.warning("HTTP/2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+
+    async def stop(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                log.warning(f"HTTP client close failed: {e!r}")
+
+    def get(self, source: str) -> httpx.AsyncClient:
+        # клиент создаётся лениво — так реестр работает и вне lifespan (скрипты, тесты)
+        client = self._clients.get(source)
+        if client is None or client.is_closed:
+            client = self._build(source)
+            self._clients[source] = client
+        return client
+
+    def _build(self, source: str) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(source, PoolStats())
+        upstream_latency = metrics.upstream_latency.labels(source)
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            stats.requests += 1
+            # разбивка по этапам нужна, только если запрос трассируется
+            request.extensions["trace"] = trace if current_trace.get() is None else _traced(trace)
+            request.extensions["started_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response) -> None:
+            # хук срабатывает на заголовках ответа, до чтения тела
+            started_at = response.request.extensions.get("started_at")
+            if started_at is not None:
+                now = time.perf_counter()
+                upstream_latency.observe(now - started_at)
+                # от отправки до заголовков ответа; тело читается уже после хука (http-body)
+                tracer.add_span(
+                    "http-request",
+                    started_at,
+                    now,
+                    **{
+                        "http.method": response.request.method,
+                        "http.host": response.request.url.host,
+                        "http.status_code": response.status_code,
+                    },
+                )
+            if response.status_code >= 400:
+                stats.errors += 1
+            for listener in self.response_listeners:
+                listener(source, response)
+
+        return make_client(
+            max_connections=settings.http_pool_limits.get(source),
+            timeout_s=settings.timeout_for(source),
+            event_hooks={"request": [on_request], "response": [on_response]},
+            wrap_transport=self.wrap_transport,
+        )
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {source: s.as_dict() for source, s in self._stats.items()}
+
+
+http_clients = HttpClients()
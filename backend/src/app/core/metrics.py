@@ -0,0 +1,254 @@
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+from app.core.config import settings
+
+# границы корзин в секундах (Prometheus-конвенция: базовые единицы)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 30, 50, 100)
+
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+_WINDOW_SLOTS = 6
+
+
+def bucket_quantile(bounds: tuple[float, ...], counts: list[int], q: float) -> float | None:
+    """
+    Квантиль по счётчикам корзин (последняя — +Inf) с линейной интерполяцией
+    внутри корзины, как histogram_quantile в Prometheus.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, c in enumerate(counts):
+        if seen + c >= rank and c:
+            if i == len(bounds):
+                return float(bounds[-1])
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / c
+        seen += c
+    return float(bounds[-1])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами: накопительные счётчики для Prometheus
+    и кольцо из нескольких слотов по времени — для квантилей за последнее окно.
+
+    Без блокировок: обновляется только из event loop, observe — это bisect и пара инкрементов.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_slot_s", "_slot_ids", "_slots")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя — +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._slot_s = max(settings.metrics_window_seconds / _WINDOW_SLOTS, 1.0)
+        self._slot_ids = [-1] * _WINDOW_SLOTS
+        self._slots = [[0] * (len(buckets) + 1) for _ in range(_WINDOW_SLOTS)]
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.buckets, value)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+        slot_id = int(time.monotonic() // self._slot_s)
+        k = slot_id % _WINDOW_SLOTS
+        if self._slot_ids[k] != slot_id:
+            # слот устарел — переиспользуем его под текущий интервал
+            self._slot_ids[k] = slot_id
+            self._slots[k] = [0] * len(self.counts)
+        self._slots[k][i] += 1
+
+    def window_counts(self) -> list[int]:
+        oldest = int(time.monotonic() // self._slot_s) - _WINDOW_SLOTS + 1
+        totals = [0] * len(self.counts)
+        for slot_id, slot in zip(self._slot_ids, self._slots):
+            if slot_id >= oldest:
+                for i, c in enumerate(slot):
+                    totals[i] += c
+        return totals
+
+    def quantile(self, q: float, counts: list[int] | None = None) -> float | None:
+        return bucket_quantile(self.buckets, counts if counts is not None else self.window_counts(), q)
+
+
+class HistogramFamily:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children: dict[tuple[str, ...], Histogram] = {}
+
+    def labels(self, *values: str) -> Histogram:
+        h = self._children.get(values)
+        if h is None:
+            h = self._children[values] = Histogram(self.buckets)
+        return h
+
+    def observe(self, value: float, *values: str) -> None:
+        self.labels(*values).observe(value)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for values, h in self._children.items():
+            cumulative = 0
+            for le, c in zip((*self.buckets, float("inf")), h.counts):
+                cumulative += c
+                le_label = 'le="%s"' % _fmt(le)
+                yield f"{self.name}_bucket{_labels(self.labelnames, values, le_label)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, values)} {_fmt(h.sum)}"
+            yield f"{self.name}_count{_labels(self.labelnames, values)} {h.count}"
+
+        # квантили за скользящее окно — чтобы алертить на p99 без histogram_quantile/rate
+        window = f"{self.name}_window"
+        yield f"# HELP {window} {self.help} (last {int(settings.metrics_window_seconds)}s, estimated)"
+        yield f"# TYPE {window} gauge"
+        for values, h in self._children.items():
+            counts = h.window_counts()
+            for q in WINDOW_QUANTILES:
+                v = h.quantile(q, counts)
+                if v is not None:
+                    q_label = 'quantile="%s"' % q
+                    yield f"{window}{_labels(self.labelnames, values, q_label)} {_fmt(v)}"
+
+    def stats(self) -> dict[str, dict]:
+        out = {}
+        for values, h in self._children.items():
+            counts = h.window_counts()
+            out["/".join(values)] = {
+                "count": h.count,
+                "window_count": sum(counts),
+                **{f"p{int(q * 100)}": h.quantile(q, counts) for q in WINDOW_QUANTILES},
+            }
+        return out
+
+
+class CounterFamily:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for values, v in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, values)} {_fmt(v)}"
+
+    def stats(self) -> dict[str, float]:
+        return {"/".join(values): v for values, v in self._values.items()}
+
+
+class Metrics:
+    """Метрики процесса: источники, этапы обработки и эндпоинты. Отдаются на /metrics."""
+
+    def __init__(self) -> None:
+        self.source_latency = HistogramFamily(
+            "apifusion_source_latency_seconds",
+            "Connector call latency per source, including parsing",
+            ("source",),
+            LATENCY_BUCKETS,
+        )
+        self.upstream_latency = HistogramFamily(
+            "apifusion_upstream_response_seconds",
+            "Time until upstream response headers, per source connection pool",
+            ("source",),
+            LATENCY_BUCKETS,
+        )
+        self.stage_duration = HistogramFamily(
+            "apifusion_stage_seconds",
+            "CPU stage duration (parse-github, parse-hackernews, ...)",
+            ("stage",),
+            PARSE_BUCKETS,
+        )
+        self.source_items = HistogramFamily(
+            "apifusion_source_items",
+            "Items returned per source call",
+            ("source",),
+            COUNT_BUCKETS,
+        )
+        self.source_results = CounterFamily(
+            "apifusion_source_results_total",
+            "Source results by cache status (hit/stale/miss) and outcome (ok or ErrorInfo.type)",
+            ("source", "cache", "outcome"),
+        )
+        self.quota_events = CounterFamily(
+            "apifusion_quota_events_total",
+            "Upstream quota scheduler events per source (waited, shed, cache_fallback)",
+            ("source", "event"),
+        )
+        self.circuit_transitions = CounterFamily(
+            "apifusion_circuit_transitions_total",
+            "Circuit breaker state transitions per source (label: new state)",
+            ("source", "state"),
+        )
+        self.rate_limited = CounterFamily(
+            "apifusion_rate_limited_total",
+            "Requests rejected by the inbound rate limiter (key kind: ip or key)",
+            ("kind",),
+        )
+        self.http_latency = HistogramFamily(
+            "apifusion_http_request_seconds",
+            "API request latency per endpoint",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.http_responses = CounterFamily(
+            "apifusion_http_responses_total",
+            "API responses per endpoint and status code",
+            ("method", "route", "status"),
+        )
+        self._families = (
+            self.source_latency,
+            self.upstream_latency,
+            self.stage_duration,
+            self.source_items,
+            self.source_results,
+            self.circuit_transitions,
+            self.quota_events,
+            self.rate_limited,
+            self.http_latency,
+            self.http_responses,
+        )
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> dict[str, dict]:
+        return {f.name: f.stats() for f in self._families}
+
+
+metrics = Metrics()
@@ -1,57 +1,113 @@
 import time
 import uuid
-from typing import Callable
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core.metrics import metrics
+from app.core.timing import Timings, current_timings
+from app.core.tracing import Span, current_trace, tracer
+
+
+def _route_label(scope: Scope) -> str:
+    # шаблон пути ("/v1/search"), а не сырой path: иначе метки размножатся
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestMetaMiddleware:
+    """
+    Чистый ASGI middleware (без BaseHTTPMiddleware: нет лишней задачи на запрос
+    и не ломается стриминг). Ставит X-Request-Id / X-Took-Ms / Server-Timing
+    и после ответа логирует поиск.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestMetaMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # request_id доступен сразу
-        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
-        request.state.request_id = request_id
+        request_headers = Headers(scope=scope)
+        request_id = request_headers.get("x-request-id") or uuid.uuid4().hex
+        # scope["state"] — это то же, что request.state в роутах
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+
+        # корневой спан: имя уточняется после роутинга (шаблон пути), решение о сохранении — в конце
+        with tracer.trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=request_headers.get("traceparent"),
+            request_id=request_id,
+        ) as root:
+            await self._handle(scope, receive, send, state, request_id, root)
 
+    async def _handle(
+        self, scope: Scope, receive: Receive, send: Send, state: dict, request_id: str, root: Span | None
+    ) -> None:
+        trace = current_trace.get()
         start = time.perf_counter()
+        state["started_at"] = start
+        timings = Timings()
+        token = current_timings.set(timings)
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                now = time.perf_counter()
+                if timings.handler_done_at is not None:
+                    timings.add("serialize", (now - timings.handler_done_at) * 1000)
+                timings.add("total", (now - start) * 1000)
+
+                # полезные заголовки для curl/debug
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-Id", request_id)
+                headers.append("X-Took-Ms", str(int((now - start) * 1000)))
+                headers.append("Server-Timing", timings.header())
+                # без этого браузер не покажет Server-Timing для cross-origin запросов фронта
+                headers.append("Timing-Allow-Origin", "*")
+                if trace is not None:
+                    headers.append("X-Trace-Id", trace.trace_id)
+                    if timings.handler_done_at is not None:
+                        tracer.add_span("serialize", timings.handler_done_at, now)
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_headers)
         finally:
-            request.state.took_ms = int((time.perf_counter() - start) * 1000)
+            current_timings.reset(token)
+            # полное время, включая отдачу тела (важно для стрима)
+            elapsed = time.perf_counter() - start
+            state["took_ms"] = int(elapsed * 1000)
+            route = _route_label(scope)
+            metrics.http_latency.observe(elapsed, scope["method"], route)
+            metrics.http_responses.inc(scope["method"], route, str(status_code))
+            if root is not None:
+                root.name = f"{scope['method']} {route}"
+                root.set(**{"http.method": scope["method"], "http.route": route, "http.status_code": status_code})
 
-        # полезные заголовки для curl/debug
-        response.headers["X-Request-Id"] = request_id
-        response.headers["X-Took-Ms"] = str(request.state.took_ms)
-
-        # логируем search ПОСЛЕ выполнения (took_ms уже есть)
-        if request.url.path == "/v1/search" and response.status_code == 200:
+        # логируем search ПОСЛЕ выполнения (took_ms уже есть);
+        # результат поиска (items/errors/cache) кладёт в request.state сам роут
+        search_log = state.get("search_log")
+        # 304 — тоже выполненный поиск, клиенту просто не понадобилось тело
+        if search_log is not None and status_code in (200, 304):
             try:
                 # локальный импорт = меньше риска циклических импортов
-                from app.services.logs import write_search_log
-
-                q = request.query_params.get("q")
-                sources = request.query_params.getlist("sources")
-
-                limit_raw = request.query_params.get("limit")
-                try:
-                    limit = int(limit_raw) if limit_raw is not None else None
-                except ValueError:
-                    limit = None
-
-                # ВАЖНО: передаём ТОЛЬКО те аргументы,
-                # которые точно ожидает твоя текущая write_search_log().
-                await write_search_log(
-                    request_id=request_id,
-                    path=request.url.path,
-                    q=q,
-                    sources=sources,
-                    limit=limit,
-                    took_ms=request.state.took_ms,
-                    items_count=0,
-                    errors=[],
-                )
+                from app.services.logs import enqueue_search_log
+
+                # не ждём БД: строка уходит в очередь, пишется пачкой в фоне
+                with tracer.span("log-enqueue"):
+                    enqueue_search_log(
+                        request_id=request_id,
+                        path=scope["path"],
+                        took_ms=state["took_ms"],
+                        **search_log,
+                    )
             except Exception:
                 # никогда не роняем /v1/search из-за логирования
                 pass
-
-        return response
\ No newline at end of file
@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Any
+
+
+class ProfilerBusyError(RuntimeError):
+    """Профиль уже снимается: два сэмплера сразу только исказят друг друга."""
+
+
+def _frame_label(code: Any) -> str:
+    # функция + файл:первая строка — стабильный ключ (номер текущей строки дробил бы стеки)
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+@dataclass
+class ProfileResult:
+    seconds: float
+    interval_ms: float
+    samples: int
+    # свёрнутые стеки "корень;...;лист" -> число сэмплов (формат flamegraph.pl / speedscope)
+    stacks: Counter
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def top(self, n: int = 30) -> list[dict[str, Any]]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            # рекурсия не должна считать функцию дважды в одном сэмпле
+            for frame in set(frames):
+                total[frame] += count
+        return [
+            {
+                "function": fn,
+                "self": own[fn],
+                "total": total[fn],
+                "self_pct": round(own[fn] * 100 / self.samples, 1) if self.samples else 0.0,
+                "total_pct": round(total[fn] * 100 / self.samples, 1) if self.samples else 0.0,
+            }
+            for fn, _ in own.most_common(n)
+        ]
+
+
+@dataclass
+class ProfilerCounters:
+    profiles: int = 0
+    samples: int = 0
+    rejected: int = 0  # запросы, пришедшие во время уже идущего профиля
+
+
+class SamplingProfiler:
+    """
+    Сэмплирующий профилировщик живого процесса: отдельный поток каждые interval
+    снимает стек потока event loop через sys._current_frames(). Сам loop не
+    останавливается и ничего не инструментирует — стоимость только во время профиля.
+    """
+
+    def __init__(self) -> None:
+        self.counters = ProfilerCounters()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, thread_id: int, seconds: float, interval_s: float) -> ProfileResult:
+        """Блокирующий: вызывать в отдельном потоке (asyncio.to_thread)."""
+        if not self._lock.acquire(blocking=False):
+            self.counters.rejected += 1
+            raise ProfilerBusyError("Profile already running")
+        try:
+            self.counters.profiles += 1
+            stacks: Counter = Counter()
+            samples = 0
+            started = time.monotonic()
+            deadline = started + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                if frame is None:
+                    break
+                labels: list[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval_s)
+            self.counters.samples += samples
+            return ProfileResult(round(time.monotonic() - started, 3), interval_s * 1000, samples, stacks)
+        finally:
+            self._lock.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {**asdict(self.counters), "running": self.running}
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,256 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.responses import dumps
+
+log = logging.getLogger("api-fusion")
+
+
+@dataclass(slots=True)
+class Decision:
+    allowed: bool
+    remaining: int
+    retry_after_s: float  # через сколько появится токен (0, если allowed)
+
+
+def _take(tokens: float, updated_at: float, now: float, rate: float, burst: float, cost: float) -> tuple[bool, float]:
+    """Один шаг token bucket: (пропустить ли, токенов после шага)."""
+    tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= cost:
+        return True, tokens - cost
+    return False, tokens
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, rate: float, burst: float, cost: float = 1) -> Decision: ...
+
+
+class MemoryBackend:
+    """
+    Token bucket'ы в памяти процесса, разбитые на шарды по хэшу ключа.
+    Шард упорядочен по последнему обращению (LRU): уборка снимает простаивающие
+    ключи с начала и останавливается на первом активном, не проходя весь шард.
+    Подходит для одного процесса; для нескольких воркеров — SharedBackend.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000) -> None:
+        self._shards: list[OrderedDict[str, list[float]]] = [OrderedDict() for _ in range(shards)]
+        self._max_per_shard = max(max_keys // shards, 1)
+
+    async def hit(self, key: str, rate: float, burst: float, cost: float = 1) -> Decision:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        bucket = shard.get(key)
+        if bucket is None:
+            if len(shard) >= self._max_per_shard:
+                self._sweep(shard, now, rate, burst, self._max_per_shard)
+            bucket = shard[key] = [burst, now]
+        else:
+            shard.move_to_end(key)
+
+        allowed, tokens = _take(bucket[0], bucket[1], now, rate, burst, cost)
+        bucket[0], bucket[1] = tokens, now
+        return Decision(allowed, int(tokens), 0.0 if allowed else (cost - tokens) / rate)
+
+    @staticmethod
+    def _sweep(shard: OrderedDict[str, list[float]], now: float, rate: float, burst: float, max_keys: int) -> None:
+        # ключ, чей bucket уже успел наполниться, ничем не отличается от нового — его можно забыть;
+        # в начале шарда — самые давние, на первом активном ключе дальше смотреть незачем
+        idle_s = burst / rate
+        while shard:
+            _, (_, updated_at) = next(iter(shard.items()))
+            if now - updated_at < idle_s:
+                break
+            shard.popitem(last=False)
+        if len(shard) >= max_keys:
+            # если все активны — выкидываем самый давний, чтобы память не росла без предела
+            shard.popitem(last=False)
+
+    def keys(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+
+class SharedStore(Protocol):
+    """
+    Общее для всех воркеров хранилище, которое умеет атомарно выполнить шаг token bucket
+    (в Redis — Lua-скрипт). Возвращает (пропустить ли, токенов осталось).
+    """
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> tuple[bool, float]: ...
+
+
+class LocalSharedStore:
+    """Локальная замена общего хранилища с тем же контрактом — для тестов и одного процесса."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, float]] = {}
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> tuple[bool, float]:
+        now = time.time()
+        tokens, updated_at = self._data.get(key, (burst, now))
+        allowed, tokens = _take(tokens, updated_at, now, rate, burst, cost)
+        self._data[key] = (tokens, now)
+        return allowed, tokens
+
+
+_REDIS_TAKE = """
+local data = redis.call('HMGET', KEYS[1], 't', 'u')
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1e6
+local tokens = tonumber(data[1]) or burst
+local updated = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisStore:
+    """SharedStore поверх Redis (пакет redis опционален): шаг bucket'а — один EVALSHA."""
+
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float) -> tuple[bool, float]:
+        allowed, tokens = await self._script(keys=[key], args=[rate, burst, cost])
+        return bool(allowed), float(tokens)
+
+
+class SharedBackend:
+    """
+    Лимиты, общие для всех воркеров. Если хранилище недоступно — пропускаем запрос
+    (fail-open): падение Redis не должно класть API.
+    """
+
+    def __init__(self, store: SharedStore, prefix: str = "ratelimit:") -> None:
+        self.store = store
+        self.prefix = prefix
+        self.errors = 0
+
+    async def hit(self, key: str, rate: float, burst: float, cost: float = 1) -> Decision:
+        try:
+            allowed, tokens = await self.store.take(self.prefix + key, rate, burst, cost)
+        except Exception as e:
+            self.errors += 1
+            log.warning(f"Rate limit store failed, allowing request: {e!r}")
+            return Decision(True, int(burst), 0.0)
+        return Decision(allowed, int(tokens), 0.0 if allowed else (cost - tokens) / rate)
+
+
+def make_backend() -> RateLimitBackend:
+    kind = settings.rate_limit_backend
+    if kind == "redis":
+        if settings.rate_limit_redis_url:
+            try:
+                return SharedBackend(RedisStore(settings.rate_limit_redis_url))
+            except ImportError:
+                log.warning("RATE_LIMIT_BACKEND=redis but 'redis' is not installed, falling back to memory")
+        else:
+            log.warning("RATE_LIMIT_BACKEND=redis but RATE_LIMIT_REDIS_URL is empty, falling back to memory")
+    elif kind == "local_shared":
+        return SharedBackend(LocalSharedStore())
+    return MemoryBackend(max_keys=settings.rate_limit_max_keys)
+
+
+def forwarded_client(forwarded: str | None, trusted_hops: int) -> str | None:
+    """
+    Адрес клиента из X-Forwarded-For за trusted_hops своими прокси.
+    Начало заголовка присылает сам клиент, поэтому считаем с конца: каждый свой прокси
+    дописывает адрес того, кто к нему пришёл. Короткий заголовок — None (берём адрес соединения).
+    """
+    if not forwarded or trusted_hops < 1:
+        return None
+    entries = [e.strip() for e in forwarded.split(",")]
+    if len(entries) < trusted_hops:
+        return None
+    return entries[-trusted_hops] or None
+
+
+class RateLimitMiddleware:
+    """
+    Входящий rate limit на /v1: token bucket на клиента (выданный API-ключ, иначе IP).
+    Превышение — 429 с Retry-After; остальным ответам добавляются X-RateLimit-Limit/Remaining.
+    """
+
+    def __init__(self, app: ASGIApp, backend: RateLimitBackend | None = None) -> None:
+        self.app = app
+        self.backend = backend if backend is not None else make_backend()
+
+    def _client_key(self, scope: Scope) -> tuple[str, float]:
+        headers = Headers(scope=scope)
+        api_key = headers.get(settings.rate_limit_api_key_header)
+        # свой bucket — только у выданного ключа: неизвестный ключ не обходит лимит по IP
+        if api_key and api_key in settings.rate_limit_api_keys:
+            return f"key:{api_key}", settings.rate_limit_api_key_per_minute or settings.rate_limit_per_minute
+
+        ip = None
+        if settings.rate_limit_trust_forwarded:
+            ip = forwarded_client(headers.get("x-forwarded-for"), settings.rate_limit_trusted_hops)
+        if ip is None:
+            client = scope.get("client")
+            ip = client[0] if client else "unknown"
+        return f"ip:{ip}", settings.rate_limit_per_minute
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or not scope["path"].startswith(settings.rate_limit_path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key, per_minute = self._client_key(scope)
+        burst = settings.rate_limit_burst or per_minute
+        decision = await self.backend.hit(key, per_minute / 60.0, burst)
+        limit = str(int(per_minute))
+
+        if not decision.allowed:
+            metrics.rate_limited.inc(key.partition(":")[0])
+            retry_after = str(max(math.ceil(decision.retry_after_s), 1))
+            body = dumps({"detail": "Rate limit exceeded", "retry_after_s": int(retry_after)})
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", retry_after.encode()),
+                        (b"x-ratelimit-limit", limit.encode()),
+                        (b"x-ratelimit-remaining", b"0"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        remaining = str(decision.remaining)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", limit)
+                headers.append("X-RateLimit-Remaining", remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.models.items import Item
+
+try:
+    # orjson опционален: с ним быстрее, без него — stdlib json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Item):
+        return obj.to_dict()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON без jsonable_encoder и без повторной валидации через response_model:
+    роут отдаёт уже готовые dict/Item, здесь они только сериализуются.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# суффикс, который CompressionMiddleware дописывает к ETag сжатого представления
+_ENCODED_ETAG_SUFFIXES = ('-gzip"', '-br"')
+
+
+@dataclass
+class ConditionalCounters:
+    checked: int = 0  # запросы с If-None-Match
+    not_modified: int = 0
+
+
+conditional_counters = ConditionalCounters()
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """
+    ETag из содержимого: одни и те же части — один и тот же тег.
+    weak=True — тег из части полей: тело с тем же тегом может отличаться в мелочах (W/"...").
+    """
+    h = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\x1f")
+    return f'W/"{h.hexdigest()}"' if weak else f'"{h.hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    # у сжатого ответа другие байты — значит и другой сильный тег; слабый тег байты не обещает
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    # If-None-Match сравнивается слабо (W/ не важен); суффикс сжатия — то же содержимое
+    tag = tag.strip().removeprefix("W/")
+    for suffix in _ENCODED_ETAG_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    # no-cache: браузер хранит ответ, но каждый раз переспрашивает с If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """304 без тела, если клиент уже держит это представление; иначе None — роут отвечает как обычно."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    conditional_counters.checked += 1
+    current = _opaque_tag(etag)
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or _opaque_tag(tag) == current:
+            conditional_counters.not_modified += 1
+            # тег — тот, что прислал клиент: он совпадает с закэшированным у него (в том числе сжатым)
+            return Response(status_code=304, headers=etag_headers(etag if tag == "*" else tag))
+    return None
+
+
+def conditional_stats() -> dict[str, int]:
+    return asdict(conditional_counters)
@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.core.tracing import Span, tracer
+
+
+class Timings:
+    """
+    Разбивка времени одного запроса по этапам (fetch/parse/merge/serialize) —
+    уходит клиенту в заголовке Server-Timing.
+    """
+
+    def __init__(self) -> None:
+        self._durations: dict[str, float] = {}
+        self.handler_done_at: float | None = None
+
+    def add(self, name: str, ms: float) -> None:
+        self._durations[name] = self._durations.get(name, 0.0) + ms
+
+    def items(self) -> list[tuple[str, float]]:
+        return list(self._durations.items())
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self._durations.items())
+
+
+# тайминги текущего запроса; задачи, созданные внутри, пишут в тот же объект
+current_timings: ContextVar[Timings | None] = ContextVar("current_timings", default=None)
+
+
+def record(name: str, ms: float) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, ms)
+    # этап, измеренный снаружи (работа в пуле), — в трассу интервалом, закончившимся сейчас
+    now = time.perf_counter()
+    tracer.add_span(name, now - ms / 1000, now)
+
+
+@contextmanager
+def measure(name: str) -> Iterator[Span | None]:
+    """Этап в Server-Timing и одноимённый спан трассы (если запрос трассируется)."""
+    start = time.perf_counter()
+    try:
+        with tracer.span(name) as span:
+            yield span
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(name, ms)
+
+
+def mark_handler_done() -> None:
+    # всё, что после этой отметки и до отправки заголовков, — сериализация ответа
+    timings = current_timings.get()
+    if timings is not None:
+        timings.handler_done_at = time.perf_counter()
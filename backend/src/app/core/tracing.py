@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from app.core.config import settings
+
+log = logging.getLogger("api-fusion")
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """W3C traceparent "00-<trace_id>-<parent_id>-<flags>" -> (trace_id, parent_id, sampled)."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Span:
+    # span_id выдаётся только сохранённым трассам (при экспорте), связь с родителем — ссылкой
+    __slots__ = ("name", "span_id", "parent", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent: "Span | None", start: float, attrs: dict[str, Any] | None = None) -> None:
+        self.name = name
+        self.span_id: str | None = None
+        self.parent = parent
+        self.start = start  # perf_counter
+        self.end: float | None = None
+        self.attrs = attrs or {}
+        self.error: str | None = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class Trace:
+    """Спаны одного запроса (или фоновой операции); решение о сохранении — в конце."""
+
+    __slots__ = ("trace_id", "remote_parent_id", "root", "head_sampled", "started_at_ns", "t0", "spans", "dropped_spans")
+
+    def __init__(self, name: str, trace_id: str | None, head_sampled: bool, parent_id: str | None = None) -> None:
+        self.trace_id = trace_id or _new_id(128)
+        # родитель корня из входящего traceparent (спан вызывающего сервиса)
+        self.remote_parent_id = parent_id
+        self.head_sampled = head_sampled
+        # wall clock — для экспорта, perf_counter — для длительностей
+        self.started_at_ns = time.time_ns()
+        self.t0 = time.perf_counter()
+        self.root = Span(name, None, self.t0)
+        self.spans: list[Span] = [self.root]
+        self.dropped_spans = 0
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) >= settings.tracing_max_spans:
+            self.dropped_spans += 1
+            return
+        self.spans.append(span)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return (end - self.t0) * 1000
+
+    def unix_ns(self, t: float) -> int:
+        return self.started_at_ns + int((t - self.t0) * 1e9)
+
+    @staticmethod
+    def _span_id(span: Span) -> str:
+        if span.span_id is None:
+            span.span_id = _new_id(64)
+        return span.span_id
+
+    def _parent_id(self, span: Span) -> str | None:
+        if span.parent is not None:
+            return self._span_id(span.parent)
+        return self.remote_parent_id if span is self.root else None
+
+    def to_dict(self, reason: str) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": datetime.fromtimestamp(self.started_at_ns / 1e9, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "kept": reason,
+            "dropped_spans": self.dropped_spans,
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": self._span_id(s),
+                    "parent_id": self._parent_id(s),
+                    "start_ms": round((s.start - self.t0) * 1000, 3),
+                    "duration_ms": round(((s.end or s.start) - s.start) * 1000, 3),
+                    "attrs": s.attrs,
+                    "error": s.error,
+                }
+                for s in self.spans
+            ],
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Одна трасса в JSON-кодировке OTLP (ExportTraceServiceRequest) — её читает otlpjsonfile receiver коллектора."""
+        spans = []
+        for s in self.spans:
+            span: dict[str, Any] = {
+                "traceId": self.trace_id,
+                "spanId": self._span_id(s),
+                "name": s.name,
+                "kind": 2 if s is self.root and "http.method" in s.attrs else 1,  # SERVER / INTERNAL
+                "startTimeUnixNano": str(self.unix_ns(s.start)),
+                "endTimeUnixNano": str(self.unix_ns(s.end or s.start)),
+                "attributes": [_otlp_attr(k, v) for k, v in s.attrs.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+            }
+            parent_id = self._parent_id(s)
+            if parent_id:
+                span["parentSpanId"] = parent_id
+            spans.append(span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attr("service.name", settings.app_name)]},
+                    "scopeSpans": [{"scope": {"name": "api-fusion"}, "spans": spans}],
+                }
+            ]
+        }
+
+
+def _otlp_attr(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        v = {"boolValue": value}
+    elif isinstance(value, int):
+        v = {"intValue": str(value)}
+    elif isinstance(value, float):
+        v = {"doubleValue": value}
+    else:
+        v = {"stringValue": str(value)}
+    return {"key": key, "value": v}
+
+
+# трасса и текущий родительский спан; задачи, созданные внутри, наследуют оба
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class TracingCounters:
+    traces: int = 0
+    kept_head: int = 0  # попали в долю tracing_sample_rate (или traceparent с флагом sampled)
+    kept_slow: int = 0  # дольше tracing_slow_ms
+    kept_error: int = 0  # 5xx или спан с ошибкой
+    discarded: int = 0
+    exported: int = 0
+    export_dropped: int = 0  # очередь экспорта переполнена
+    export_failed: int = 0
+
+
+class Tracer:
+    """
+    Спаны на запрос: всегда пишутся в память запроса (несколько микросекунд на спан),
+    а решение о сохранении принимается в конце — head (доля запросов, решается
+    на входе) или tail (медленные и с ошибками сохраняются всегда).
+
+    Сохранённые трассы — в кольцевом буфере (/admin/traces) и в экспорт:
+    JSONL-файл (tracing_export=jsonl) или OTLP JSON (tracing_export=otlp_json),
+    запись в файл — в фоне пачками, запрос не ждёт диск.
+    """
+
+    def __init__(self) -> None:
+        self.counters = TracingCounters()
+        self.recent: deque[dict[str, Any]] = deque(maxlen=settings.tracing_buffer_size)
+        self._queue: asyncio.Queue[str] | None = None
+        self._task: asyncio.Task | None = None
+
+    @contextmanager
+    def trace(self, name: str, traceparent: str | None = None, **attrs: Any) -> Iterator[Span | None]:
+        """Корневой спан запроса или фоновой операции."""
+        if not settings.tracing_enabled:
+            yield None
+            return
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace = Trace(name, parent[0], parent[2], parent_id=parent[1])
+        else:
+            trace = Trace(name, None, random.random() < settings.tracing_sample_rate)
+        trace.root.attrs.update(attrs)
+        self.counters.traces += 1
+
+        trace_token = current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        try:
+            yield trace.root
+        except BaseException as e:
+            trace.root.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(span_token)
+            current_trace.reset(trace_token)
+            trace.root.end = time.perf_counter()
+            self._finish(trace)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span | None]:
+        trace = current_trace.get()
+        if trace is None:
+            yield None
+            return
+        span = Span(name, _current_span.get(), time.perf_counter(), attrs)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            # отмена по дедлайну — тоже причина медленного запроса, её видно в трассе
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.perf_counter()
+
+    def add_span(self, name: str, start: float, end: float, error: str | None = None, **attrs: Any) -> None:
+        """Готовый интервал (perf_counter) под текущим спаном: этапы HTTP из trace-хуков, работа в пуле."""
+        trace = current_trace.get()
+        if trace is None:
+            return
+        span = Span(name, _current_span.get(), start, attrs)
+        span.end = end
+        span.error = error
+        trace.add(span)
+
+    def _finish(self, trace: Trace) -> None:
+        status = trace.root.attrs.get("http.status_code")
+        if trace.head_sampled:
+            reason = "head"
+            self.counters.kept_head += 1
+        elif trace.duration_ms >= settings.tracing_slow_ms:
+            reason = "slow"
+            self.counters.kept_slow += 1
+        elif (isinstance(status, int) and status >= 500) or any(s.error for s in trace.spans):
+            reason = "error"
+            self.counters.kept_error += 1
+        else:
+            self.counters.discarded += 1
+            return
+
+        data = trace.to_dict(reason)
+        self.recent.append(data)
+        if self._queue is None:
+            return
+        line = json.dumps(trace.to_otlp() if settings.tracing_export == "otlp_json" else data, ensure_ascii=False)
+        if self._queue.full():
+            self.counters.export_dropped += 1
+            return
+        self._queue.put_nowait(line)
+
+    def start(self) -> None:
+        if not settings.tracing_enabled or settings.tracing_export == "none" or self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.tracing_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # дописываем то, что успело накопиться
+        await self._flush()
+        self._queue = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.tracing_flush_interval_ms / 1000)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        lines: list[str] = []
+        while self._queue is not None and not self._queue.empty():
+            lines.append(self._queue.get_nowait())
+        if not lines:
+            return
+        try:
+            await asyncio.to_thread(self._write, lines)
+            self.counters.exported += len(lines)
+        except Exception as e:
+            self.counters.export_failed += len(lines)
+            log.warning(f"Trace export failed ({len(lines)} traces): {e!r}")
+
+    @staticmethod
+    def _write(lines: list[str]) -> None:
+        with open(settings.tracing_export_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def find(self, trace_id: str) -> dict[str, Any] | None:
+        return next((t for t in reversed(self.recent) if t["trace_id"] == trace_id), None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **asdict(self.counters),
+            "buffered": len(self.recent),
+            "export": settings.tracing_export if self._task is not None else None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+tracer = Tracer()
@@ -1,20 +1,45 @@
 import logging
 
-from app.db.models import Base
 from app.db.session import get_engine
 
 log = logging.getLogger("api-fusion")
 
 
+def _add_missing_columns(sync_conn) -> None:
+    from sqlalchemy import inspect
+
+    from app.db.models import RequestLog
+
+    table = RequestLog.__table__
+    existing = {c["name"] for c in inspect(sync_conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            # NOT NULL без значения по умолчанию на старые строки не добавить — только руками
+            log.warning(f"Column {table.name}.{column.name} is missing and cannot be added automatically")
+            continue
+        ddl_type = column.type.compile(dialect=sync_conn.dialect)
+        sync_conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl_type}")
+        log.info(f"Added column {table.name}.{column.name}")
+
+
 async def init_db() -> None:
     engine = get_engine()
     if engine is None:
         log.warning("DB disabled: DATABASE_URL not set")
         return
 
+    from app.db.models import Base, RequestLog
+
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            # create_all не трогает существующие таблицы: индексы (например на ts) доводим отдельно
+            for index in RequestLog.__table__.indexes:
+                await conn.run_sync(index.create, checkfirst=True)
+            # ...как и новые nullable-колонки (cache, details): без них старая БД не примет ни одной записи лога
+            await conn.run_sync(_add_missing_columns)
         log.info("DB ready")
     except Exception as e:
         # Критично: НЕ валим приложение
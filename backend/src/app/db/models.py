@@ -12,7 +12,9 @@ class RequestLog(Base):
     __tablename__ = "request_logs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    ts: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True
+    )
 
     request_id: Mapped[str] = mapped_column(String(64), index=True)
     path: Mapped[str] = mapped_column(String(200))
@@ -23,4 +25,36 @@ class RequestLog(Base):
     took_ms: Mapped[int] = mapped_column(Integer)
     items_count: Mapped[int] = mapped_column(Integer)
     errors_count: Mapped[int] = mapped_column(Integer)
-    errors: Mapped[list[dict]] = mapped_column(JSON, default=list)
\ No newline at end of file
+    errors: Mapped[list[dict]] = mapped_column(JSON, default=list)
+    cache: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # батч: по строке на подзапрос (q, sources, limit, took_ms, items_count, errors_count, cache, same_as)
+    details: Mapped[list[dict] | None] = mapped_column(JSON, nullable=True)
+
+
+class RequestLogRollup(Base):
+    """
+    Агрегаты request_logs по минутам и часам. Пополняются в той же транзакции,
+    что и сами логи; /v1/logs/stats читает только эту таблицу.
+    """
+
+    __tablename__ = "request_log_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(8), primary_key=True)  # minute | hour
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    source: Mapped[str] = mapped_column(String(32), primary_key=True)  # "*" — все запросы
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[int] = mapped_column(Integer, default=0)  # запросов с ошибкой (для source — этого источника)
+    items_sum: Mapped[int] = mapped_column(Integer, default=0)
+    took_ms_sum: Mapped[int] = mapped_column(Integer, default=0)
+    took_ms_max: Mapped[int] = mapped_column(Integer, default=0)
+
+    # гистограмма took_ms: число запросов с took_ms <= границы (не накопительно)
+    lat_le_50: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_100: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_250: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_500: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_1000: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_2500: Mapped[int] = mapped_column(Integer, default=0)
+    lat_le_5000: Mapped[int] = mapped_column(Integer, default=0)
+    lat_inf: Mapped[int] = mapped_column(Integer, default=0)
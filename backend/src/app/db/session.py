@@ -1,7 +1,12 @@
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 _engine: AsyncEngine | None = None
 _sessionmaker: async_sessionmaker[AsyncSession] | None = None
 
@@ -13,16 +18,24 @@ def get_engine() -> AsyncEngine | None:
     if not settings.database_url:
         return None
 
+    # SQLAlchemy — самый тяжёлый импорт приложения: без DATABASE_URL воркер его не грузит
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    # у SQLite свой пул без pool_size/max_overflow; настройки пула — только для Postgres
+    engine_kwargs: dict = {}
+    if settings.database_url.startswith("postgresql"):
+        engine_kwargs = {"pool_size": 5, "max_overflow": 5}
+    if settings.database_url.startswith("postgresql+asyncpg"):
+        # asyncpg за pgbouncer: без prepared statements
+        engine_kwargs["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        }
+
     _engine = create_async_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=5,
-    connect_args={
-        "statement_cache_size": 0,
-        "prepared_statement_cache_size": 0,
-      
-    },
+    **engine_kwargs,
 )
     _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
     return _engine
@@ -1,23 +1,59 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.routes_admin import router as admin_router
 from app.api.routes_system import router as system_router
 from app.api.routes_v1 import router as v1_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.connectors.registry import connector_registry
+from app.core.executor import cpu_executor, loop_monitor
+from app.core.http import http_clients
 from app.core.middleware import RequestMetaMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.tracing import tracer
 
 from contextlib import asynccontextmanager
 
 from app.db.init import init_db
+from app.services.disk_cache import disk_cache
+from app.services.logs import log_writer
+from app.services.sources_status import health_monitor
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
-    yield
+    log_writer.start()
+    cpu_executor.start()
+    loop_monitor.start()
+    await http_clients.start()
+    # до первого запроса: прогрев L1 из общего файла кэша
+    await disk_cache.start()
+    # фоновые части коннекторов (ingester RSS); код поиска импортируется по первому вызову
+    connector_registry.start()
+    health_monitor.start()
+    tracer.start()
+    try:
+        yield
+    finally:
+        await health_monitor.stop()
+        await connector_registry.stop()
+        await disk_cache.stop()
+        await http_clients.stop()
+        await loop_monitor.stop()
+        cpu_executor.stop()
+        # последним: дописываем очередь логов, затем трассы (в том числе записи логов)
+        await log_writer.stop()
+        await tracer.stop()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
+# порядок: CORS -> RequestMeta -> RateLimit -> Compression -> роуты (последний добавленный — внешний),
+# так 429 тоже получают CORS-заголовки, X-Request-Id и попадают в метрики,
+# а время сжатия входит в X-Took-Ms и Server-Timing
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestMetaMiddleware)
 # dev cors settings
 app.add_middleware(
@@ -26,7 +62,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # иначе фронт не прочитает эти заголовки cross-origin
+    expose_headers=[
+        "X-Request-Id",
+        "X-Took-Ms",
+        "X-Next-Cursor",
+        "Server-Timing",
+        "Retry-After",
+        "X-RateLimit-Limit",
+        "X-RateLimit-Remaining",
+        "X-Trace-Id",
+        "ETag",
+    ],
 )
 
 app.include_router(system_router)
-app.include_router(v1_router)
\ No newline at end of file
+app.include_router(v1_router)
+app.include_router(admin_router)
\ No newline at end of file
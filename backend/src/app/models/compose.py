@@ -0,0 +1,103 @@
+from typing import Annotated, Literal, Union
+
+from pydantic import BaseModel, Field
+
+from app.models.items import UtcDatetime
+from app.models.search import ErrorInfo, SearchItem, SourceName
+
+StepId = Annotated[str, Field(pattern=r"^[A-Za-z0-9_-]{1,40}$")]
+
+
+class SearchStep(BaseModel):
+    """Вызов одного коннектора (через кэш, single-flight, breaker и квоту — как в /v1/search)."""
+    id: StepId
+    op: Literal["search"]
+    source: SourceName
+    q: str = Field(min_length=1, max_length=200)
+    limit: int = Field(default=20, ge=1, le=50)
+
+
+class FilterStep(BaseModel):
+    id: StepId
+    op: Literal["filter"]
+    input: StepId
+    contains: str | None = Field(default=None, max_length=200)  # подстрока заголовка или описания, без регистра
+    min_score: int | None = None
+    since: UtcDatetime | None = None  # без зоны — UTC: timestamp элементов всегда с зоной
+    sources: list[SourceName] | None = None
+
+
+class MergeStep(BaseModel):
+    """Конкатенация входов в порядке inputs."""
+    id: StepId
+    op: Literal["merge"]
+    inputs: list[StepId] = Field(min_length=1, max_length=20)
+
+
+class DedupStep(BaseModel):
+    """Один документ — одна запись (по каноническому URL), остаётся первая."""
+    id: StepId
+    op: Literal["dedup"]
+    input: StepId
+
+
+class SortStep(BaseModel):
+    id: StepId
+    op: Literal["sort"]
+    input: StepId
+    by: Literal["rank", "score", "timestamp"] = "rank"  # rank — оценка как в /v1/search
+    order: Literal["desc", "asc"] = "desc"
+
+
+class TakeStep(BaseModel):
+    id: StepId
+    op: Literal["take"]
+    input: StepId
+    n: int = Field(ge=1, le=200)
+
+
+ComposeStep = Annotated[
+    Union[SearchStep, FilterStep, MergeStep, DedupStep, SortStep, TakeStep],
+    Field(discriminator="op"),
+]
+
+
+class ComposeRequest(BaseModel):
+    steps: list[ComposeStep] = Field(min_length=1, max_length=50)
+    # шаг, чей результат — итог рецепта; по умолчанию последний
+    output: StepId | None = None
+    budget_ms: int | None = Field(default=None, ge=50, le=30000)
+
+
+class StepError(BaseModel):
+    """Ошибка локального шага: источника у неё нет, есть шаг."""
+    step: str
+    message: str
+    type: str = "step_error"
+
+
+class ComposeStepFrame(BaseModel):
+    """Кадр NDJSON-стрима /v1/compose: шаг завершён (в порядке завершения)."""
+    type: Literal["step"] = "step"
+    id: str
+    op: str
+    status: Literal["ok", "error", "deadline_exceeded"]
+    # hit/stale/miss — кэш (search) или мемо шагов (остальные); shared — такой же шаг этого рецепта
+    memo: str
+    same_as: str | None = None
+    items_count: int
+    started_ms: int
+    finished_ms: int
+    took_ms: int
+    error: ErrorInfo | StepError | None = None
+
+
+class ComposeDoneFrame(BaseModel):
+    """Последний кадр: результат шага output."""
+    type: Literal["done"] = "done"
+    output: str
+    items: list[SearchItem]
+    errors: list[ErrorInfo | StepError] = []
+    took_ms: int
+    # сумма времени шагов — сколько стоила бы последовательная цепочка вызовов
+    steps_ms_total: int
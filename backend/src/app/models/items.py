@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Annotated, Any
+
+from pydantic import AfterValidator
+
+
+def is_http_url(url: str) -> bool:
+    # дешёвая замена HttpUrl (urlsplit заметно дороже): схема http(s) и непустой хост без пробелов
+    if url.startswith("https://"):
+        rest = url[8:]
+    elif url.startswith("http://"):
+        rest = url[7:]
+    else:
+        return False
+    host = rest.partition("/")[0].partition("?")[0].partition("#")[0].rpartition("@")[2]
+    return bool(host) and " " not in host
+
+
+def as_utc(value: datetime) -> datetime:
+    """Время без зоны считаем UTC, с зоной — переводим в UTC (как хранятся timestamp и ts логов)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# datetime из запроса: без зоны его нельзя сравнить с aware-временем, а SQLite сравнивает ts как текст
+UtcDatetime = Annotated[datetime, AfterValidator(as_utc)]
+
+
+@dataclass(slots=True)
+class Item:
+    """
+    Внутреннее представление результата от коннектора до ответа.
+
+    Проверяется один раз — в коннекторе (make_item), дальше считается доверенным:
+    без повторной Pydantic-валидации и без HttpUrl. Схема в API — SearchItem.
+    """
+
+    source: str
+    title: str
+    url: str
+    snippet: str | None = None
+    score: int | None = None
+    timestamp: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        # сразу JSON-совместимый dict: сериализатору не нужен второй default() на datetime
+        return {
+            "source": self.source,
+            "title": self.title,
+            "url": self.url,
+            "snippet": self.snippet,
+            "score": self.score,
+            "timestamp": self.timestamp.isoformat() if self.timestamp is not None else None,
+        }
+
+
+def make_item(
+    source: str,
+    title: Any,
+    url: Any,
+    snippet: Any = None,
+    score: int | None = None,
+    timestamp: datetime | None = None,
+) -> Item | None:
+    """Граница валидации: None, если запись непригодна (нет заголовка, кривой URL)."""
+    if not title or not isinstance(title, str) or not isinstance(url, str) or not is_http_url(url):
+        return None
+    return Item(
+        source=source,
+        title=title,
+        url=url,
+        snippet=snippet if isinstance(snippet, str) and snippet else None,
+        score=score,
+        timestamp=timestamp,
+    )
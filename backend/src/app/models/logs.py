@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
+Granularity = Literal["minute", "hour"]
 
 class LogRow(BaseModel):
     id: int
@@ -10,4 +13,31 @@ class LogRow(BaseModel):
     sources: list[str]
     took_ms: int
     items_count: int
-    errors_count: int
\ No newline at end of file
+    errors_count: int
+    cache: dict[str, str] | None = None
+    details: list[dict] | None = None  # только у батчей: по подзапросу
+
+
+class LogStatsSummary(BaseModel):
+    count: int
+    errors: int
+    error_rate: float
+    avg_items: float | None = None
+    avg_ms: float | None = None
+    max_ms: int | None = None
+    p50_ms: float | None = None
+    p95_ms: float | None = None
+    p99_ms: float | None = None
+
+
+class LogStatsBucket(LogStatsSummary):
+    ts: datetime
+
+
+class LogStatsResponse(BaseModel):
+    granularity: Granularity
+    since: datetime
+    source: str  # "*" — все запросы
+    totals: LogStatsSummary
+    by_source: dict[str, LogStatsSummary]
+    buckets: list[LogStatsBucket]
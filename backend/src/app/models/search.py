@@ -3,7 +3,7 @@ from typing import Literal
 
 from pydantic import BaseModel, HttpUrl, Field
 
-SourceName = Literal["github", "hackernews", "rss"]
+from app.connectors.registry import SourceName, connector_registry
 
 class ErrorInfo(BaseModel):
     source: SourceName
@@ -23,4 +23,47 @@ class SearchResponse(BaseModel):
     sources: list[SourceName]
     items: list[SearchItem]
     errors: list[ErrorInfo] = []
+    # статус кэша по источнику: hit / stale / miss
+    cache: dict[SourceName, str] = {}
     took_ms: int | None = None
+
+
+class SearchPageResponse(SearchResponse):
+    # непрозрачный курсор следующей страницы; None — выдача исчерпана
+    next_cursor: str | None = None
+
+
+class BatchQuery(BaseModel):
+    q: str = Field(min_length=1, max_length=200)
+    sources: list[SourceName] = Field(default=connector_registry.default_sources(), min_length=1)
+    limit: int = Field(default=20, ge=1, le=50)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[BatchQuery] = Field(min_length=1, max_length=100)
+    # бюджет на весь батч; по умолчанию — search_budget_ms
+    budget_ms: int | None = Field(default=None, ge=50, le=30000)
+
+
+class BatchSearchResult(SearchResponse):
+    # индекс такого же подзапроса выше по списку: выполнен один раз, результат общий
+    same_as: int | None = None
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[BatchSearchResult]
+    took_ms: int | None = None
+
+
+class SearchSourceFrame(BaseModel):
+    """Кадр NDJSON-стрима: результат одного источника, как только он готов."""
+    type: Literal["source"] = "source"
+    source: SourceName
+    items: list[SearchItem]
+    error: ErrorInfo | None = None
+    cache: str = "miss"
+
+
+class SearchDoneFrame(SearchResponse):
+    """Последний кадр стрима: объединённая и отсортированная выдача."""
+    type: Literal["done"] = "done"
@@ -3,13 +3,34 @@ from typing import Literal
 
 from pydantic import BaseModel
 
+from app.models.search import SourceName
 
-SourceName = Literal["github", "hackernews", "rss"]
+
+class CircuitStatus(BaseModel):
+    state: Literal["closed", "open", "half_open"]
+    consecutive_failures: int
+    retry_in_s: float | None = None
+    last_failure: str | None = None
+
+
+class QuotaStatus(BaseModel):
+    limit: int
+    remaining: int
+    reset_in_s: float | None = None
+    learned: bool = False  # лимит узнан из X-RateLimit-*, а не взят из настроек
+    queued: int = 0
 
 
 class SourceStatus(BaseModel):
     source: SourceName
-    ok: bool
-    last_checked_at: datetime
+    ok: bool | None = None  # None — ещё ни одной проверки
+    last_checked_at: datetime | None = None
     latency_ms: int | None = None
-    error: str | None = None
\ No newline at end of file
+    error: str | None = None
+    check: Literal["probe", "passive"] | None = None  # откуда последняя проверка
+    uptime: float | None = None  # доля успешных среди последних проверок
+    latency_p50_ms: int | None = None
+    latency_p95_ms: int | None = None
+    checks: int = 0
+    circuit: CircuitStatus | None = None
+    quota: QuotaStatus | None = None
@@ -1,47 +1,305 @@
 import asyncio
-from typing import Callable, Awaitable
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Awaitable
 
 import httpx
 
-from app.core.http import make_client
-from app.models.search import SearchItem, ErrorInfo, SourceName
-from app.connectors.github import search_github
-from app.connectors.hackernews import search_hn
-from app.connectors.rss import search_rss
-
-
-ConnectorFn = Callable[[httpx.AsyncClient, str, int], Awaitable[list[SearchItem]]]
-
-CONNECTORS: dict[SourceName, ConnectorFn] = {
-    "github": search_github,
-    "hackernews": search_hn,
-    "rss": search_rss,
-}
-
-
-async def aggregate_search(q: str, sources: list[SourceName], limit: int) -> tuple[list[SearchItem], list[ErrorInfo]]:
-    async with make_client() as client:
-        tasks = []
-        for s in sources:
-            fn = CONNECTORS.get(s)
-            if not fn:
-                continue
-            tasks.append((s, asyncio.create_task(fn(client, q, limit))))
-
-        items: list[SearchItem] = []
-        errors: list[ErrorInfo] = []
-
-        for source, task in tasks:
-            try:
-                res = await task
-                items.extend(res)
-            except httpx.TimeoutException:
-                errors.append(ErrorInfo(source=source, message="Timeout while calling source", type="timeout"))
-            except httpx.HTTPStatusError as e:
-                errors.append(ErrorInfo(source=source, message=f"Bad status from source: {e.response.status_code}", type="bad_status"))
-            except Exception as e:
-                errors.append(ErrorInfo(source=source, message=f"Unhandled error: {e}", type="unknown"))
-
-        # можно сделать сортировку “по score desc, потом по timestamp desc”
-        items.sort(key=lambda x: ((x.score or 0), (x.timestamp or 0)), reverse=True)
-        return items[:limit], errors
\ No newline at end of file
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.core.http import http_clients
+from app.core.metrics import metrics
+from app.core.timing import measure
+from app.core.tracing import tracer
+from app.models.items import Item
+from app.models.search import ErrorInfo, SourceName
+from app.connectors.registry import connector_registry
+from app.services.cache import CacheStatus, normalize_q, search_cache
+from app.services.circuit_breaker import CircuitOpenError, circuit_breakers
+from app.services.disk_cache import disk_cache
+from app.services.hedging import hedger
+from app.services.ranking import ranking
+from app.services.quota import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QuotaExceededError, quota_scheduler
+from app.services.singleflight import SingleFlight
+from app.services.sources_status import health_monitor
+
+log = logging.getLogger("api-fusion")
+
+@dataclass
+class AggregateResult:
+    items: list[Item]
+    errors: list[ErrorInfo]
+    cache: dict[str, CacheStatus] = field(default_factory=dict)
+
+
+@dataclass
+class SourceResult:
+    source: SourceName
+    items: list[Item]
+    error: ErrorInfo | None
+    cache: CacheStatus
+
+
+# одинаковые одновременные вызовы коннекторов склеиваются в один upstream-запрос
+connector_flight = SingleFlight()
+
+# фоновые обновления stale-записей: держим ссылки на задачи и не дублируем их
+_refresh_tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+
+def _ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+async def call_upstream(
+    source: SourceName,
+    fn: Callable[[httpx.AsyncClient], Awaitable[list[Item]]],
+    priority: int = PRIORITY_INTERACTIVE,
+) -> list[Item]:
+    """
+    Один защищённый вызов upstream'а: breaker, квота, hedging, таймаут источника,
+    учёт здоровья и латентности. Вызывать внутри single-flight — склеенные вызовы
+    не должны занимать пробные слоты half_open и токены квоты.
+    Локальный коннектор (индекс RSS) вызывается только с таймаутом.
+    """
+    timeout_s = settings.timeout_for(source)
+
+    async def attempt() -> list[Item]:
+        # таймаут на весь вызов коннектора, а не только на отдельный HTTP-запрос
+        with tracer.span("connector", source=source):
+            return await asyncio.wait_for(fn(http_clients.get(source)), timeout=timeout_s)
+
+    if connector_registry.local(source):
+        # поиск по локальному индексу сеть не трогает: breaker, квота и hedging защищают upstream,
+        # а мёртвый фид не должен прятать уже загруженные записи. Исходы — не сигнал здоровья:
+        # здоровье rss пишет ingester по настоящим загрузкам фидов
+        start = time.perf_counter()
+        items = await attempt()
+        metrics.source_latency.observe(time.perf_counter() - start, source)
+        return items
+
+    breaker = circuit_breakers.get(source)
+    breaker.check()
+    try:
+        # токен квоты upstream'а: ждём в очереди по приоритету или получаем отказ
+        await quota_scheduler.acquire(source, priority)
+    except BaseException:
+        breaker.on_release()
+        raise
+    start = time.perf_counter()
+    try:
+        # второй (хеджированный) запрос тратит квоту как обычный, но в очереди за токеном не стоит
+        items = await hedger.call(source, attempt, admit=lambda: quota_scheduler.try_acquire(source))
+    except asyncio.CancelledError:
+        # отменили по дедлайну запроса: если к этому моменту вызов уже «медленный» — это отказ
+        if (time.perf_counter() - start) * 1000 >= settings.breaker_slow_call_ms:
+            breaker.on_failure("slow call: cancelled by deadline")
+        else:
+            breaker.on_release()
+        raise
+    except httpx.HTTPStatusError as e:
+        # 4xx (кроме 429) — проблема запроса, а не здоровья источника
+        status = e.response.status_code
+        if status >= 500 or status == 429:
+            breaker.on_failure(f"bad_status: {status}")
+            health_monitor.record_passive(source, False, _ms(start), f"http_status:{status}")
+        else:
+            breaker.on_release()
+        raise
+    except Exception as e:
+        breaker.on_failure(type(e).__name__)
+        health_monitor.record_passive(source, False, _ms(start), repr(e))
+        raise
+    latency = time.perf_counter() - start
+    breaker.on_success(latency)
+    # реальный успешный вызов — повод не тратить на источник фоновую пробу
+    health_monitor.record_passive(source, True, int(latency * 1000))
+    metrics.source_latency.observe(latency, source)
+    return items
+
+
+async def _call_connector(
+    source: SourceName,
+    q: str,
+    limit: int,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> list[Item]:
+    fn = connector_registry.search_fn(source)
+
+    async def call() -> list[Item]:
+        items = await call_upstream(source, lambda client: fn(client, q, limit), priority)
+        search_cache.store(source, q, limit, items)
+        disk_cache.store(source, q, limit, items)
+        return items
+
+    return await connector_flight.do((source, normalize_q(q), limit), call)
+
+
+async def _refresh(source: SourceName, q: str, limit: int) -> None:
+    # фоновое обновление не ограничено дедлайном запроса, который его запустил
+    current_deadline.set(None)
+    try:
+        await _call_connector(source, q, limit, priority=PRIORITY_BACKGROUND)
+    except Exception as e:
+        # устаревшая запись остаётся в кэше до конца stale-окна
+        log.info(f"Background refresh failed for {source}: {e!r}")
+
+
+def _schedule_refresh(source: SourceName, q: str, limit: int) -> None:
+    key = (source, normalize_q(q))
+    if key in _refresh_tasks:
+        return
+    # обновляем с тем limit, с которым запись лежит в кэше, чтобы не сузить её
+    limit = max(limit, search_cache.for_source(source).entry_limit(q) or 0)
+    task = asyncio.create_task(_refresh(source, q, limit))
+    _refresh_tasks[key] = task
+    task.add_done_callback(lambda _: _refresh_tasks.pop(key, None))
+
+
+async def fetch_source(source: SourceName, q: str, limit: int) -> tuple[list[Item], CacheStatus]:
+    cached, status = search_cache.lookup(source, q, limit)
+    if cached is None:
+        # промах L1: результат мог получить другой воркер или процесс до рестарта
+        cached, status = await disk_cache.lookup(source, q, limit)
+    quota_low = quota_scheduler.low(source)
+    if cached is not None:
+        # при нехватке квоты фоновое обновление всё равно было бы отброшено
+        if status == "stale" and not quota_low:
+            _schedule_refresh(source, q, limit)
+        return cached, status
+
+    if quota_low:
+        # квоты нет: лучше просроченный ответ из кэша, чем очередь или отказ
+        expired = search_cache.peek(source, q, limit)
+        if expired is not None:
+            metrics.quota_events.inc(source, "cache_fallback")
+            return expired, "stale"
+
+    return await _call_connector(source, q, limit), "miss"
+
+
+def source_error(source: SourceName, e: Exception) -> ErrorInfo:
+    """Исключение вызова источника -> структурированная ошибка в ответе."""
+    if isinstance(e, CircuitOpenError):
+        return ErrorInfo(
+            source=source,
+            message=f"Source temporarily disabled after repeated failures, retry in {e.retry_in_s:.0f}s",
+            type="circuit_open",
+        )
+    if isinstance(e, QuotaExceededError):
+        return ErrorInfo(
+            source=source,
+            message=f"Upstream rate limit reached, retry in {e.retry_in_s:.0f}s",
+            type="rate_limited",
+        )
+    if isinstance(e, (httpx.TimeoutException, TimeoutError)):
+        return ErrorInfo(source=source, message="Timeout while calling source", type="timeout")
+    if isinstance(e, httpx.HTTPStatusError):
+        return ErrorInfo(source=source, message=f"Bad status from source: {e.response.status_code}", type="bad_status")
+    return ErrorInfo(source=source, message=f"Unhandled error: {e}", type="unknown")
+
+
+async def run_source(source: SourceName, q: str, limit: int) -> SourceResult:
+    # ошибки источника превращаются в ErrorInfo и не роняют остальные
+    try:
+        with measure(f"fetch-{source}") as span:
+            items, cache = await fetch_source(source, q, limit)
+            if span is not None:
+                span.set(cache=cache, items=len(items))
+        return SourceResult(source=source, items=items, error=None, cache=cache)
+    except Exception as e:
+        return SourceResult(source=source, items=[], error=source_error(source, e), cache="miss")
+
+
+def merge_results(results: list[SourceResult], limit: int) -> AggregateResult:
+    errors: list[ErrorInfo] = []
+    cache: dict[str, CacheStatus] = {}
+
+    for r in results:
+        cache[r.source] = r.cache
+        if r.error is not None:
+            errors.append(r.error)
+
+    # дедупликация по каноническому URL + top-k по нормированной оценке (services/ranking)
+    with measure("merge"):
+        items = ranking.rank((item for r in results for item in r.items), limit)
+    return AggregateResult(items=items, errors=errors, cache=cache)
+
+
+def _observe(r: SourceResult) -> None:
+    metrics.source_results.inc(r.source, r.cache, r.error.type if r.error is not None else "ok")
+    if r.error is None:
+        metrics.source_items.observe(len(r.items), r.source)
+
+
+def _deadline_exceeded(source: SourceName) -> SourceResult:
+    error = ErrorInfo(source=source, message="Request deadline exceeded", type="deadline_exceeded")
+    return SourceResult(source=source, items=[], error=error, cache="miss")
+
+
+async def _run_until_deadline(
+    q: str,
+    sources: list[SourceName],
+    limit: int,
+    budget_ms: int | None,
+) -> AsyncIterator[SourceResult]:
+    """
+    Запускает источники параллельно и отдаёт результаты в порядке готовности.
+    Когда бюджет запроса исчерпан, отстающие отменяются и отдаются как deadline_exceeded.
+    """
+    deadline = Deadline.after_ms(budget_ms or settings.search_budget_ms)
+    # у источника берём с запасом: часть кандидатов уйдёт на дубликаты и проиграет в ранжировании
+    fetch_limit = max(limit, settings.rank_candidates_per_source)
+    # задачи копируют контекст при создании, так что дедлайн виден коннекторам
+    token = current_deadline.set(deadline)
+    try:
+        pending = {asyncio.create_task(run_source(s, q, fetch_limit)): s for s in sources if s in connector_registry}
+    finally:
+        current_deadline.reset(token)
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for t in done:
+                pending.pop(t)
+                result = t.result()
+                _observe(result)
+                yield result
+
+        for t, source in pending.items():
+            t.cancel()
+            result = _deadline_exceeded(source)
+            _observe(result)
+            yield result
+        pending = {}
+    finally:
+        # клиент отключился посреди стрима — не держим висящие запросы
+        for t in pending:
+            t.cancel()
+
+
+async def aggregate_search(
+    q: str,
+    sources: list[SourceName],
+    limit: int,
+    budget_ms: int | None = None,
+) -> AggregateResult:
+    with tracer.span("aggregate", sources=",".join(sources), limit=limit):
+        results = [r async for r in _run_until_deadline(q, sources, limit, budget_ms)]
+        # порядок ошибок/кэша — как в запросе, а не как завершились источники
+        results.sort(key=lambda r: sources.index(r.source))
+        return merge_results(results, limit)
+
+
+async def stream_search(
+    q: str,
+    sources: list[SourceName],
+    limit: int,
+    budget_ms: int | None = None,
+) -> AsyncIterator[SourceResult]:
+    """Отдаёт результаты источников в порядке готовности, а не в порядке списка."""
+    async for r in _run_until_deadline(q, sources, limit, budget_ms):
+        yield r
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.models.search import ErrorInfo, SourceName
+from app.services.aggregator import AggregateResult, aggregate_search
+from app.services.cache import normalize_q
+
+
+@dataclass
+class BatchEntry:
+    q: str
+    sources: list[SourceName]
+    limit: int
+    result: AggregateResult
+    took_ms: int
+    same_as: int | None = None  # индекс подзапроса, чей результат переиспользован
+
+
+@dataclass
+class BatchCounters:
+    batches: int = 0
+    queries: int = 0
+    deduplicated: int = 0  # подзапросов, совпавших с уже выполняемым в том же батче
+    deadline_exceeded: int = 0  # подзапросов, не успевших начаться до конца бюджета батча
+
+
+class BatchRunner:
+    """
+    Выполняет батч подзапросов поиска в одном HTTP-запросе. Одинаковые подзапросы
+    (q без учёта регистра и пробелов, набор источников, limit) выполняются один раз.
+    Число одновременно выполняемых подзапросов ограничено на весь процесс —
+    несколько больших батчей не съедят пулы соединений источников.
+    """
+
+    def __init__(self) -> None:
+        self.counters = BatchCounters()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+        return self._semaphore
+
+    async def _run_one(self, q: str, sources: list[SourceName], limit: int, deadline: Deadline) -> tuple[AggregateResult, int]:
+        self._waiting += 1
+        try:
+            await self._slots().acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            remaining_ms = int(deadline.remaining() * 1000)
+            if remaining_ms <= 0:
+                self.counters.deadline_exceeded += 1
+                errors = [
+                    ErrorInfo(source=s, message="Batch deadline exceeded before the query started", type="deadline_exceeded")
+                    for s in sources
+                ]
+                return AggregateResult(items=[], errors=errors), 0
+
+            start = time.perf_counter()
+            result = await aggregate_search(q=q, sources=sources, limit=limit, budget_ms=remaining_ms)
+            return result, int((time.perf_counter() - start) * 1000)
+        finally:
+            self._slots().release()
+
+    async def run(
+        self,
+        queries: list[tuple[str, list[SourceName], int]],
+        budget_ms: int | None = None,
+    ) -> list[BatchEntry]:
+        self.counters.batches += 1
+        self.counters.queries += len(queries)
+        deadline = Deadline.after_ms(budget_ms or settings.search_budget_ms)
+
+        first_index: dict[tuple, int] = {}
+        tasks: dict[int, asyncio.Task] = {}
+        same_as: list[int | None] = []
+        for i, (q, sources, limit) in enumerate(queries):
+            key = (normalize_q(q), frozenset(sources), limit)
+            first = first_index.get(key)
+            if first is None:
+                first_index[key] = i
+                tasks[i] = asyncio.create_task(self._run_one(q, sources, limit, deadline))
+            else:
+                self.counters.deduplicated += 1
+            same_as.append(first)
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            # клиент отключился — не оставляем подзапросы висеть
+            for t in tasks.values():
+                t.cancel()
+
+        entries: list[BatchEntry] = []
+        for i, (q, sources, limit) in enumerate(queries):
+            result, took_ms = tasks[same_as[i] if same_as[i] is not None else i].result()
+            entries.append(BatchEntry(q, sources, limit, result, took_ms, same_as[i]))
+        return entries
+
+    def stats(self) -> dict[str, Any]:
+        return {**asdict(self.counters), "waiting": self._waiting, "limit": settings.batch_max_concurrency}
+
+
+batch_runner = BatchRunner()
+
+
+def batch_log_fields(entries: list[BatchEntry]) -> dict[str, Any]:
+    """Весь батч — одна строка RequestLog; подробности по подзапросам — в details."""
+    sources = list(dict.fromkeys(s for e in entries for s in e.sources))
+    errors = [
+        {**err.model_dump(), "query": i}
+        for i, e in enumerate(entries)
+        if e.same_as is None
+        for err in e.result.errors
+    ]
+    return {
+        "q": (f"batch[{len(entries)}]: " + " | ".join(dict.fromkeys(e.q for e in entries)))[:300],
+        "sources": sources,
+        "limit": sum(e.limit for e in entries),
+        "items_count": sum(len(e.result.items) for e in entries),
+        "errors": errors,
+        "cache": None,
+        "details": [
+            {
+                "q": e.q,
+                "sources": list(e.sources),
+                "limit": e.limit,
+                "took_ms": e.took_ms,
+                "items_count": len(e.result.items),
+                "errors_count": len(e.result.errors),
+                "cache": e.result.cache,
+                "same_as": e.same_as,
+            }
+            for e in entries
+        ],
+    }
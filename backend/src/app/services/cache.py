@@ -0,0 +1,139 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
+
+from app.core.config import settings
+from app.models.items import Item
+
+CacheStatus = Literal["hit", "stale", "miss"]
+
+
+def normalize_q(q: str) -> str:
+    # "Rust  Async" и "rust async" — один и тот же запрос
+    return " ".join(q.lower().split())
+
+
+@dataclass
+class CacheEntry:
+    items: list[Item]
+    limit: int
+    fresh_until: float
+    stale_until: float
+
+    def covers(self, limit: int) -> bool:
+        # результат с большим limit подходит и для меньшего;
+        # если источник вернул меньше, чем просили, — он исчерпан и подходит для любого limit
+        return limit <= self.limit or len(self.items) < self.limit
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    stale: int = 0
+    misses: int = 0
+
+
+class ResultCache:
+    """
+    LRU-кэш результатов одного источника с TTL и окном stale-while-revalidate.
+    Ключ — нормализованный q; limit хранится в записи.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.counters = CacheCounters()
+        self._data: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def lookup(self, q: str, limit: int) -> tuple[list[Item] | None, CacheStatus]:
+        key = normalize_q(q)
+        entry = self._data.get(key)
+        now = time.monotonic()
+
+        if entry is None or not entry.covers(limit) or now >= entry.stale_until:
+            self.counters.misses += 1
+            return None, "miss"
+
+        self._data.move_to_end(key)
+        if now < entry.fresh_until:
+            self.counters.hits += 1
+            return entry.items[:limit], "hit"
+
+        self.counters.stale += 1
+        return entry.items[:limit], "stale"
+
+    def peek(self, q: str, limit: int) -> list[Item] | None:
+        """Запись без учёта TTL и stale-окна — последний шанс, когда звать upstream нельзя."""
+        entry = self._data.get(normalize_q(q))
+        if entry is None or not entry.covers(limit):
+            return None
+        return entry.items[:limit]
+
+    def entry_limit(self, q: str) -> int | None:
+        entry = self._data.get(normalize_q(q))
+        return entry.limit if entry else None
+
+    def store(self, q: str, limit: int, items: list[Item], ttl_s: float, stale_s: float) -> None:
+        key = normalize_q(q)
+        now = time.monotonic()
+        self._data[key] = CacheEntry(
+            items=list(items),
+            limit=limit,
+            fresh_until=now + ttl_s,
+            stale_until=now + ttl_s + stale_s,
+        )
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "hits": self.counters.hits,
+            "stale": self.counters.stale,
+            "misses": self.counters.misses,
+        }
+
+
+class SearchCache:
+    """Набор кэшей по источникам (у каждого свой TTL и свой LRU)."""
+
+    def __init__(self) -> None:
+        self._caches: dict[str, ResultCache] = {}
+
+    def for_source(self, source: str) -> ResultCache:
+        cache = self._caches.get(source)
+        if cache is None:
+            cache = ResultCache(max_entries=settings.cache_max_entries)
+            self._caches[source] = cache
+        return cache
+
+    def lookup(self, source: str, q: str, limit: int) -> tuple[list[Item] | None, CacheStatus]:
+        if not settings.cache_enabled:
+            return None, "miss"
+        return self.for_source(source).lookup(q, limit)
+
+    def peek(self, source: str, q: str, limit: int) -> list[Item] | None:
+        if not settings.cache_enabled:
+            return None
+        return self.for_source(source).peek(q, limit)
+
+    def store(self, source: str, q: str, limit: int, items: list[Item]) -> None:
+        if not settings.cache_enabled:
+            return
+        self.for_source(source).store(
+            q,
+            limit,
+            items,
+            ttl_s=settings.cache_ttl_for(source),
+            stale_s=settings.cache_stale_seconds,
+        )
+
+    def stats(self) -> dict[str, dict]:
+        return {source: c.stats() for source, c in self._caches.items()}
+
+
+search_cache = SearchCache()
@@ -0,0 +1,181 @@
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Literal
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+log = logging.getLogger("api-fusion")
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(Exception):
+    """Источник отключён breaker'ом: вызов не делаем, сразу отдаём ErrorInfo(type="circuit_open")."""
+
+    def __init__(self, source: str, retry_in_s: float) -> None:
+        super().__init__(f"Circuit open for {source}")
+        self.source = source
+        self.retry_in_s = retry_in_s
+
+
+@dataclass
+class BreakerCounters:
+    successes: int = 0
+    failures: int = 0
+    slow_calls: int = 0  # успешные, но дольше breaker_slow_call_ms — считаются отказом
+    short_circuited: int = 0  # вызовов, отбитых без похода в upstream
+    opened: int = 0
+    trial_calls: int = 0
+
+
+class CircuitBreaker:
+    """
+    Breaker одного источника: closed -> open после N отказов подряд (ошибки,
+    таймауты, слишком медленные ответы), open -> half_open по таймеру или по
+    успешной пробе, half_open пропускает ограниченное число пробных вызовов
+    и закрывается после нескольких успехов подряд. Каждое повторное открытие
+    удваивает время в open (до breaker_max_open_seconds).
+
+    Без блокировок: всё вызывается из event loop.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.state: BreakerState = "closed"
+        self.counters = BreakerCounters()
+        self.consecutive_failures = 0
+        self._open_until = 0.0
+        self._open_s = settings.breaker_open_seconds
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self.last_failure: str | None = None
+
+    def _transition(self, state: BreakerState) -> None:
+        if state == self.state:
+            return
+        log.info(f"Circuit {self.source}: {self.state} -> {state}")
+        self.state = state
+        metrics.circuit_transitions.inc(self.source, state)
+
+    def retry_in(self) -> float:
+        return max(self._open_until - time.monotonic(), 0.0) if self.state == "open" else 0.0
+
+    def before_call(self) -> bool:
+        """
+        Можно ли звать upstream. True в half_open занимает слот пробного вызова —
+        его освобождает on_success/on_failure/on_release.
+        """
+        if not settings.breaker_enabled:
+            return True
+
+        if self.state == "open":
+            if time.monotonic() < self._open_until:
+                self.counters.short_circuited += 1
+                return False
+            self._half_open()
+
+        if self.state == "half_open":
+            if self._trials_in_flight >= settings.breaker_half_open_max_calls:
+                self.counters.short_circuited += 1
+                return False
+            self._trials_in_flight += 1
+            self.counters.trial_calls += 1
+        return True
+
+    def check(self) -> None:
+        if not self.before_call():
+            raise CircuitOpenError(self.source, self.retry_in())
+
+    def on_success(self, latency_s: float, trial: bool = True) -> None:
+        if latency_s * 1000 >= settings.breaker_slow_call_ms:
+            # ответ пришёл, но так медленно, что для пользователя это почти таймаут
+            self.counters.slow_calls += 1
+            self.on_failure(f"slow call: {int(latency_s * 1000)}ms", trial=trial)
+            return
+
+        self.counters.successes += 1
+        self.consecutive_failures = 0
+        if self.state == "half_open" and trial:
+            self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+            self._trial_successes += 1
+            if self._trial_successes >= settings.breaker_half_open_successes:
+                self._close()
+
+    def on_failure(self, reason: str, trial: bool = True) -> None:
+        self.counters.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = reason
+
+        if self.state == "half_open":
+            if trial:
+                self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+            # пробный вызов не прошёл — назад в open, на вдвое больший срок
+            self._open(self._open_s * 2)
+        elif self.state == "closed" and self.consecutive_failures >= settings.breaker_failure_threshold:
+            self._open(settings.breaker_open_seconds)
+
+    def on_release(self) -> None:
+        # вызов отменён (ушли все ожидающие) — результата нет, просто отдаём слот
+        if self.state == "half_open":
+            self._trials_in_flight = max(self._trials_in_flight - 1, 0)
+
+    def on_probe(self, ok: bool, latency_s: float, error: str | None = None) -> None:
+        """Результат фоновой пробы: отказы копятся как обычные, успех в open ускоряет half_open."""
+        if not settings.breaker_enabled:
+            return
+        if not ok:
+            if self.state != "open":
+                self.on_failure(f"probe: {error}", trial=False)
+            return
+        if self.state == "open":
+            self._half_open()
+        elif self.state == "closed":
+            self.on_success(latency_s, trial=False)
+
+    def _open(self, duration_s: float) -> None:
+        self._open_s = min(duration_s, settings.breaker_max_open_seconds)
+        self._open_until = time.monotonic() + self._open_s
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self.counters.opened += 1
+        self._transition("open")
+
+    def _half_open(self) -> None:
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self._transition("half_open")
+
+    def _close(self) -> None:
+        self.consecutive_failures = 0
+        self._open_s = settings.breaker_open_seconds
+        self._transition("closed")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_s": round(self.retry_in(), 1) if self.state == "open" else None,
+            "last_failure": self.last_failure,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.snapshot(), **asdict(self.counters)}
+
+
+class CircuitBreakers:
+    def __init__(self) -> None:
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, source: str) -> CircuitBreaker:
+        b = self._breakers.get(source)
+        if b is None:
+            b = self._breakers[source] = CircuitBreaker(source)
+        return b
+
+    def stats(self) -> dict[str, dict]:
+        return {source: b.stats() for source, b in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakers()
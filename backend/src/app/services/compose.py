@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator
+
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.models.compose import ComposeRequest, ComposeStep, FilterStep, SortStep, StepError
+from app.models.items import Item
+from app.models.search import ErrorInfo
+from app.services.aggregator import run_source
+from app.services.cache import normalize_q
+from app.services.ranking import Ranker, canonical_url
+
+log = logging.getLogger("api-fusion")
+
+
+class RecipeError(ValueError):
+    """Рецепт не является корректным DAG: повтор id, ссылка на несуществующий шаг, цикл."""
+
+
+@dataclass
+class StepRun:
+    id: str
+    op: str
+    status: str
+    memo: str
+    items: list[Item]
+    started_ms: int
+    finished_ms: int
+    error: ErrorInfo | StepError | None = None
+    same_as: str | None = None
+    # результат не зависит от ошибок/таймаутов ниже по графу — его можно мемоизировать
+    clean: bool = True
+
+    def frame(self) -> dict[str, Any]:
+        return {
+            "type": "step",
+            "id": self.id,
+            "op": self.op,
+            "status": self.status,
+            "memo": self.memo,
+            "same_as": self.same_as,
+            "items_count": len(self.items),
+            "started_ms": self.started_ms,
+            "finished_ms": self.finished_ms,
+            "took_ms": self.finished_ms - self.started_ms,
+            "error": self.error,
+        }
+
+
+def step_inputs(step: ComposeStep) -> list[str]:
+    if step.op == "search":
+        return []
+    if step.op == "merge":
+        return list(step.inputs)
+    return [step.input]
+
+
+def plan(recipe: ComposeRequest) -> tuple[list[ComposeStep], dict[str, str]]:
+    """
+    Проверка DAG и топологический порядок (Kahn). Заодно — сигнатура каждого шага:
+    хэш операции, параметров и сигнатур входов. Одинаковые сигнатуры — один и тот же
+    результат, независимо от id шагов и рецепта.
+    """
+    by_id: dict[str, ComposeStep] = {}
+    for step in recipe.steps:
+        if step.id in by_id:
+            raise RecipeError(f"Duplicate step id: {step.id}")
+        by_id[step.id] = step
+    if recipe.output is not None and recipe.output not in by_id:
+        raise RecipeError(f"Unknown output step: {recipe.output}")
+
+    pending = {step.id: 0 for step in recipe.steps}
+    dependents: dict[str, list[str]] = {step.id: [] for step in recipe.steps}
+    for step in recipe.steps:
+        for ref in step_inputs(step):
+            if ref not in by_id:
+                raise RecipeError(f"Step {step.id} refers to unknown step: {ref}")
+            pending[step.id] += 1
+            dependents[ref].append(step.id)
+
+    # очередь, а не стек: при прочих равных — порядок шагов в рецепте
+    ready = deque(sid for sid, n in pending.items() if n == 0)
+    order: list[ComposeStep] = []
+    while ready:
+        sid = ready.popleft()
+        order.append(by_id[sid])
+        for dep in dependents[sid]:
+            pending[dep] -= 1
+            if pending[dep] == 0:
+                ready.append(dep)
+    if len(order) != len(by_id):
+        raise RecipeError("Recipe has a cycle")
+
+    signatures: dict[str, str] = {}
+    for step in order:
+        params = step.model_dump(mode="json", exclude={"id", "input", "inputs"})
+        if step.op == "search":
+            params["q"] = normalize_q(step.q)
+        params["in"] = [signatures[ref] for ref in step_inputs(step)]
+        raw = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        signatures[step.id] = hashlib.sha1(raw.encode()).hexdigest()
+    return order, signatures
+
+
+def _filter(step: FilterStep, items: list[Item]) -> list[Item]:
+    needle = step.contains.lower() if step.contains else None
+    sources = set(step.sources) if step.sources else None
+    out: list[Item] = []
+    for item in items:
+        if sources is not None and item.source not in sources:
+            continue
+        if step.min_score is not None and (item.score is None or item.score < step.min_score):
+            continue
+        if step.since is not None and (item.timestamp is None or item.timestamp < step.since):
+            continue
+        if needle is not None and needle not in item.title.lower() and needle not in (item.snippet or "").lower():
+            continue
+        out.append(item)
+    return out
+
+
+def _sort(step: SortStep, items: list[Item]) -> list[Item]:
+    if step.by == "rank":
+        key = Ranker().score
+    elif step.by == "score":
+        key = lambda item: item.score if item.score is not None else float("-inf")  # noqa: E731
+    else:
+        key = lambda item: item.timestamp.timestamp() if item.timestamp is not None else float("-inf")  # noqa: E731
+    return sorted(items, key=key, reverse=step.order == "desc")
+
+
+def _dedup(items: list[Item]) -> list[Item]:
+    seen: set[str] = set()
+    out: list[Item] = []
+    for item in items:
+        key = canonical_url(item.url)
+        if key not in seen:
+            seen.add(key)
+            out.append(item)
+    return out
+
+
+def apply_step(step: ComposeStep, inputs: list[list[Item]]) -> list[Item]:
+    """Локальные (без сети) шаги рецепта."""
+    if step.op == "merge":
+        return [item for items in inputs for item in items]
+    if step.op == "filter":
+        return _filter(step, inputs[0])
+    if step.op == "dedup":
+        return _dedup(inputs[0])
+    if step.op == "sort":
+        return _sort(step, inputs[0])
+    if step.op == "take":
+        return inputs[0][: step.n]
+    raise RecipeError(f"Unsupported step op: {step.op}")
+
+
+@dataclass
+class ComposeCounters:
+    recipes: int = 0
+    steps: int = 0
+    memo_hits: int = 0  # локальные шаги, взятые из мемо (в т.ч. от других рецептов)
+    shared: int = 0  # шаги, совпавшие с другим шагом того же рецепта
+    deadline_exceeded: int = 0
+
+
+class ComposeEngine:
+    """
+    Исполнитель рецептов: шаги — вершины DAG, каждый запускается как только готовы
+    его входы, так что рецепт стоит примерно как его критический путь.
+
+    Мемоизация по сигнатуре шага: одинаковые шаги одного рецепта выполняются один раз;
+    search-шаги разных рецептов склеиваются кэшем и single-flight коннекторов,
+    локальные шаги — короткоживущим мемо (compose_memo_ttl_seconds).
+    """
+
+    def __init__(self) -> None:
+        self.counters = ComposeCounters()
+        self._memo: OrderedDict[str, tuple[float, list[Item]]] = OrderedDict()
+
+    def _memo_get(self, signature: str) -> list[Item] | None:
+        entry = self._memo.get(signature)
+        if entry is None:
+            return None
+        expires_at, items = entry
+        if time.monotonic() >= expires_at:
+            del self._memo[signature]
+            return None
+        self._memo.move_to_end(signature)
+        return items
+
+    def _memo_put(self, signature: str, items: list[Item]) -> None:
+        self._memo[signature] = (time.monotonic() + settings.compose_memo_ttl_seconds, items)
+        self._memo.move_to_end(signature)
+        while len(self._memo) > settings.compose_memo_max_entries:
+            self._memo.popitem(last=False)
+
+    async def _exec(
+        self,
+        step: ComposeStep,
+        signature: str,
+        inputs: list[asyncio.Task],
+        t0: float,
+    ) -> StepRun:
+        def now_ms() -> int:
+            return int((time.perf_counter() - t0) * 1000)
+
+        if step.op == "search":
+            started = now_ms()
+            r = await run_source(step.source, step.q, step.limit)
+            status = "ok" if r.error is None else "error"
+            return StepRun(step.id, step.op, status, r.cache, r.items, started, now_ms(), r.error, clean=r.error is None)
+
+        # из мемо — не дожидаясь входов
+        cached = self._memo_get(signature)
+        if cached is not None:
+            self.counters.memo_hits += 1
+            started = now_ms()
+            return StepRun(step.id, step.op, "ok", "hit", cached, started, started)
+
+        upstream: list[StepRun] = [await t for t in inputs]
+        started = now_ms()
+        try:
+            items = apply_step(step, [u.items for u in upstream])
+        except Exception as e:
+            # упавший шаг — кадр с ошибкой, а не оборванный стрим; зависимые шаги получат пустой вход
+            log.warning(f"Compose step {step.id} ({step.op}) failed: {e!r}")
+            error = StepError(step=step.id, message=f"Step failed: {e}")
+            return StepRun(step.id, step.op, "error", "miss", [], started, now_ms(), error, clean=False)
+        clean = all(u.clean for u in upstream)
+        if clean:
+            self._memo_put(signature, items)
+        return StepRun(step.id, step.op, "ok", "miss", items, started, now_ms(), clean=clean)
+
+    @staticmethod
+    async def _alias(step: ComposeStep, original: asyncio.Task, t0: float) -> StepRun:
+        run: StepRun = await original
+        finished = int((time.perf_counter() - t0) * 1000)
+        return StepRun(
+            step.id, step.op, run.status, "shared", run.items, finished, finished, run.error, run.id, run.clean
+        )
+
+    async def run(self, recipe: ComposeRequest, order: list[ComposeStep], signatures: dict[str, str]) -> AsyncIterator[StepRun]:
+        """Отдаёт шаги в порядке завершения; не успевшие к дедлайну — как deadline_exceeded."""
+        self.counters.recipes += 1
+        self.counters.steps += len(order)
+        t0 = time.perf_counter()
+        deadline = Deadline.after_ms(recipe.budget_ms or settings.search_budget_ms)
+
+        tasks: dict[str, asyncio.Task] = {}
+        first_by_signature: dict[str, str] = {}
+        # задачи копируют контекст при создании — дедлайн виден коннекторам
+        token = current_deadline.set(deadline)
+        try:
+            for step in order:
+                signature = signatures[step.id]
+                first = first_by_signature.get(signature)
+                if first is None:
+                    first_by_signature[signature] = step.id
+                    inputs = [tasks[ref] for ref in step_inputs(step)]
+                    tasks[step.id] = asyncio.create_task(self._exec(step, signature, inputs, t0))
+                else:
+                    self.counters.shared += 1
+                    tasks[step.id] = asyncio.create_task(self._alias(step, tasks[first], t0))
+        finally:
+            current_deadline.reset(token)
+
+        pending = {t: sid for sid, t in tasks.items()}
+        position = {step.id: i for i, step in enumerate(order)}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for t in sorted(done, key=lambda t: position[pending[t]]):
+                    pending.pop(t)
+                    yield t.result()
+
+            finished = int((time.perf_counter() - t0) * 1000)
+            by_id = {step.id: step for step in order}
+            for t, sid in pending.items():
+                t.cancel()
+                self.counters.deadline_exceeded += 1
+                step = by_id[sid]
+                error = None
+                if step.op == "search":
+                    error = ErrorInfo(source=step.source, message="Request deadline exceeded", type="deadline_exceeded")
+                yield StepRun(sid, step.op, "deadline_exceeded", "miss", [], finished, finished, error, clean=False)
+            pending = {}
+        finally:
+            for t in pending:
+                t.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {**asdict(self.counters), "memo_entries": len(self._memo)}
+
+
+compose_engine = ComposeEngine()
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.timing import measure
+from app.connectors.registry import connector_registry
+from app.models.items import Item
+from app.services.cache import CacheStatus, normalize_q, search_cache
+
+log = logging.getLogger("api-fusion")
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    source TEXT NOT NULL,
+    q TEXT NOT NULL,
+    lim INTEGER NOT NULL,
+    fresh_until REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (source, q)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+"""
+
+# accessed_at (для LRU-вытеснения) обновляем не чаще: чтение не должно каждый раз писать в файл
+_TOUCH_INTERVAL_S = 60.0
+# при превышении лимита освобождаем с запасом, чтобы не чистить на каждой записи
+_EVICT_TO = 0.9
+
+
+def encode_items(items: list[Item]) -> bytes:
+    # источник — часть ключа; у элемента остаётся кортеж полей без имён
+    rows = [
+        [i.title, i.url, i.snippet, i.score, i.timestamp.timestamp() if i.timestamp is not None else None]
+        for i in items
+    ]
+    return zlib.compress(json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode(), 1)
+
+
+def decode_items(source: str, payload: bytes) -> list[Item]:
+    # записи уже прошли make_item при первом получении — повторно не проверяем
+    return [
+        Item(source, title, url, snippet, score, datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None)
+        for title, url, snippet, score, ts in json.loads(zlib.decompress(payload))
+    ]
+
+
+@dataclass
+class DiskCacheCounters:
+    hits: int = 0
+    stale: int = 0
+    misses: int = 0
+    writes: int = 0
+    warmed: int = 0  # записей, поднятых в память при старте
+    evicted: int = 0
+    errors: int = 0  # ошибки чтения/записи (busy, диск): запрос идёт дальше как при промахе
+
+
+class DiskCache:
+    """
+    L2-кэш результатов по источникам под in-memory кэшем: SQLite в режиме WAL,
+    один файл на хост — общий для всех воркеров uvicorn и переживающий рестарт.
+
+    Запись — сжатый JSON выдачи источника с абсолютными (wall clock) сроками
+    свежести и stale-окна; промах L1 сначала смотрит сюда и поднимает найденное в L1.
+    sqlite3 блокирующий: вся работа с файлом — в одном выделенном потоке,
+    запись не ждёт ни один запрос. Вытеснение — по TTL и по размеру файла (LRU по accessed_at).
+    """
+
+    def __init__(self) -> None:
+        self.counters = DiskCacheCounters()
+        self._pool: ThreadPoolExecutor | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._writes: set[asyncio.Future] = set()
+        self._last_maintenance = 0.0
+        self._entries = 0
+        self._bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._pool is not None
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def start(self) -> None:
+        if self._pool is not None or not settings.cache_enabled or not settings.cache_l2_path:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2")
+        try:
+            await self._run(self._open)
+            await self.warm()
+        except Exception as e:
+            # как и с БД логов: без L2 сервис работает, просто чаще ходит наружу
+            log.warning(f"L2 cache disabled: {e!r}")
+            await self.stop()
+
+    async def stop(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        if self._writes:
+            await asyncio.wait(self._writes, timeout=settings.log_shutdown_timeout_seconds)
+        await asyncio.get_running_loop().run_in_executor(pool, self._close)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _open(self) -> None:
+        conn = sqlite3.connect(
+            settings.cache_l2_path,
+            timeout=settings.cache_l2_busy_timeout_ms / 1000,
+            isolation_level=None,  # autocommit: каждая запись — своя короткая транзакция
+            check_same_thread=False,
+        )
+        # auto_vacuum действует, только если задан до создания таблиц
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # в WAL NORMAL не делает fsync на каждый commit; потеря хвоста кэша при сбое питания не страшна
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._maintain(time.time())
+
+    def _close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def _get(self, source: str, key: str, now: float) -> tuple[int, float, float, list[Item]] | None:
+        row = self._conn.execute(
+            "SELECT lim, fresh_until, stale_until, accessed_at, payload FROM results WHERE source = ? AND q = ?",
+            (source, key),
+        ).fetchone()
+        if row is None or row[2] <= now:
+            return None
+        lim, fresh_until, stale_until, accessed_at, payload = row
+        if now - accessed_at > _TOUCH_INTERVAL_S:
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE source = ? AND q = ?", (now, source, key))
+        return lim, fresh_until, stale_until, decode_items(source, payload)
+
+    def _put(self, source: str, key: str, limit: int, items: list[Item], ttl_s: float, stale_s: float) -> None:
+        payload = encode_items(items)
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (source, q, lim, fresh_until, stale_until, accessed_at, size, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (source, key, limit, now + ttl_s, now + ttl_s + stale_s, now, len(payload) + len(key), payload),
+        )
+        if time.monotonic() - self._last_maintenance >= settings.cache_l2_maintenance_interval_seconds:
+            self._maintain(now)
+
+    def _maintain(self, now: float) -> None:
+        """Удаление истёкших записей и LRU-вытеснение до лимита размера; файл ужимается incremental_vacuum."""
+        self._last_maintenance = time.monotonic()
+        evicted = self._conn.execute("DELETE FROM results WHERE stale_until <= ?", (now,)).rowcount
+
+        entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        max_bytes = int(settings.cache_l2_max_mb * 1024 * 1024)
+        if total > max_bytes:
+            to_free = total - int(max_bytes * _EVICT_TO)
+            victims: list[tuple[str, str]] = []
+            for source, key, size in self._conn.execute("SELECT source, q, size FROM results ORDER BY accessed_at"):
+                victims.append((source, key))
+                to_free -= size
+                total -= size
+                if to_free <= 0:
+                    break
+            self._conn.executemany("DELETE FROM results WHERE source = ? AND q = ?", victims)
+            evicted += len(victims)
+            entries -= len(victims)
+
+        if evicted:
+            self._conn.execute("PRAGMA incremental_vacuum")
+        self.counters.evicted += evicted
+        self._entries, self._bytes = entries, total
+
+    def _recent(self, n: int, now: float) -> list[tuple[str, str, int, float, float, list[Item]]]:
+        rows = self._conn.execute(
+            "SELECT source, q, lim, fresh_until, stale_until, payload FROM results "
+            "WHERE stale_until > ? ORDER BY accessed_at DESC LIMIT ?",
+            (now, n),
+        ).fetchall()
+        return [(s, q, lim, fresh, stale, decode_items(s, payload)) for s, q, lim, fresh, stale, payload in rows]
+
+    @staticmethod
+    def _restore(source: str, key: str, limit: int, items: list[Item], fresh_until: float, stale_until: float) -> None:
+        # сроки в L2 — wall clock, в L1 — monotonic: переносим оставшееся время
+        now = time.time()
+        search_cache.for_source(source).store(
+            key, limit, items, ttl_s=fresh_until - now, stale_s=stale_until - fresh_until
+        )
+
+    async def warm(self) -> int:
+        """Поднимает в L1 самые востребованные живые записи: первые запросы после рестарта — без диска и upstream."""
+        if self._pool is None or settings.cache_l2_warm_entries <= 0:
+            return 0
+        rows = await self._run(self._recent, settings.cache_l2_warm_entries, time.time())
+        warmed = 0
+        # от старых к свежим: самые свежие окажутся в конце LRU
+        for source, key, limit, fresh_until, stale_until, items in reversed(rows):
+            if source in connector_registry:
+                self._restore(source, key, limit, items, fresh_until, stale_until)
+                warmed += 1
+        self.counters.warmed += warmed
+        return warmed
+
+    async def lookup(self, source: str, q: str, limit: int) -> tuple[list[Item] | None, CacheStatus]:
+        """Как ResultCache.lookup, но для промаха L1; найденное поднимается в L1."""
+        if self._pool is None:
+            return None, "miss"
+        key = normalize_q(q)
+        try:
+            with measure("cache-l2"):
+                entry = await self._run(self._get, source, key, time.time())
+        except Exception as e:
+            self.counters.errors += 1
+            log.info(f"L2 cache read failed: {e!r}")
+            return None, "miss"
+
+        # результат с большим limit подходит и для меньшего; исчерпанный источник — для любого
+        if entry is None or not (limit <= entry[0] or len(entry[3]) < entry[0]):
+            self.counters.misses += 1
+            return None, "miss"
+
+        entry_limit, fresh_until, stale_until, items = entry
+        self._restore(source, key, entry_limit, items, fresh_until, stale_until)
+        if time.time() < fresh_until:
+            self.counters.hits += 1
+            return items[:limit], "hit"
+        self.counters.stale += 1
+        return items[:limit], "stale"
+
+    def store(self, source: str, q: str, limit: int, items: list[Item]) -> None:
+        """Запись в фоне: вызывающий не ждёт диск."""
+        if self._pool is None:
+            return
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool,
+            self._put,
+            source,
+            normalize_q(q),
+            limit,
+            list(items),
+            settings.cache_ttl_for(source),
+            settings.cache_stale_seconds,
+        )
+        self._writes.add(future)
+        future.add_done_callback(self._on_written)
+
+    def _on_written(self, future: asyncio.Future) -> None:
+        self._writes.discard(future)
+        if future.cancelled():
+            return
+        e = future.exception()
+        if e is not None:
+            self.counters.errors += 1
+            log.info(f"L2 cache write failed: {e!r}")
+        else:
+            self.counters.writes += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **asdict(self.counters),
+            "enabled": self.enabled,
+            "pending_writes": len(self._writes),
+            # по последнему обслуживанию (раз в cache_l2_maintenance_interval_seconds)
+            "entries": self._entries,
+            "bytes": self._bytes,
+        }
+
+
+disk_cache = DiskCache()
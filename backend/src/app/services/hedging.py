@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """Последние N латентностей успешных вызовов источника."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class Hedger:
+    """
+    Хеджированные вызовы: если первый запрос не ответил за наблюдаемый p95 источника,
+    параллельно запускается второй; побеждает первый успешный, проигравший отменяется.
+    Второй запрос — такой же вызов upstream'а: admit решает, можно ли его сделать (квота).
+    """
+
+    def __init__(self) -> None:
+        self._windows: dict[str, LatencyWindow] = {}
+        self.hedged: dict[str, int] = {}
+        self.hedge_wins: dict[str, int] = {}
+        self.hedge_denied: dict[str, int] = {}
+
+    def window(self, source: str) -> LatencyWindow:
+        w = self._windows.get(source)
+        if w is None:
+            w = self._windows[source] = LatencyWindow()
+        return w
+
+    def hedge_delay(self, source: str) -> float | None:
+        if not settings.hedge_enabled:
+            return None
+        w = self.window(source)
+        if len(w) < settings.hedge_min_samples:
+            return None
+        p95 = w.quantile(0.95) or 0.0
+        return max(p95, settings.hedge_min_delay_ms / 1000)
+
+    async def call(
+        self,
+        source: str,
+        fn: Callable[[], Awaitable[T]],
+        admit: Callable[[], bool] | None = None,
+    ) -> T:
+        start = time.perf_counter()
+        delay = self.hedge_delay(source)
+        primary = asyncio.ensure_future(fn())
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if admit is None or admit():
+                        tasks.add(asyncio.ensure_future(fn()))
+                        self.hedged[source] = self.hedged.get(source, 0) + 1
+                    else:
+                        self.hedge_denied[source] = self.hedge_denied.get(source, 0) + 1
+
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        if t is not primary:
+                            self.hedge_wins[source] = self.hedge_wins.get(source, 0) + 1
+                        self.window(source).add(time.perf_counter() - start)
+                        return t.result()
+                    error = error or t.exception()
+            assert error is not None
+            raise error
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            source: {
+                "samples": len(w),
+                "p95_ms": int((w.quantile(0.95) or 0) * 1000),
+                "hedged": self.hedged.get(source, 0),
+                "hedge_wins": self.hedge_wins.get(source, 0),
+                "hedge_denied": self.hedge_denied.get(source, 0),  # нет токена квоты на второй запрос
+            }
+            for source, w in self._windows.items()
+        }
+
+
+hedger = Hedger()
@@ -0,0 +1,209 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import case, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import bucket_quantile
+from app.db.models import RequestLogRollup
+from app.models.logs import Granularity
+
+ALL_SOURCES = "*"
+
+# границы гистограммы took_ms и соответствующие колонки request_log_rollups
+LATENCY_BOUNDS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+LATENCY_COLUMNS = tuple(f"lat_le_{b}" for b in LATENCY_BOUNDS_MS) + ("lat_inf",)
+_ADDITIVE_COLUMNS = ("count", "errors", "items_sum", "took_ms_sum") + LATENCY_COLUMNS
+
+# чистим старые агрегаты не чаще раза в этот интервал
+_PRUNE_INTERVAL_S = 600.0
+_last_prune = 0.0
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite отдаёт naive datetime — в базе всё хранится в UTC
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def bucket_start(ts: datetime, granularity: Granularity) -> datetime:
+    ts = _utc(ts).astimezone(timezone.utc).replace(second=0, microsecond=0)
+    return ts.replace(minute=0) if granularity == "hour" else ts
+
+
+def _latency_column(took_ms: int) -> str:
+    for bound, column in zip(LATENCY_BOUNDS_MS, LATENCY_COLUMNS):
+        if took_ms <= bound:
+            return column
+    return LATENCY_COLUMNS[-1]
+
+
+def build_rollups(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Сворачивает пачку строк request_logs в дельты агрегатов: по одной строке
+    на (granularity, bucket_start, source). source="*" — все запросы, остальные —
+    запросы, в которых участвовал источник; errors — запросы с ошибкой именно этого источника.
+    """
+    acc: dict[tuple[str, datetime, str], dict[str, Any]] = {}
+
+    for row in rows:
+        took_ms = int(row.get("took_ms") or 0)
+        items = int(row.get("items_count") or 0)
+        failed = {e.get("source") for e in row.get("errors") or []}
+        latency_column = _latency_column(took_ms)
+        keys = [(ALL_SOURCES, bool(row.get("errors_count")))] + [(s, s in failed) for s in row.get("sources") or []]
+
+        for granularity in ("minute", "hour"):
+            start = bucket_start(row["ts"], granularity)
+            for source, errored in keys:
+                key = (granularity, start, source)
+                r = acc.get(key)
+                if r is None:
+                    r = acc[key] = {
+                        "granularity": granularity,
+                        "bucket_start": start,
+                        "source": source,
+                        "took_ms_max": 0,
+                        **{c: 0 for c in _ADDITIVE_COLUMNS},
+                    }
+                r["count"] += 1
+                r["errors"] += int(errored)
+                r["items_sum"] += items
+                r["took_ms_sum"] += took_ms
+                r["took_ms_max"] = max(r["took_ms_max"], took_ms)
+                r[latency_column] += 1
+
+    return list(acc.values())
+
+
+def _dialect_insert(dialect: str):
+    # INSERT ... ON CONFLICT есть и в SQLite, и в Postgres, но конструкторы у SQLAlchemy разные
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Log rollups are not supported on {dialect!r}")
+    return insert
+
+
+async def upsert_rollups(session: AsyncSession, rollups: list[dict[str, Any]]) -> None:
+    """Прибавляет дельты к существующим агрегатам атомарно (без read-modify-write)."""
+    if not rollups:
+        return
+
+    insert = _dialect_insert(session.bind.dialect.name)
+    table = RequestLogRollup.__table__
+    stmt = insert(table).values(rollups)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.bucket_start, table.c.source],
+        set_={
+            **{c: table.c[c] + stmt.excluded[c] for c in _ADDITIVE_COLUMNS},
+            "took_ms_max": case(
+                (stmt.excluded.took_ms_max > table.c.took_ms_max, stmt.excluded.took_ms_max),
+                else_=table.c.took_ms_max,
+            ),
+        },
+    )
+    await session.execute(stmt)
+    await _maybe_prune(session)
+
+
+async def _maybe_prune(session: AsyncSession) -> None:
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < _PRUNE_INTERVAL_S:
+        return
+    _last_prune = now
+
+    utcnow = datetime.now(timezone.utc)
+    table = RequestLogRollup.__table__
+    for granularity, keep in (
+        ("minute", timedelta(hours=settings.log_rollup_minute_retention_hours)),
+        ("hour", timedelta(days=settings.log_rollup_hour_retention_days)),
+    ):
+        await session.execute(
+            delete(table).where(table.c.granularity == granularity, table.c.bucket_start < utcnow - keep)
+        )
+
+
+def _summary(counts: dict[str, int], latency: list[int]) -> dict[str, Any]:
+    count = counts["count"]
+
+    def quantile(q: float) -> float | None:
+        # интерполяция внутри широкой корзины может «перелететь» реальный максимум
+        v = bucket_quantile(LATENCY_BOUNDS_MS, latency, q)
+        return round(min(v, counts["took_ms_max"]), 1) if v is not None else None
+
+    return {
+        "count": count,
+        "errors": counts["errors"],
+        "error_rate": round(counts["errors"] / count, 4) if count else 0.0,
+        "avg_items": round(counts["items_sum"] / count, 1) if count else None,
+        "avg_ms": round(counts["took_ms_sum"] / count, 1) if count else None,
+        "max_ms": counts["took_ms_max"] if count else None,
+        **{f"p{int(q * 100)}_ms": quantile(q) for q in (0.5, 0.95, 0.99)},
+    }
+
+
+class _Acc:
+    __slots__ = ("counts", "latency")
+
+    def __init__(self) -> None:
+        self.counts = {"count": 0, "errors": 0, "items_sum": 0, "took_ms_sum": 0, "took_ms_max": 0}
+        self.latency = [0] * len(LATENCY_COLUMNS)
+
+    def add(self, r: RequestLogRollup) -> None:
+        self.counts["count"] += r.count
+        self.counts["errors"] += r.errors
+        self.counts["items_sum"] += r.items_sum
+        self.counts["took_ms_sum"] += r.took_ms_sum
+        self.counts["took_ms_max"] = max(self.counts["took_ms_max"], r.took_ms_max)
+        for i, column in enumerate(LATENCY_COLUMNS):
+            self.latency[i] += getattr(r, column)
+
+    def summary(self) -> dict[str, Any]:
+        return _summary(self.counts, self.latency)
+
+
+async def read_stats(
+    session: AsyncSession,
+    since: datetime,
+    granularity: Granularity,
+    source: str | None = None,
+) -> dict[str, Any]:
+    """
+    Статистика за окно только по агрегатам: число прочитанных строк зависит
+    от длины окна и числа источников, но не от размера request_logs.
+    """
+    start = bucket_start(since, granularity)
+    stmt = (
+        select(RequestLogRollup)
+        .where(RequestLogRollup.granularity == granularity, RequestLogRollup.bucket_start >= start)
+        .order_by(RequestLogRollup.bucket_start)
+    )
+    rows = (await session.execute(stmt)).scalars().all()
+
+    series_source = source or ALL_SOURCES
+    totals = _Acc()
+    by_source: dict[str, _Acc] = {}
+    buckets: list[dict[str, Any]] = []
+
+    for r in rows:
+        if r.source != ALL_SOURCES:
+            by_source.setdefault(r.source, _Acc()).add(r)
+        if r.source == series_source:
+            totals.add(r)
+            bucket = _Acc()
+            bucket.add(r)
+            buckets.append({"ts": _utc(r.bucket_start), **bucket.summary()})
+
+    return {
+        "granularity": granularity,
+        "since": start,
+        "source": series_source,
+        "totals": totals.summary(),
+        "by_source": {s: acc.summary() for s, acc in sorted(by_source.items())},
+        "buckets": buckets,
+    }
@@ -1,8 +1,139 @@
-from app.db.models import RequestLog
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import settings
+from app.core.tracing import tracer
 from app.db.session import get_sessionmaker
 
+log = logging.getLogger("api-fusion")
+
+
+async def write_search_logs(rows: list[dict[str, Any]]) -> None:
+    """Один bulk INSERT на пачку строк request_logs + агрегаты в той же транзакции."""
+    sessionmaker = get_sessionmaker()
+    if sessionmaker is None or not rows:
+        return
+
+    # модели и SQLAlchemy — только когда БД включена (см. db/session.py)
+    from sqlalchemy import insert
+
+    from app.db.models import RequestLog
+    from app.services.log_rollups import build_rollups, upsert_rollups
+
+    async with sessionmaker() as session:
+        with tracer.span("db-insert", rows=len(rows)):
+            await session.execute(insert(RequestLog), rows)
+        with tracer.span("db-rollups"):
+            await upsert_rollups(session, build_rollups(rows))
+        with tracer.span("db-commit"):
+            await session.commit()
+
+
+@dataclass
+class LogCounters:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0  # выкинуто из-за переполнения очереди
+    failed: int = 0  # не записано из-за ошибки БД
+    batches: int = 0
+
+
+class LogWriter:
+    """
+    Ограниченная очередь логов + фоновая задача, пишущая их в БД пачками
+    (по размеру пачки или по интервалу). Запрос никогда не ждёт БД.
+    """
+
+    def __init__(self) -> None:
+        self.counters = LogCounters()
+        self._queue: asyncio.Queue[dict[str, Any]] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    def start(self) -> None:
+        if get_sessionmaker() is None or self._task is not None:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=settings.log_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        # дописываем всё, что уже в очереди, но не бесконечно
+        self._closing = True
+        try:
+            await asyncio.wait_for(task, timeout=settings.log_shutdown_timeout_seconds)
+        except TimeoutError:
+            log.warning(f"Log writer shutdown timed out, {self._queue.qsize()} rows lost")
+        except Exception as e:
+            log.warning(f"Log writer stopped with error: {e!r}")
 
-async def write_search_log(
+    def enqueue(self, row: dict[str, Any]) -> None:
+        queue = self._queue
+        if queue is None or self._task is None:
+            return
+
+        row.setdefault("ts", datetime.now(timezone.utc))
+        if queue.full():
+            if settings.log_overflow_policy == "drop_new":
+                self.counters.dropped += 1
+                return
+            # drop_oldest: освобождаем место под свежую строку
+            queue.get_nowait()
+            self.counters.dropped += 1
+
+        queue.put_nowait(row)
+        self.counters.enqueued += 1
+
+    async def _run(self) -> None:
+        while not (self._closing and self._queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self) -> list[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.log_flush_interval_ms / 1000
+        batch: list[dict[str, Any]] = []
+
+        while len(batch) < settings.log_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0 or (self._closing and self._queue.empty()):
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            # отдельная фоновая трасса: медленная запись в БД попадает в экспорт, как и медленный запрос
+            with tracer.trace("log-flush", rows=len(batch)):
+                await write_search_logs(batch)
+            self.counters.written += len(batch)
+            self.counters.batches += 1
+        except Exception as e:
+            # логирование не должно ронять сервис: считаем и идём дальше
+            self.counters.failed += len(batch)
+            log.warning(f"Request log flush failed ({len(batch)} rows): {e!r}")
+
+    def stats(self) -> dict[str, Any]:
+        data = asdict(self.counters)
+        data["queued"] = self._queue.qsize() if self._queue is not None else 0
+        data["running"] = self._task is not None
+        return data
+
+
+log_writer = LogWriter()
+
+
+def enqueue_search_log(
     *,
     request_id: str,
     path: str,
@@ -12,22 +143,21 @@ async def write_search_log(
     took_ms: int,
     items_count: int,
     errors: list[dict],
+    cache: dict[str, str] | None = None,
+    details: list[dict] | None = None,
 ) -> None:
-    sessionmaker = get_sessionmaker()
-    if sessionmaker is None:
-        return
-
-    async with sessionmaker() as session:
-        row = RequestLog(
-            request_id=request_id,
-            path=path,
-            q=q,
-            sources=sources,
-            limit=limit,
-            took_ms=took_ms,
-            items_count=items_count,
-            errors_count=len(errors),
-            errors=errors,
-        )
-        session.add(row)
-        await session.commit()
\ No newline at end of file
+    log_writer.enqueue(
+        {
+            "request_id": request_id,
+            "path": path,
+            "q": q,
+            "sources": sources,
+            "limit": limit,
+            "took_ms": took_ms,
+            "items_count": items_count,
+            "errors_count": len(errors),
+            "errors": errors,
+            "cache": cache,
+            "details": details,
+        }
+    )
@@ -0,0 +1,206 @@
+import asyncio
+import base64
+import binascii
+import heapq
+import json
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.core.metrics import metrics
+from app.core.timing import measure
+from app.connectors.registry import connector_registry
+from app.models.items import Item
+from app.models.search import ErrorInfo, SourceName
+from app.services.aggregator import AggregateResult, call_upstream, connector_flight, source_error
+from app.services.cache import CacheStatus, SearchCache, normalize_q
+from app.services.ranking import Ranker, canonical_url
+
+# страницы upstream'ов отдельно от кэша /v1/search: продолжение курсора не должно
+# перезапрашивать страницу, которую предыдущий запрос дочитал не до конца
+page_cache = SearchCache()
+
+_CACHE_RANK = {"hit": 0, "stale": 1, "miss": 2}
+
+
+class InvalidCursorError(ValueError):
+    """Курсор не разбирается или выдан для другого запроса."""
+
+
+@dataclass
+class PageResult(AggregateResult):
+    next_cursor: str | None = None
+
+
+def encode_cursor(q: str, sources: list[SourceName], per_page: int, positions: dict[str, list[int]]) -> str:
+    raw = json.dumps({"q": normalize_q(q), "s": sorted(sources), "n": per_page, "p": positions}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, q: str, sources: list[SourceName]) -> tuple[int, dict[str, list[int]]]:
+    """(размер страницы upstream'а, позиции источников [страница, смещение]); исчерпанных в позициях нет."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        per_page = int(data["n"])
+        positions = {str(s): [int(p[0]), int(p[1])] for s, p in data["p"].items()}
+        bound_q, bound_sources = data["q"], data["s"]
+    except (binascii.Error, ValueError, KeyError, TypeError, IndexError, AttributeError):
+        raise InvalidCursorError("Malformed cursor") from None
+
+    if bound_q != normalize_q(q) or bound_sources != sorted(sources):
+        raise InvalidCursorError("Cursor was issued for a different query or set of sources")
+    if per_page < 1 or any(page < 0 or offset < 0 for page, offset in positions.values()):
+        raise InvalidCursorError("Malformed cursor")
+    return per_page, positions
+
+
+async def fetch_page(source: SourceName, q: str, page: int, per_page: int) -> tuple[list[Item], CacheStatus]:
+    key = f"{normalize_q(q)}#{per_page}:{page}"
+    cached, status = page_cache.lookup(source, key, per_page)
+    if cached is not None:
+        return cached, status
+
+    fn = connector_registry.page_fn(source)
+
+    async def call() -> list[Item]:
+        items = await call_upstream(source, lambda client: fn(client, q, page, per_page))
+        # внутри страницы — порядок merge: тогда голова буфера всегда лучший оставшийся элемент страницы
+        score = Ranker().score
+        items = sorted(items, key=lambda item: -score(item))
+        page_cache.store(source, key, per_page, items)
+        return items
+
+    return await connector_flight.do((source, key, "page"), call), "miss"
+
+
+class _SourceStream:
+    """Позиция в выдаче одного источника: страница upstream'а, смещение в ней и сама страница."""
+
+    __slots__ = ("source", "page", "offset", "buffer", "done", "failed", "cache")
+
+    def __init__(self, source: SourceName, page: int, offset: int) -> None:
+        self.source = source
+        self.page = page
+        self.offset = offset
+        self.buffer: list[Item] | None = None
+        self.done = False  # страниц больше нет
+        self.failed = False  # страницу не получили: позиция в курсоре остаётся прежней
+        self.cache: CacheStatus | None = None
+
+    def needs_page(self) -> bool:
+        return self.buffer is None and not self.done and not self.failed
+
+    def head(self) -> Item | None:
+        if self.buffer is not None and self.offset < len(self.buffer):
+            return self.buffer[self.offset]
+        return None
+
+    def take(self, per_page: int) -> Item:
+        item = self.buffer[self.offset]
+        self.offset += 1
+        self.settle(per_page)
+        return item
+
+    def settle(self, per_page: int) -> None:
+        if self.buffer is None or self.offset < len(self.buffer):
+            return
+        # неполная страница — последняя; глубже search_max_pages не ходим
+        if len(self.buffer) < per_page or self.page + 1 >= settings.search_max_pages:
+            self.done = True
+        else:
+            self.page += 1
+            self.offset = 0
+            self.buffer = None
+
+    def position(self) -> list[int] | None:
+        return None if self.done else [self.page, self.offset]
+
+
+async def _load(stream: _SourceStream, q: str, per_page: int, deadline: Deadline) -> ErrorInfo | None:
+    try:
+        with measure(f"fetch-{stream.source}"):
+            items, status = await asyncio.wait_for(
+                fetch_page(stream.source, q, stream.page, per_page), timeout=deadline.remaining()
+            )
+    except Exception as e:
+        stream.failed = True
+        if deadline.expired:
+            error = ErrorInfo(source=stream.source, message="Request deadline exceeded", type="deadline_exceeded")
+        else:
+            error = source_error(stream.source, e)
+        metrics.source_results.inc(stream.source, "miss", error.type)
+        return error
+
+    metrics.source_results.inc(stream.source, status, "ok")
+    if stream.cache is None or _CACHE_RANK[status] > _CACHE_RANK[stream.cache]:
+        stream.cache = status
+    stream.buffer = items
+    stream.settle(per_page)
+    return None
+
+
+async def search_page(
+    q: str,
+    sources: list[SourceName],
+    limit: int,
+    cursor: str | None = None,
+    budget_ms: int | None = None,
+) -> PageResult:
+    """
+    Одна страница объединённой выдачи. Источники — отсортированные потоки страниц,
+    слияние — ленивый k-way merge через кучу по головам буферов: следующая страница
+    источника запрашивается только когда его буфер кончился, а элементы ещё нужны.
+
+    Курсор хранит позицию каждого источника (страница + смещение), поэтому продолжение
+    читает недочитанные страницы из page_cache и ходит наружу только за новыми.
+    """
+    if cursor is not None:
+        per_page, positions = decode_cursor(cursor, q, sources)
+    else:
+        per_page = settings.search_page_size
+        positions = {s: [0, 0] for s in sources}
+
+    # та же оценка и тот же ключ дедупликации, что и у /v1/search (services/ranking).
+    # Дубли убираются внутри страницы; между страницами — нет: курсор не хранит выданные URL
+    score = Ranker().score
+    streams = [
+        _SourceStream(s, *positions[s]) for s in dict.fromkeys(sources) if connector_registry.pageable(s) and s in positions
+    ]
+    errors: dict[str, ErrorInfo] = {}
+    deadline = Deadline.after_ms(budget_ms or settings.search_budget_ms)
+    token = current_deadline.set(deadline)
+    try:
+        # стартовые страницы — параллельно (у продолжения курсора это обычно попадания в кэш)
+        initial = await asyncio.gather(*(_load(s, q, per_page, deadline) for s in streams if s.needs_page()))
+        errors.update((e.source, e) for e in initial if e is not None)
+
+        heap = [(-score(h), i) for i, s in enumerate(streams) if (h := s.head()) is not None]
+        heapq.heapify(heap)
+        items: list[Item] = []
+        seen: set[str] = set()
+        while heap and len(items) < limit:
+            _, i = heapq.heappop(heap)
+            stream = streams[i]
+            # дубль тоже снимается с потока: курсор продвигается за него
+            item = stream.take(per_page)
+            url = canonical_url(item.url)
+            if url not in seen:
+                seen.add(url)
+                items.append(item)
+            if stream.needs_page() and len(items) < limit:
+                error = await _load(stream, q, per_page, deadline)
+                if error is not None:
+                    errors[stream.source] = error
+            head = stream.head()
+            if head is not None:
+                heapq.heappush(heap, (-score(head), i))
+    finally:
+        current_deadline.reset(token)
+
+    next_positions = {s.source: pos for s in streams if (pos := s.position()) is not None}
+    return PageResult(
+        items=items,
+        errors=[errors[s] for s in sources if s in errors],
+        cache={s.source: s.cache for s in streams if s.cache is not None},
+        next_cursor=encode_cursor(q, sources, per_page, next_positions) if next_positions else None,
+    )
@@ -0,0 +1,261 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, asdict
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.core.deadline import current_deadline
+from app.core.http import http_clients
+from app.core.metrics import metrics
+
+# приоритеты очереди: меньше — раньше
+PRIORITY_INTERACTIVE = 0  # пользователь ждёт ответа
+PRIORITY_BACKGROUND = 1  # фоновое обновление кэша и т.п. — первым под нож
+
+# по каким заголовкам X-RateLimit-Resource учиться: у GitHub search своя квота, отдельная от core
+# (проба /rate_limit приходит с resource=core и не должна сбивать лимит поиска)
+_RESOURCES = {"github": "search"}
+
+
+class QuotaExceededError(Exception):
+    """Квота upstream'а исчерпана, а ждать токен дольше нельзя: ErrorInfo(type="rate_limited")."""
+
+    def __init__(self, source: str, retry_in_s: float) -> None:
+        super().__init__(f"Upstream quota exhausted for {source}")
+        self.source = source
+        self.retry_in_s = retry_in_s
+
+
+@dataclass
+class QuotaCounters:
+    granted: int = 0
+    waited: int = 0  # получили токен после ожидания в очереди
+    shed: int = 0  # отказано без вызова upstream
+    headers_seen: int = 0  # ответов с X-RateLimit-*, по которым уточнён лимит
+
+
+class QuotaBucket:
+    """
+    Token bucket одного источника. Начальный лимит — из настроек (в минуту), дальше
+    уточняется по X-RateLimit-Limit/Remaining/Reset: пока сервер говорит, что осталось 0,
+    токены не выдаются до его Reset, даже если локальный bucket думает иначе.
+
+    Ожидающие вызовы стоят в очереди с приоритетом; её разбирает одна задача-насос.
+    """
+
+    def __init__(self, source: str, per_minute: float) -> None:
+        self.source = source
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0  # токенов в секунду
+        self.tokens = per_minute
+        self.counters = QuotaCounters()
+        self._updated_at = time.monotonic()
+        # то, что сказал сервер: сколько осталось и когда (wall clock) окно сбросится
+        self.server_limit: int | None = None
+        self.server_remaining: int | None = None
+        self.server_reset_at: float | None = None
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        if self.server_reset_at is not None and time.time() >= self.server_reset_at:
+            # окно на стороне сервера сбросилось: лимит снова полный
+            self.server_remaining = None
+            self.server_reset_at = None
+            self.tokens = self.capacity
+
+    def _server_blocked(self) -> bool:
+        return self.server_remaining is not None and self.server_remaining <= 0
+
+    def _next_token_in(self) -> float:
+        self._refill()
+        if self._server_blocked() and self.server_reset_at is not None:
+            return max(self.server_reset_at - time.time(), 0.0)
+        return max((1 - self.tokens) / self.rate, 0.0)
+
+    def retry_in(self) -> float:
+        # очередь впереди тоже ждёт свои токены
+        wait = self._next_token_in()
+        return wait + len(self._waiters) / self.rate if wait or self._waiters else 0.0
+
+    def low(self) -> bool:
+        """Токена прямо сейчас нет — лучше отдать кэш, чем вставать в очередь."""
+        return self.retry_in() > 0
+
+    def _try_take(self) -> bool:
+        self._refill()
+        if self.tokens < 1 or self._server_blocked():
+            return False
+        self.tokens -= 1
+        if self.server_remaining is not None:
+            self.server_remaining -= 1
+        return True
+
+    def try_acquire(self) -> bool:
+        """Токен без ожидания: для необязательных вызовов (hedge), которым очередь не нужна."""
+        if self._waiters or not self._try_take():
+            return False
+        self.counters.granted += 1
+        return True
+
+    async def acquire(self, priority: int) -> None:
+        if not self._waiters and self._try_take():
+            self.counters.granted += 1
+            return
+
+        wait = self.retry_in()
+        max_wait = settings.quota_max_wait_ms / 1000
+        deadline = current_deadline.get()
+        if deadline is not None:
+            max_wait = min(max_wait, deadline.remaining())
+        if priority > PRIORITY_INTERACTIVE or wait > max_wait:
+            self._shed(wait)
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._ensure_pump()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout=max_wait)
+        except TimeoutError:
+            # токен могли выдать в последний момент — тогда используем его
+            if not fut.done() or fut.cancelled():
+                fut.cancel()
+                self._shed(self.retry_in())
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # токен уже списан, но вызова не будет — вернём его
+                self.tokens = min(self.capacity, self.tokens + 1)
+                if self.server_remaining is not None:
+                    self.server_remaining += 1
+            fut.cancel()
+            raise
+        self.counters.granted += 1
+        self.counters.waited += 1
+        metrics.quota_events.inc(self.source, "waited")
+
+    def _shed(self, retry_in: float) -> None:
+        self.counters.shed += 1
+        metrics.quota_events.inc(self.source, "shed")
+        raise QuotaExceededError(self.source, retry_in)
+
+    def _ensure_pump(self) -> None:
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+    async def _pump(self) -> None:
+        while self._waiters:
+            # отменённые/истёкшие ожидания просто выбрасываем
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                return
+            if self._try_take():
+                _, _, fut = heapq.heappop(self._waiters)
+                fut.set_result(None)
+                continue
+            await asyncio.sleep(max(self._next_token_in(), 0.01))
+
+    def observe(self, response: httpx.Response) -> None:
+        headers = response.headers
+        resource = headers.get("x-ratelimit-resource")
+        expected = _RESOURCES.get(self.source)
+        if resource is not None and expected is not None and resource != expected:
+            return
+
+        try:
+            limit = int(headers["x-ratelimit-limit"]) if "x-ratelimit-limit" in headers else None
+            remaining = int(headers["x-ratelimit-remaining"]) if "x-ratelimit-remaining" in headers else None
+            reset = float(headers["x-ratelimit-reset"]) if "x-ratelimit-reset" in headers else None
+            retry_after = float(headers["retry-after"]) if "retry-after" in headers else None
+        except ValueError:
+            return
+
+        if limit is None and remaining is None and retry_after is None:
+            return
+
+        self._refill()
+        self.counters.headers_seen += 1
+        if limit is not None and limit > 0 and limit != self.server_limit:
+            # окно считаем минутным, как у GitHub search
+            self.server_limit = limit
+            self.capacity = float(limit)
+            self.rate = limit / 60.0
+        if remaining is not None:
+            self.server_remaining = remaining
+            self.tokens = min(self.tokens, float(remaining))
+            self.server_reset_at = reset if reset is not None else time.time() + 60.0
+        if retry_after is not None and response.status_code in (403, 429):
+            # вторичный лимит: сервер прямо сказал, сколько ждать
+            self.server_remaining = 0
+            self.server_reset_at = time.time() + retry_after
+            self.tokens = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        self._refill()
+        return {
+            "limit": self.server_limit if self.server_limit is not None else int(self.capacity),
+            "remaining": self.server_remaining if self.server_remaining is not None else int(self.tokens),
+            "reset_in_s": round(max(self.server_reset_at - time.time(), 0.0), 1) if self.server_reset_at else None,
+            "learned": self.server_limit is not None,
+            "queued": len(self._waiters),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.snapshot(), "tokens": round(self.tokens, 2), **asdict(self.counters)}
+
+
+class QuotaScheduler:
+    """Token bucket'ы по источникам; источники без настроенной квоты не ограничиваются."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, QuotaBucket] = {}
+
+    def bucket(self, source: str) -> QuotaBucket | None:
+        if not settings.quota_enabled:
+            return None
+        b = self._buckets.get(source)
+        if b is None:
+            per_minute = settings.quota_per_minute_for(source)
+            if per_minute is None:
+                return None
+            b = self._buckets[source] = QuotaBucket(source, per_minute)
+        return b
+
+    async def acquire(self, source: str, priority: int = PRIORITY_INTERACTIVE) -> None:
+        b = self.bucket(source)
+        if b is not None:
+            await b.acquire(priority)
+
+    def try_acquire(self, source: str) -> bool:
+        b = self.bucket(source)
+        return b is None or b.try_acquire()
+
+    def low(self, source: str) -> bool:
+        b = self.bucket(source)
+        return b is not None and b.low()
+
+    def observe(self, source: str, response: httpx.Response) -> None:
+        b = self.bucket(source)
+        if b is not None:
+            b.observe(response)
+
+    def snapshot(self, source: str) -> dict[str, Any] | None:
+        b = self.bucket(source)
+        return b.snapshot() if b is not None else None
+
+    def stats(self) -> dict[str, dict]:
+        return {source: b.stats() for source, b in self._buckets.items()}
+
+
+quota_scheduler = QuotaScheduler()
+
+# каждый ответ пула источника (поиск, пробы) уточняет его квоту
+http_clients.response_listeners.append(quota_scheduler.observe)
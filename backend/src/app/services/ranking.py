@@ -0,0 +1,140 @@
+import heapq
+import math
+import time
+from dataclasses import dataclass, asdict
+from typing import Iterable
+
+from app.core.config import settings
+from app.models.items import Item
+
+# параметры, которые не меняют документ: трекинг рассылок, соцсетей и рекламы
+_TRACKING_PARAMS = frozenset({"ref", "ref_src", "ref_url", "fbclid", "gclid", "yclid", "mc_cid", "mc_eid"})
+_DEFAULT_PORTS = (":80", ":443")
+
+
+def _is_tracking(param: str) -> bool:
+    name = param.partition("=")[0].lower()
+    return name.startswith("utm_") or name in _TRACKING_PARAMS
+
+
+def canonical_url(url: str) -> str:
+    """
+    Ключ дедупликации: один и тот же документ под разными URL даёт одну строку.
+    Без схемы (http/https), www., порта по умолчанию, фрагмента, трекинг-параметров
+    и завершающего слэша; оставшиеся параметры отсортированы.
+
+    Только partition/split — urlsplit на каждом из тысяч кандидатов заметно дороже.
+    """
+    rest = url.partition("://")[2] or url
+    rest = rest.partition("#")[0]
+    rest, _, query = rest.partition("?")
+    host, _, path = rest.partition("/")
+
+    host = host.rpartition("@")[2].lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.endswith(_DEFAULT_PORTS):
+        host = host.rpartition(":")[0]
+    path = path.rstrip("/")
+
+    if query:
+        params = [p for p in query.split("&") if p and not _is_tracking(p)]
+        if params:
+            params.sort()
+            return f"{host}/{path}?{'&'.join(params)}"
+    return f"{host}/{path}"
+
+
+class Ranker:
+    """
+    Оценка элемента в [0, 1], сравнимая между источниками:
+
+    - score нормируется по шкале источника: log1p(score) / log1p(rank_scale_<source>),
+      не выше 1 (звёзды GitHub и очки HN различаются на порядки);
+    - записи без score (RSS) получают rank_unscored;
+    - давность: 0.5 ** (возраст / rank_half_life_hours), с весом rank_recency_weight.
+
+    Шкалы фиксированные, а не по текущей пачке, — оценка элемента не зависит
+    от соседей, поэтому годится и как ключ постраничного merge.
+    """
+
+    __slots__ = ("now", "_inv_log_scales", "_unscored", "_w", "_decay_per_s")
+
+    def __init__(self, now: float | None = None) -> None:
+        self.now = now if now is not None else time.time()
+        self._inv_log_scales: dict[str, float] = {}
+        self._unscored = settings.rank_unscored
+        self._w = settings.rank_recency_weight
+        # 0.5 ** (age / half_life) == exp(-age * ln2 / half_life)
+        self._decay_per_s = math.log(2) / (settings.rank_half_life_hours * 3600)
+
+    def _inv_log_scale(self, source: str) -> float:
+        v = self._inv_log_scales[source] = 1 / math.log1p(max(settings.rank_scale_for(source), 1.0))
+        return v
+
+    def score(self, item: Item) -> float:
+        # вызывается на каждого кандидата: без лишних вызовов функций на горячем пути
+        s = item.score
+        if s is None:
+            base = self._unscored
+        else:
+            inv = self._inv_log_scales.get(item.source) or self._inv_log_scale(item.source)
+            base = math.log1p(s) * inv if s > 0 else 0.0
+            if base > 1.0:
+                base = 1.0
+
+        ts = item.timestamp
+        if ts is None:
+            recency = 0.0
+        else:
+            age_s = self.now - ts.timestamp()
+            recency = math.exp(-age_s * self._decay_per_s) if age_s > 0 else 1.0
+        return (1 - self._w) * base + self._w * recency
+
+
+@dataclass
+class RankingCounters:
+    candidates: int = 0
+    canonicalized: int = 0  # кандидатов, до которых дошла дедупликация (остальные не вошли бы в top-k)
+    duplicates: int = 0  # выброшены как копия документа, уже попавшего в выдачу
+
+
+class RankingStage:
+    """
+    Стадия после сбора источников: top-k по оценке Ranker с дедупликацией по каноническому URL.
+
+    Кандидаты идут через кучу: heapify за O(n), затем извлекаем лучшие, пока не наберётся
+    limit уникальных. Канонизация URL (самая дорогая часть) нужна только извлечённым —
+    примерно limit + число дубликатов среди них, а не всем n. Из копий одного документа
+    остаётся лучшая по оценке: она извлекается первой.
+    """
+
+    def __init__(self) -> None:
+        self.counters = RankingCounters()
+
+    def rank(self, items: Iterable[Item], limit: int) -> list[Item]:
+        score = Ranker().score
+        # (-оценка, порядковый номер, элемент): номер разбивает ничьи в пользу более раннего
+        # и не даёт кортежам дойти до сравнения Item
+        heap = [(-score(item), n, item) for n, item in enumerate(items)]
+        heapq.heapify(heap)
+        self.counters.candidates += len(heap)
+
+        seen: set[str] = set()
+        top: list[Item] = []
+        while heap and len(top) < limit:
+            item = heapq.heappop(heap)[2]
+            self.counters.canonicalized += 1
+            key = canonical_url(item.url)
+            if key in seen:
+                self.counters.duplicates += 1
+                continue
+            seen.add(key)
+            top.append(item)
+        return top
+
+    def stats(self) -> dict:
+        return asdict(self.counters)
+
+
+ranking = RankingStage()
@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.executor import cpu_executor
+from app.core.http import http_clients
+from app.models.items import Item, make_item
+from app.services.sources_status import health_monitor
+
+log = logging.getLogger("api-fusion")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> set[str]:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def trigrams(token: str) -> set[str]:
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+def parse_feed(body: str) -> list[Item]:
+    # функция уровня модуля: её можно отправить и в process pool.
+    # feedparser импортируется при первом разборе — в воркере пула, а не при старте
+    import feedparser
+
+    items: list[Item] = []
+    feed = feedparser.parse(body)
+    for entry in feed.entries:
+        title = getattr(entry, "title", None)
+        link = getattr(entry, "link", None)
+
+        ts = datetime.now(timezone.utc)
+        if getattr(entry, "published_parsed", None):
+            try:
+                ts = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
+            except Exception:
+                pass
+
+        # кривой URL или пустой заголовок — пропускаем запись, а не весь фид
+        item = make_item(source="rss", title=title, url=link, snippet=getattr(entry, "summary", None), timestamp=ts)
+        if item is not None:
+            items.append(item)
+    return items
+
+
+@dataclass(slots=True)
+class RssEntry:
+    item: Item
+    link: str
+    haystack: str  # title + summary в нижнем регистре — для точной проверки подстроки
+    ts: datetime
+
+
+class RssIndex:
+    """
+    Компактное in-memory хранилище RSS-записей с инвертированным индексом по токенам.
+    Записи дедуплицируются по ссылке, размер ограничен по возрасту и количеству.
+
+    q ищется как подстрока (как при линейном проходе по фиду): "ython" находит "Python".
+    Поэтому часть запроса сопоставляется не с одним токеном, а со всеми токенами словаря,
+    которые её содержат; их находит триграммный индекс по словарю (он много меньше записей).
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[int, RssEntry] = {}
+        self._by_link: dict[str, int] = {}
+        self._postings: dict[str, set[int]] = {}
+        # триграмма -> токены словаря, в которых она встречается
+        self._trigrams: dict[str, set[str]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, item: Item) -> bool:
+        link = item.url
+        ts = item.timestamp or datetime.now(timezone.utc)
+        haystack = f"{item.title}\n{item.snippet or ''}".lower()
+
+        existing = self._by_link.get(link)
+        if existing is not None:
+            if self._entries[existing].haystack == haystack:
+                return False
+            self._remove(existing)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = RssEntry(item=item, link=link, haystack=haystack, ts=ts)
+        self._by_link[link] = entry_id
+        for token in tokenize(haystack):
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            ids.add(entry_id)
+        return True
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._by_link.pop(entry.link, None)
+        for token in tokenize(entry.haystack):
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(entry_id)
+            if not ids:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    tokens = self._trigrams.get(gram)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del self._trigrams[gram]
+
+    def prune(self, max_age: timedelta, max_entries: int) -> int:
+        cutoff = datetime.now(timezone.utc) - max_age
+        doomed = [i for i, e in self._entries.items() if e.ts < cutoff]
+
+        overflow = len(self._entries) - len(doomed) - max_entries
+        if overflow > 0:
+            doomed_set = set(doomed)
+            rest = sorted((e.ts, i) for i, e in self._entries.items() if i not in doomed_set)
+            doomed.extend(i for _, i in rest[:overflow])
+
+        for i in doomed:
+            self._remove(i)
+        return len(doomed)
+
+    def _tokens_containing(self, part: str) -> list[str]:
+        grams = sorted((self._trigrams.get(g, set()) for g in trigrams(part)), key=len)
+        tokens = set(grams[0])
+        for g in grams[1:]:
+            tokens &= g
+        return [t for t in tokens if part in t]
+
+    def _candidates(self, parts: set[str]) -> set[int] | None:
+        """Записи, где есть все части запроса (внутри слов тоже); None — сужать нечем, проверяем все."""
+        candidates: set[int] | None = None
+        # длинные части избирательнее — с них и начинаем
+        for part in sorted(parts, key=len, reverse=True):
+            if len(part) < 3:
+                # короче триграммы — её проверит сравнение подстроки
+                continue
+            postings = [self._postings[t] for t in self._tokens_containing(part)]
+            if sum(map(len, postings)) > (len(self._entries) // 2 if candidates is None else len(candidates)):
+                # часть встречается чаще, чем осталось кандидатов: объединять постинги дороже,
+                # чем проверить подстроку у каждого
+                continue
+            ids: set[int] = set().union(*postings)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, q: str, limit: int, offset: int = 0) -> list[Item]:
+        needle = q.lower()
+        candidates = self._candidates(tokenize(needle))
+        entries = self._entries.values() if candidates is None else (self._entries[i] for i in candidates)
+
+        # индекс только сужает выбор: q — подстрока заголовка или описания, как при проходе по фиду
+        matched = (e for e in entries if needle in e.haystack)
+        top = heapq.nlargest(offset + limit, matched, key=lambda e: e.ts)
+        return [e.item for e in top[offset:]]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "tokens": len(self._postings), "trigrams": len(self._trigrams)}
+
+
+@dataclass
+class FeedState:
+    etag: str | None = None
+    last_modified: str | None = None
+    last_fetch_at: float | None = None
+    last_status: int | None = None
+    last_error: str | None = None
+
+
+class RssIngester:
+    """Фоновое обновление фидов (conditional GET) в RssIndex по расписанию."""
+
+    def __init__(self, index: RssIndex) -> None:
+        self.index = index
+        self._feeds: dict[str, FeedState] = {}
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # новое событие — после остановки: finally в _run отмечает готовность и при отмене
+        self._ready = asyncio.Event()
+
+    async def wait_ready(self) -> None:
+        # вне lifespan (скрипты) запускаемся по первому запросу
+        self.start()
+        await self._ready.wait()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                log.warning(f"RSS refresh failed: {e!r}")
+            finally:
+                self._ready.set()
+            await asyncio.sleep(settings.rss_refresh_interval_seconds)
+
+    async def refresh_all(self) -> None:
+        await asyncio.gather(*(self.refresh_feed(url) for url in settings.rss_feeds))
+        self.index.prune(
+            max_age=timedelta(hours=settings.rss_max_entry_age_hours),
+            max_entries=settings.rss_max_entries,
+        )
+
+    async def refresh_feed(self, feed_url: str) -> None:
+        state = self._feeds.setdefault(feed_url, FeedState())
+
+        headers = {}
+        if state.etag:
+            headers["If-None-Match"] = state.etag
+        if state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        state.last_fetch_at = time.time()
+        start = time.perf_counter()
+        try:
+            r = await http_clients.get("rss").get(feed_url, headers=headers, timeout=settings.timeout_for("rss"))
+            state.last_status = r.status_code
+            if r.status_code != 304:
+                r.raise_for_status()
+        except Exception as e:
+            state.last_error = repr(e)
+            health_monitor.record_passive("rss", False, int((time.perf_counter() - start) * 1000), repr(e))
+            return
+
+        # обновление фида — тот же сигнал здоровья, что и проба
+        health_monitor.record_passive("rss", True, int((time.perf_counter() - start) * 1000))
+        if r.status_code == 304:
+            state.last_error = None
+            return
+
+        await self._ingest(r.text)
+        # валидаторы — только после разбора: иначе прерванный разбор навсегда превратится в 304
+        state.etag = r.headers.get("etag")
+        state.last_modified = r.headers.get("last-modified")
+        state.last_error = None
+
+    async def _ingest(self, body: str) -> None:
+        # feedparser + нормализация — тяжёлая CPU-работа, большие фиды разбираются в пуле
+        items = await cpu_executor.run(parse_feed, body, size=len(body))
+        for item in items:
+            self.index.add(item)
+
+    def stats(self) -> dict:
+        return {
+            **self.index.stats(),
+            "feeds": {
+                url: {
+                    "last_status": s.last_status,
+                    "last_error": s.last_error,
+                    "etag": bool(s.etag or s.last_modified),
+                }
+                for url, s in self._feeds.items()
+            },
+        }
+
+
+rss_index = RssIndex()
+rss_ingester = RssIngester(rss_index)
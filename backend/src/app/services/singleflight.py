@@ -0,0 +1,68 @@
+import asyncio
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightCounters:
+    calls: int = 0  # всего вызовов do()
+    upstream: int = 0  # реально запущенных вызовов
+    collapsed: int = 0  # вызовов, присоединившихся к уже летящему
+    cancelled: int = 0  # upstream-вызовов, отменённых, потому что все ожидающие ушли
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Склеивает одновременные одинаковые вызовы: все вызывающие с одним ключом
+    ждут один и тот же upstream-вызов.
+
+    Отмена: если вызывающий уходит (клиент отключился), он просто перестаёт ждать;
+    сам upstream-вызов отменяется только когда ушли все ожидающие.
+    """
+
+    def __init__(self) -> None:
+        self.counters = FlightCounters()
+        self._calls: dict[Hashable, _Call] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self.counters.calls += 1
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.counters.upstream += 1
+        else:
+            self.counters.collapsed += 1
+
+        call.waiters += 1
+        try:
+            # shield: отмена одного ожидающего не должна отменять общий вызов
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # сразу убираем ключ, чтобы новый вызывающий не присоединился к отменяемому вызову
+                self._forget(key, call)
+                call.task.cancel()
+                self.counters.cancelled += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, Any]:
+        data = asdict(self.counters)
+        data["in_flight"] = len(self._calls)
+        return data
@@ -2,7 +2,10 @@ import time
 from dataclasses import dataclass
 from typing import Optional
 
-import httpx
+from app.core.config import settings
+from app.core.http import http_clients
+from app.connectors.registry import connector_registry
+from app.services.circuit_breaker import circuit_breakers
 
 
 @dataclass
@@ -12,15 +15,21 @@ class ProbeResult:
     error: Optional[str] = None
 
 
-async def probe_http_get(url: str, timeout_s: float = 3.0) -> ProbeResult:
+async def probe_http_get(source: str, url: str, timeout_s: float = 3.0) -> ProbeResult:
+    result = await _probe(source, url, timeout_s)
+    # пробы тоже кормят breaker: отказы копятся, успех в open пускает пробный трафик раньше.
+    # У локального коннектора breaker'а нет: проба фида RSS — только статус для /v1/sources
+    if not connector_registry.local(source):
+        circuit_breakers.get(source).on_probe(result.ok, result.latency_ms / 1000, result.error)
+    return result
+
+
+async def _probe(source: str, url: str, timeout_s: float) -> ProbeResult:
     start = time.perf_counter()
     try:
-        async with httpx.AsyncClient(
-            timeout=timeout_s,
-            follow_redirects=True,
-            headers={"User-Agent": "API-Fusion/1.0"},
-        ) as client:
-            r = await client.get(url)
+        # проба идёт через тот же пул, что и поиск: заодно прогревает соединение
+        client = http_clients.get(source)
+        r = await client.get(url, timeout=timeout_s, follow_redirects=True)
 
         latency_ms = int((time.perf_counter() - start) * 1000)
         if 200 <= r.status_code < 400:
@@ -33,14 +42,15 @@ async def probe_http_get(url: str, timeout_s: float = 3.0) -> ProbeResult:
 
 async def probe_github(timeout_s: float = 3.0) -> ProbeResult:
     # лёгкий публичный эндпоинт, без токена
-    return await probe_http_get("https://api.github.com/rate_limit", timeout_s=timeout_s)
+    return await probe_http_get("github", "https://api.github.com/rate_limit", timeout_s=timeout_s)
 
 
 async def probe_hackernews(timeout_s: float = 3.0) -> ProbeResult:
     # публичный firebase endpoint HN
-    return await probe_http_get("https://hacker-news.firebaseio.com/v0/topstories.json", timeout_s=timeout_s)
+    return await probe_http_get("hackernews", "https://hacker-news.firebaseio.com/v0/topstories.json", timeout_s=timeout_s)
 
 
 async def probe_rss(timeout_s: float = 3.0) -> ProbeResult:
     # берём первый RSS из env (если есть), иначе дефолт
-    return await probe_http_get("https://hnrss.org/newest", timeout_s=timeout_s)
\ No newline at end of file
+    feeds = settings.rss_feeds
+    return await probe_http_get("rss", feeds[0] if feeds else "https://hnrss.org/newest", timeout_s=timeout_s)
\ No newline at end of file
@@ -1,70 +1,178 @@
 import asyncio
+import logging
+import random
 import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import Literal
 
-from app.services.source_probe import probe_github, probe_hackernews, probe_rss
+from app.core.config import settings
+from app.core.responses import make_etag
+from app.connectors.registry import connector_registry
+from app.services.circuit_breaker import circuit_breakers
+from app.services.quota import quota_scheduler
 
-# TTL кэша (сек). Можно вынести в settings/env позже.
-CACHE_TTL_S = 15.0
+log = logging.getLogger("api-fusion")
 
-_lock = asyncio.Lock()
-_cache: dict[str, Any] = {
-    "ts": 0.0,
-    "data": None,
-}
+CheckKind = Literal["probe", "passive"]
 
 
-async def get_sources_status(force: bool = False) -> list[dict]:
+@dataclass(slots=True)
+class HealthCheck:
+    ok: bool
+    latency_ms: int
+    error: str | None
+    kind: CheckKind
+    at: datetime
+
+
+class SourceHealth:
+    """Скользящая история проверок одного источника: пробы + исходы реальных вызовов."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.history: deque[HealthCheck] = deque(maxlen=settings.health_history_size)
+        self.probes = 0
+        self.probes_skipped = 0  # пробы, которые не понадобились благодаря свежему реальному вызову
+        self.last_passive_ok_at = 0.0  # monotonic
+
+    def add(self, check: HealthCheck) -> None:
+        self.history.append(check)
+
+    def snapshot(self) -> dict:
+        last = self.history[-1] if self.history else None
+        oks = sum(1 for c in self.history if c.ok)
+        latencies = sorted(c.latency_ms for c in self.history if c.ok)
+        return {
+            "source": self.source,
+            "ok": last.ok if last else None,
+            "last_checked_at": last.at if last else None,
+            "latency_ms": last.latency_ms if last else None,
+            "error": last.error if last else None,
+            "check": last.kind if last else None,
+            "uptime": round(oks / len(self.history), 3) if self.history else None,
+            "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else None,
+            "checks": len(self.history),
+        }
+
+
+class HealthMonitor:
     """
-    Возвращает статус источников.
-    - по умолчанию: отдаёт кэш, если он "свежий"
-    - force=True: принудительно обновляет (но всё равно под lock)
+    Фоновый монитор источников: у каждого свой цикл проб со случайным сдвигом интервала
+    (чтобы пробы не шли пачкой). /v1/sources читает только память и никогда не ждёт сеть.
+
+    Реальные вызовы upstream'ов (поиск, загрузка фидов RSS) тоже пишутся в историю; если источник
+    недавно успешно ответил на настоящий запрос, очередная проба пропускается. Поиск по локальному
+    индексу RSS сеть не трогает и в историю не попадает.
     """
-    now = time.monotonic()
 
-    # быстрый путь без локов
-    if not force and _cache["data"] is not None and (now - _cache["ts"] < CACHE_TTL_S):
-        return _cache["data"]
+    def __init__(self) -> None:
+        self._health: dict[str, SourceHealth] = {}
+        self._tasks: list[asyncio.Task] = []
 
-    async with _lock:
-        # двойная проверка внутри lock (чтобы параллельные запросы не обновляли кэш пачкой)
-        now2 = time.monotonic()
-        if not force and _cache["data"] is not None and (now2 - _cache["ts"] < CACHE_TTL_S):
-            return _cache["data"]
+    def health(self, source: str) -> SourceHealth:
+        h = self._health.get(source)
+        if h is None:
+            h = self._health[source] = SourceHealth(source)
+        return h
 
-        checked_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(source)) for source in connector_registry.probed()]
 
-        gh_task = probe_github()
-        hn_task = probe_hackernews()
-        rss_task = probe_rss()
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        for t in tasks:
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
 
-        gh, hn, rss = await asyncio.gather(gh_task, hn_task, rss_task)
+    def _interval(self) -> float:
+        jitter = settings.health_probe_jitter
+        return settings.health_probe_interval_seconds * random.uniform(1 - jitter, 1 + jitter)
 
-        data = [
-            {
-                "source": "github",
-                "ok": gh.ok,
-                "last_checked_at": checked_at,
-                "latency_ms": gh.latency_ms,
-                "error": gh.error,
-            },
-            {
-                "source": "hackernews",
-                "ok": hn.ok,
-                "last_checked_at": checked_at,
-                "latency_ms": hn.latency_ms,
-                "error": hn.error,
-            },
+    async def _run(self, source: str) -> None:
+        # первая проба — почти сразу, но тоже со сдвигом
+        await asyncio.sleep(random.uniform(0, 1.0))
+        while True:
+            try:
+                await self.check(source)
+            except Exception as e:
+                log.warning(f"Health check for {source} failed: {e!r}")
+            await asyncio.sleep(self._interval())
+
+    async def check(self, source: str) -> None:
+        h = self.health(source)
+        if time.monotonic() - h.last_passive_ok_at < settings.health_probe_interval_seconds:
+            h.probes_skipped += 1
+            return
+
+        h.probes += 1
+        probe = connector_registry.probe_fn(source)
+        result = await probe(timeout_s=settings.health_probe_timeout_seconds)
+        h.add(HealthCheck(result.ok, result.latency_ms, result.error, "probe", datetime.now(timezone.utc)))
+
+    def record_passive(self, source: str, ok: bool, latency_ms: int, error: str | None = None) -> None:
+        h = self.health(source)
+        if ok:
+            now = time.monotonic()
+            # под нагрузкой успехи идут сотнями в секунду: в историю — не чаще раза в секунду,
+            # иначе они вытеснят пробы и ошибки
+            throttled = now - h.last_passive_ok_at < 1.0
+            h.last_passive_ok_at = now
+            if throttled:
+                return
+        h.add(HealthCheck(ok, latency_ms, error, "passive", datetime.now(timezone.utc)))
+
+    def snapshot(self) -> list[dict]:
+        return [
             {
-                "source": "rss",
-                "ok": rss.ok,
-                "last_checked_at": checked_at,
-                "latency_ms": rss.latency_ms,
-                "error": rss.error,
-            },
+                **self.health(source).snapshot(),
+                "circuit": circuit_breakers.get(source).snapshot(),
+                "quota": quota_scheduler.snapshot(source),
+            }
+            for source in connector_registry.names()
         ]
 
-        _cache["ts"] = time.monotonic()
-        _cache["data"] = data
-        return data
\ No newline at end of file
+    def snapshot_with_etag(self) -> tuple[list[dict], str]:
+        """
+        Снимок и его ETag для /v1/sources: дашборды опрашивают часто, а статус меняется редко.
+        Под трафиком время проверки, задержки, счётчики и остаток квоты меняются каждую секунду,
+        поэтому тег слабый и строится только из статуса: доступен ли источник и с какой ошибкой,
+        состояние breaker'а, известен ли лимит квоты и исчерпана ли она.
+        """
+        snapshot = self.snapshot()
+        etag = make_etag(
+            *(
+                (
+                    s["source"],
+                    s["ok"],
+                    s["error"],
+                    s["circuit"]["state"],
+                    s["quota"] and (s["quota"]["learned"], s["quota"]["limit"], s["quota"]["remaining"] == 0),
+                )
+                for s in snapshot
+            ),
+            weak=True,
+        )
+        return snapshot, etag
+
+    def stats(self) -> dict[str, dict]:
+        return {
+            source: {"probes": h.probes, "probes_skipped": h.probes_skipped, "checks": len(h.history)}
+            for source, h in self._health.items()
+        }
+
+
+health_monitor = HealthMonitor()
+
+
+def get_sources_status() -> list[dict]:
+    """Статус источников из памяти монитора: без сетевых вызовов и без блокировок."""
+    return health_monitor.snapshot()
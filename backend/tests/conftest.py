@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+
+# settings читаются один раз при импорте app: окружение тестов задаём до него.
+# Без БД, без входящего лимита и без фоновых проб — каждый тест включает нужное сам
+os.environ.update(
+    DATABASE_URL="",
+    CACHE_L2_PATH="",
+    RATE_LIMIT_ENABLED="false",
+    HEALTH_PROBE_INTERVAL_SECONDS="1000",
+    TRACING_SAMPLE_RATE="0",
+    # остановка lifespan ждёт очередную пачку логов — в тестах она короткая
+    LOG_FLUSH_INTERVAL_MS="50",
+)
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from fake_upstreams import FakeProfile, build_app
+
+from app.core.config import settings
+from app.core.http import http_clients
+from app.services.cache import search_cache
+from app.services.circuit_breaker import circuit_breakers
+from app.services.hedging import hedger
+from app.services.quota import quota_scheduler
+from app.services.sources_status import health_monitor
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    # кэш, breaker'ы, квоты, окна hedging и история проверок — синглтоны процесса:
+    # тесты не должны видеть состояние друг друга
+    for cache in search_cache._caches.values():
+        cache.clear()
+    circuit_breakers._breakers.clear()
+    quota_scheduler._buckets.clear()
+    hedger.__init__()
+    health_monitor._health.clear()
+    yield
+
+
+@pytest.fixture
+def profile() -> FakeProfile:
+    """Поведение фейковых upstream'ов; тест может поменять его до первого запроса."""
+    return FakeProfile()
+
+
+@pytest.fixture
+def upstreams(profile: FakeProfile):
+    # пулы создаются по первому запросу к источнику: обёртка действует на новые клиенты
+    http_clients.wrap_transport = lambda inner: httpx.ASGITransport(build_app(profile))
+    yield profile
+    http_clients.wrap_transport = None
+
+
+@pytest.fixture
+def client(upstreams, monkeypatch):
+    import app.db.session as session
+    from app.main import app
+
+    # первая фоновая проба уходит в пределах секунды и сбивает счётчики пулов; проверки тесты зовут сами
+    monkeypatch.setattr(health_monitor, "start", lambda: None)
+    with TestClient(app) as c:
+        yield c
+        # движок БД живёт в event loop клиента — там же его и закрываем
+        if session._engine is not None:
+            c.portal.call(session._engine.dispose)
+
+
+@pytest.fixture
+def wait_until(client):
+    """Ждёт фоновую работу приложения: задачи крутятся в event loop TestClient, пока мы спим в нём."""
+
+    def wait(predicate, timeout_s: float = 2.0) -> bool:
+        deadline = time.monotonic() + timeout_s
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            client.portal.call(asyncio.sleep, 0.01)
+        return True
+
+    return wait
+
+
+@pytest.fixture
+def sqlite_url(tmp_path, monkeypatch) -> str:
+    """Файл SQLite для теста: движок БД пересоздаётся под него (закрывают client или db)."""
+    import app.db.session as session
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'logs.db'}"
+    monkeypatch.setattr(settings, "database_url", url)
+    monkeypatch.setattr(session, "_engine", None)
+    monkeypatch.setattr(session, "_sessionmaker", None)
+    return url
+
+
+@pytest.fixture
+async def db(sqlite_url):
+    """Готовая схема в файле SQLite для async-тестов (pytest.mark.anyio)."""
+    import app.db.session as session
+    from app.db.init import init_db
+
+    await init_db()
+    yield session.get_sessionmaker()
+    await session._engine.dispose()
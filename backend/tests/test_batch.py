@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import app.services.batch as batch_module
+from app.core.config import settings
+from app.services.aggregator import AggregateResult
+from app.services.batch import BatchRunner, batch_log_fields
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    """aggregate_search без сети: считает вызовы и одновременность."""
+    state = {"calls": [], "running": 0, "peak": 0}
+
+    async def aggregate_search(q, sources, limit, budget_ms=None):
+        state["calls"].append(q)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            state["running"] -= 1
+        return AggregateResult(items=[], errors=[])
+
+    monkeypatch.setattr(batch_module, "aggregate_search", aggregate_search)
+    return state
+
+
+@pytest.mark.anyio
+async def test_identical_queries_run_once(fake_search):
+    runner = BatchRunner()
+    entries = await runner.run(
+        [("Rust", ["github"], 10), ("rust ", ["github"], 10), ("rust", ["github"], 20), ("go", ["github"], 10)]
+    )
+    assert fake_search["calls"] == ["Rust", "rust", "go"]
+    assert [e.same_as for e in entries] == [None, 0, None, None]
+    assert entries[1].result is entries[0].result
+    assert runner.counters.deduplicated == 1
+
+
+@pytest.mark.anyio
+async def test_concurrency_is_limited(fake_search, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_concurrency", 2)
+    runner = BatchRunner()
+    await runner.run([(f"q{i}", ["github"], 10) for i in range(6)])
+    assert fake_search["peak"] == 2
+
+
+@pytest.mark.anyio
+async def test_queries_not_started_before_deadline(fake_search, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_concurrency", 1)
+    runner = BatchRunner()
+
+    async def slow(q, sources, limit, budget_ms=None):
+        await asyncio.sleep(0.1)
+        return AggregateResult(items=[], errors=[])
+
+    monkeypatch.setattr(batch_module, "aggregate_search", slow)
+    entries = await runner.run([("a", ["github"], 10), ("b", ["github", "rss"], 10)], budget_ms=50)
+    assert entries[0].result.errors == []
+    assert [(e.source, e.type) for e in entries[1].result.errors] == [
+        ("github", "deadline_exceeded"),
+        ("rss", "deadline_exceeded"),
+    ]
+    assert runner.counters.deadline_exceeded == 1
+
+
+@pytest.mark.anyio
+async def test_log_fields_single_row(fake_search):
+    entries = await BatchRunner().run([("a", ["github"], 5), ("a", ["github"], 5), ("b", ["rss"], 7)])
+    fields = batch_log_fields(entries)
+    assert fields["q"] == "batch[3]: a | b"
+    assert fields["sources"] == ["github", "rss"]
+    assert fields["limit"] == 17
+    assert [d["same_as"] for d in fields["details"]] == [None, 0, None]
+
+
+def test_batch_endpoint(client):
+    r = client.post(
+        "/v1/search/batch",
+        json={
+            "queries": [
+                {"q": "batch one", "sources": ["github"], "limit": 3},
+                {"q": "Batch  One", "sources": ["github"], "limit": 3},
+                {"q": "batch two", "sources": ["hackernews"], "limit": 2},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [res["same_as"] for res in results] == [None, 0, None]
+    assert [len(res["items"]) for res in results] == [3, 3, 2]
+    assert results[1]["items"] == results[0]["items"]
+
+
+def test_batch_too_many_queries(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_queries", 2)
+    r = client.post("/v1/search/batch", json={"queries": [{"q": f"q{i}"} for i in range(3)]})
+    assert r.status_code == 422
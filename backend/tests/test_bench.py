@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from fake_upstreams import FakeProfile, UpstreamProfile, build_app
+from loadtest import SCENARIOS, compare, percentile
+
+from app.core.config import Settings
+
+
+@pytest.fixture
+def fake() -> TestClient:
+    return TestClient(build_app(FakeProfile(github=UpstreamProfile(latency_ms=0, jitter_ms=0, items=45))))
+
+
+def test_profile_roundtrip():
+    profile = FakeProfile(hackernews=UpstreamProfile(latency_ms=5, error_rate=0.5))
+    assert FakeProfile.from_dict(json.loads(profile.to_json())) == profile
+
+
+def test_fake_github_pages_are_stable(fake):
+    url = "http://api.github.com/search/repositories"
+    first = fake.get(url, params={"q": "x", "per_page": 30, "page": 1}).json()
+    second = fake.get(url, params={"q": "x", "per_page": 30, "page": 2}).json()
+    assert (len(first["items"]), len(second["items"]), first["total_count"]) == (30, 15, 45)
+    assert fake.get(url, params={"q": "x", "per_page": 30, "page": 1}).json() == first
+
+
+def test_fake_errors_and_rss_validators():
+    fake = TestClient(build_app(FakeProfile(github=UpstreamProfile(latency_ms=0, jitter_ms=0, error_rate=1.0))))
+    assert fake.get("http://api.github.com/search/repositories", params={"q": "x"}).status_code == 503
+    feed = fake.get("http://feeds.example/rss")
+    assert "<rss" in feed.text
+    assert fake.get("http://feeds.example/rss", headers={"If-None-Match": feed.headers["etag"]}).status_code == 304
+
+
+def test_percentile_and_compare():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 3.0
+    assert percentile([1.0, 2.0], 0.99) == 2.0
+    current = {"rps": 110.0, "p50_ms": 9.0, "p95_ms": 20.0, "p99_ms": 30.0, "peak_rss_mb": 80, "failures": 0, "partial": 0}
+    line = compare("hot_query", current, {"rps": 100.0, "p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0})
+    assert "rps +10%" in line
+    assert "p50_ms -10%" in line
+
+
+def test_scenario_env_matches_settings():
+    fields = {name.upper() for name in Settings.model_fields}
+    for name, scenario in SCENARIOS.items():
+        assert set(scenario.env) <= fields, name
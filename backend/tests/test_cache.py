@@ -0,0 +1,140 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import app.services.cache as cache_module
+from app.core.config import settings
+from app.core.http import http_clients
+from app.models.items import Item
+from app.services.cache import ResultCache, normalize_q
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake = FakeTime()
+    monkeypatch.setattr(cache_module, "time", fake)
+    return fake
+
+
+def items(n: int) -> list[Item]:
+    return [Item("github", f"t{i}", f"https://example.com/{i}") for i in range(n)]
+
+
+def test_normalize_q():
+    assert normalize_q("  Rust   ASYNC ") == "rust async"
+
+
+def test_fresh_then_stale_then_miss(clock):
+    cache = ResultCache(max_entries=10)
+    cache.store("q", 5, items(5), ttl_s=10, stale_s=20)
+
+    assert cache.lookup("Q", 5) == (items(5), "hit")
+    clock.now += 15
+    assert cache.lookup("q", 5) == (items(5), "stale")
+    clock.now += 20
+    assert cache.lookup("q", 5) == (None, "miss")
+
+
+def test_covers_smaller_limit_and_exhausted_source(clock):
+    cache = ResultCache(max_entries=10)
+    cache.store("big", 10, items(10), ttl_s=10, stale_s=0)
+    assert cache.lookup("big", 3) == (items(3), "hit")
+    assert cache.lookup("big", 20) == (None, "miss")
+
+    # источник вернул меньше, чем просили: больше у него нет — подходит для любого limit
+    cache.store("small", 10, items(2), ttl_s=10, stale_s=0)
+    assert cache.lookup("small", 50) == (items(2), "hit")
+
+
+def test_lru_eviction(clock):
+    cache = ResultCache(max_entries=2)
+    cache.store("a", 1, items(1), ttl_s=10, stale_s=0)
+    cache.store("b", 1, items(1), ttl_s=10, stale_s=0)
+    cache.lookup("a", 1)
+    cache.store("c", 1, items(1), ttl_s=10, stale_s=0)
+    assert cache.lookup("b", 1)[1] == "miss"
+    assert cache.lookup("a", 1)[1] == "hit"
+
+
+def _upstream_requests(source: str) -> int:
+    return http_clients.stats().get(source, {}).get("requests", 0)
+
+
+def test_search_served_from_cache(client):
+    first = client.get("/v1/search", params={"q": "cache hit", "sources": "github"}).json()
+    before = _upstream_requests("github")
+    second = client.get("/v1/search", params={"q": "Cache  Hit", "sources": "github"}).json()
+
+    assert first["cache"] == {"github": "miss"}
+    assert second["cache"] == {"github": "hit"}
+    assert second["items"] == first["items"]
+    assert _upstream_requests("github") == before
+
+
+def test_stale_entry_served_and_refreshed_in_background(client, wait_until, monkeypatch):
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", 0.0)
+    client.get("/v1/search", params={"q": "swr", "sources": "github"})
+    before = _upstream_requests("github")
+
+    stale = client.get("/v1/search", params={"q": "swr", "sources": "github"}).json()
+    assert stale["cache"] == {"github": "stale"}
+    assert stale["items"]
+
+    # обновление идёт в фоне после ответа
+    assert wait_until(lambda: _upstream_requests("github") > before)
+    assert _upstream_requests("github") == before + 1
+
+
+def _create_pre_cache_table(path: str) -> None:
+    # request_logs в том виде, в каком она была до колонок cache и details
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE request_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, ts DATETIME, request_id VARCHAR(64), "
+        'path VARCHAR(200), q VARCHAR(300), sources JSON, "limit" INTEGER, took_ms INTEGER, '
+        "items_count INTEGER, errors_count INTEGER, errors JSON)"
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.anyio
+async def test_init_db_migrates_table_without_cache_column(sqlite_url):
+    import app.db.session as session
+    from app.db.init import init_db
+    from app.services.logs import write_search_logs
+
+    _create_pre_cache_table(sqlite_url.split(":///", 1)[1])
+    try:
+        await init_db()
+        await write_search_logs(
+            [
+                {
+                    "ts": datetime.now(timezone.utc),
+                    "request_id": "r1",
+                    "path": "/v1/search",
+                    "q": "python",
+                    "sources": ["github"],
+                    "limit": 10,
+                    "took_ms": 12,
+                    "items_count": 3,
+                    "errors_count": 0,
+                    "errors": [],
+                    "cache": {"github": "hit"},
+                }
+            ]
+        )
+    finally:
+        await session._engine.dispose()
+
+    conn = sqlite3.connect(sqlite_url.split(":///", 1)[1])
+    assert conn.execute("SELECT cache FROM request_logs").fetchone() == ('{"github": "hit"}',)
+    conn.close()
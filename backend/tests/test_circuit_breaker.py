@@ -0,0 +1,140 @@
+import pytest
+
+import app.services.circuit_breaker as breaker_module
+from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake = FakeTime()
+    monkeypatch.setattr(breaker_module, "time", fake)
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 3)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 10.0)
+    monkeypatch.setattr(settings, "breaker_max_open_seconds", 30.0)
+    monkeypatch.setattr(settings, "breaker_half_open_max_calls", 1)
+    monkeypatch.setattr(settings, "breaker_half_open_successes", 2)
+    return fake
+
+
+def open_breaker(b: CircuitBreaker) -> None:
+    for _ in range(settings.breaker_failure_threshold):
+        assert b.before_call()
+        b.on_failure("boom")
+
+
+def test_opens_after_consecutive_failures(clock):
+    b = CircuitBreaker("github")
+    b.on_failure("x")
+    b.on_success(0.01)
+    b.on_failure("x")
+    b.on_failure("x")
+    # успех в середине сбросил серию
+    assert b.state == "closed"
+    b.on_failure("x")
+    assert b.state == "open"
+    with pytest.raises(CircuitOpenError) as e:
+        b.check()
+    assert e.value.retry_in_s == pytest.approx(10.0)
+    assert b.counters.short_circuited == 1
+
+
+def test_slow_success_counts_as_failure(clock, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_slow_call_ms", 100)
+    b = CircuitBreaker("github")
+    for _ in range(3):
+        b.on_success(0.5)
+    assert b.state == "open"
+    assert b.counters.slow_calls == 3
+
+
+def test_half_open_limits_trials_and_closes(clock):
+    b = CircuitBreaker("github")
+    open_breaker(b)
+    clock.now += 10
+    assert b.before_call()
+    assert b.state == "half_open"
+    # второй пробный вызов одновременно не пускаем
+    assert not b.before_call()
+    b.on_success(0.01)
+    assert b.before_call()
+    b.on_success(0.01)
+    assert b.state == "closed"
+
+
+def test_failed_trial_doubles_open_time_up_to_max(clock):
+    b = CircuitBreaker("github")
+    open_breaker(b)
+    for expected in (20.0, 30.0):
+        clock.now += 100
+        assert b.before_call()
+        b.on_failure("still down")
+        assert b.state == "open"
+        assert b.retry_in() == pytest.approx(expected)
+
+
+def test_release_frees_trial_slot(clock):
+    b = CircuitBreaker("github")
+    open_breaker(b)
+    clock.now += 10
+    assert b.before_call()
+    b.on_release()
+    assert b.before_call()
+
+
+def test_probes_feed_breaker(clock):
+    b = CircuitBreaker("github")
+    for _ in range(3):
+        b.on_probe(False, 0.1, "timeout")
+    assert b.state == "open"
+    assert b.last_failure == "probe: timeout"
+    # успешная проба пускает пробный трафик, не дожидаясь таймера
+    b.on_probe(True, 0.05)
+    assert b.state == "half_open"
+
+
+def test_disabled_breaker_always_allows(clock, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_enabled", False)
+    b = CircuitBreaker("github")
+    open_breaker(b)
+    assert b.before_call()
+
+
+def test_search_short_circuits_open_source(client, upstreams, monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    upstreams.github.error_rate = 1.0
+    for i in range(2):
+        body = client.get("/v1/search", params={"q": f"breaker {i}", "sources": ["github", "hackernews"]}).json()
+        assert [e["type"] for e in body["errors"]] == ["bad_status"]
+
+    body = client.get("/v1/search", params={"q": "breaker open", "sources": ["github", "hackernews"]}).json()
+    assert [e["type"] for e in body["errors"]] == ["circuit_open"]
+    assert body["items"]
+    sources = {s["source"]: s for s in client.get("/v1/sources").json()}
+    assert sources["github"]["circuit"]["state"] == "open"
+
+
+def test_failing_feed_probe_does_not_hide_indexed_rss(client, upstreams, monkeypatch):
+    from app.services.source_probe import probe_rss
+
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    assert client.get("/v1/search", params={"q": "a", "sources": "rss"}).json()["items"]
+    # индекс уже наполнен, а фид умер: пробы падают, но поиск по индексу сеть не трогает
+    upstreams.rss.error_rate = 1.0
+    for _ in range(5):
+        assert not client.portal.call(probe_rss).ok
+    body = client.get("/v1/search", params={"q": "e", "sources": "rss"}).json()
+    assert body["errors"] == []
+    assert body["items"]
+    sources = {s["source"]: s for s in client.get("/v1/sources").json()}
+    assert sources["rss"]["circuit"]["state"] == "closed"
@@ -0,0 +1,156 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app.services.compose as compose_module
+from app.models.compose import ComposeRequest, FilterStep
+from app.models.items import Item
+from app.services.compose import RecipeError, apply_step, plan
+
+T0 = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def recipe(*steps: dict, **extra) -> ComposeRequest:
+    return ComposeRequest.model_validate({"steps": list(steps), **extra})
+
+
+def frames(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def items() -> list[Item]:
+    return [
+        Item("github", "Old repo", "https://example.com/old", score=5, timestamp=T0 - timedelta(days=1)),
+        Item("hackernews", "New story", "https://example.com/new", score=50, timestamp=T0 + timedelta(hours=1)),
+        Item("rss", "No date", "https://example.com/none"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([{"id": "a", "op": "search", "source": "github", "q": "x"}] * 2, "Duplicate step id"),
+        ([{"id": "f", "op": "filter", "input": "missing"}], "unknown step"),
+        (
+            [{"id": "a", "op": "take", "input": "b", "n": 1}, {"id": "b", "op": "take", "input": "a", "n": 1}],
+            "cycle",
+        ),
+    ],
+)
+def test_plan_rejects_invalid_dag(steps, message):
+    with pytest.raises(RecipeError, match=message):
+        plan(recipe(*steps))
+
+
+def test_plan_orders_and_signs_steps():
+    order, signatures = plan(
+        recipe(
+            {"id": "t", "op": "take", "input": "s1", "n": 3},
+            {"id": "s1", "op": "search", "source": "github", "q": "Rust  Async"},
+            {"id": "s2", "op": "search", "source": "github", "q": "rust async"},
+        )
+    )
+    assert [s.id for s in order] == ["s1", "s2", "t"]
+    # нормализованный запрос — та же сигнатура
+    assert signatures["s1"] == signatures["s2"]
+
+
+@pytest.mark.parametrize(
+    "since",
+    [
+        "2024-01-01T10:00:00",  # без зоны — UTC
+        "2024-01-01T10:00:00Z",
+        "2024-01-01T13:00:00+03:00",
+    ],
+)
+def test_filter_since_accepts_naive_and_offset(since):
+    step = FilterStep.model_validate({"id": "f", "op": "filter", "input": "s", "since": since})
+    assert step.since == T0
+    assert [i.title for i in apply_step(step, [items()])] == ["New story"]
+
+
+def test_local_steps():
+    merged = apply_step(recipe({"id": "m", "op": "merge", "inputs": ["a", "b"]}).steps[0], [items(), items()[:1]])
+    assert len(merged) == 4
+    dedup = apply_step(recipe({"id": "d", "op": "dedup", "input": "m"}).steps[0], [merged])
+    assert [i.url for i in dedup] == [i.url for i in items()]
+    by_score = apply_step(recipe({"id": "s", "op": "sort", "input": "d", "by": "score"}).steps[0], [dedup])
+    assert [i.title for i in by_score] == ["New story", "Old repo", "No date"]
+    contains = apply_step(recipe({"id": "f", "op": "filter", "input": "d", "contains": "STORY"}).steps[0], [dedup])
+    assert [i.title for i in contains] == ["New story"]
+
+
+def test_compose_streams_steps_and_result(client):
+    r = client.post(
+        "/v1/compose",
+        json={
+            "steps": [
+                {"id": "gh", "op": "search", "source": "github", "q": "compose"},
+                {"id": "hn", "op": "search", "source": "hackernews", "q": "compose"},
+                {"id": "gh2", "op": "search", "source": "github", "q": "Compose"},
+                {"id": "all", "op": "merge", "inputs": ["gh", "hn", "gh2"]},
+                {"id": "uniq", "op": "dedup", "input": "all"},
+                {"id": "top", "op": "take", "input": "uniq", "n": 5},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    lines = frames(r)
+    steps = {f["id"]: f for f in lines if f["type"] == "step"}
+    assert set(steps) == {"gh", "hn", "gh2", "all", "uniq", "top"}
+    assert steps["gh2"]["memo"] == "shared"
+    assert steps["gh2"]["same_as"] == "gh"
+    done = lines[-1]
+    assert done["type"] == "done"
+    assert done["output"] == "top"
+    assert len(done["items"]) == 5
+    assert done["errors"] == []
+
+
+def test_compose_invalid_recipe_is_422(client):
+    r = client.post("/v1/compose", json={"steps": [{"id": "f", "op": "filter", "input": "nope"}]})
+    assert r.status_code == 422
+
+
+def test_compose_naive_since_does_not_break_stream(client):
+    r = client.post(
+        "/v1/compose",
+        json={
+            "steps": [
+                {"id": "gh", "op": "search", "source": "github", "q": "since"},
+                {"id": "recent", "op": "filter", "input": "gh", "since": "2000-01-01T00:00:00"},
+            ]
+        },
+    )
+    lines = frames(r)
+    assert [f["status"] for f in lines if f["type"] == "step"] == ["ok", "ok"]
+    assert lines[-1]["type"] == "done"
+    assert lines[-1]["items"]
+
+
+def test_failing_local_step_sends_error_frame(client, monkeypatch):
+    def broken(items):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(compose_module, "_dedup", broken)
+    r = client.post(
+        "/v1/compose",
+        json={
+            "steps": [
+                {"id": "gh", "op": "search", "source": "github", "q": "broken"},
+                {"id": "uniq", "op": "dedup", "input": "gh"},
+                {"id": "top", "op": "take", "input": "uniq", "n": 3},
+            ]
+        },
+    )
+    assert r.status_code == 200
+    lines = frames(r)
+    steps = {f["id"]: f for f in lines if f["type"] == "step"}
+    assert steps["uniq"]["status"] == "error"
+    assert steps["uniq"]["error"] == {"step": "uniq", "message": "Step failed: boom", "type": "step_error"}
+    # зависимый шаг отработал на пустом входе, стрим дошёл до итога
+    assert steps["top"]["status"] == "ok"
+    assert steps["top"]["items_count"] == 0
+    assert lines[-1]["type"] == "done"
+    assert lines[-1]["errors"] == [steps["uniq"]["error"]]
@@ -0,0 +1,93 @@
+import pytest
+
+from app.core.compression import negotiate
+from app.core.config import settings
+from app.core.responses import encoded_etag, make_etag
+from app.services.circuit_breaker import circuit_breakers
+from app.services.sources_status import health_monitor
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("GZIP ; q=0.5, identity", "gzip"),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_etag_helpers():
+    assert make_etag("a", 1) == make_etag("a", 1)
+    assert make_etag("a", 1) != make_etag("a", 2)
+    weak = make_etag("a", weak=True)
+    assert weak.startswith('W/"')
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    # слабый тег сжатие не меняет
+    assert encoded_etag(weak, "gzip") == weak
+
+
+def test_search_etag_and_304(client):
+    params = {"q": "etag", "sources": "github"}
+    first = client.get("/v1/search", params=params)
+    etag = first.headers["etag"]
+    assert first.headers["content-encoding"] == "gzip"
+    # took_ms и cache в теге не учтены — байты не обещаны, тег слабый и от сжатия не зависит
+    assert etag.startswith('W/"')
+    assert not etag.endswith('-gzip"')
+    assert "Accept-Encoding" in first.headers["vary"]
+
+    again = client.get("/v1/search", params=params, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    # тот же результат без сжатия — тот же тег
+    plain = client.get("/v1/search", params=params, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert plain.status_code == 304
+
+
+def test_small_and_streaming_responses_not_compressed(client):
+    small = client.get("/v1/logs")
+    assert "content-encoding" not in small.headers
+    stream = client.get("/v1/search/stream", params={"q": "stream", "sources": "github"})
+    assert stream.headers["content-type"].startswith("application/x-ndjson")
+    assert "content-encoding" not in stream.headers
+
+
+def test_compression_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "compression_enabled", False)
+    r = client.get("/v1/search", params={"q": "plain", "sources": "github"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"].startswith('W/"')
+
+
+def test_sources_etag_ignores_timings_and_counters(client):
+    health_monitor.record_passive("github", ok=True, latency_ms=100)
+    first = client.get("/v1/sources")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    # под трафиком меняются время проверки, задержки и число проверок — статус тот же
+    health_monitor.health("github").last_passive_ok_at = 0.0
+    health_monitor.record_passive("github", ok=True, latency_ms=350)
+    body = client.get("/v1/sources").json()
+    assert next(s for s in body if s["source"] == "github")["checks"] == 2
+    again = client.get("/v1/sources", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+
+
+@pytest.mark.parametrize("change", ["error", "circuit"])
+def test_sources_etag_changes_with_status(client, change):
+    health_monitor.record_passive("github", ok=True, latency_ms=100)
+    etag = client.get("/v1/sources").headers["etag"]
+    if change == "error":
+        health_monitor.record_passive("github", ok=False, latency_ms=5000, error="timeout")
+    else:
+        circuit_breakers.get("github").state = "open"
+    r = client.get("/v1/sources", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
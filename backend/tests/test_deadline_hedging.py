@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.http import http_clients
+from app.services.aggregator import call_upstream
+from app.services.hedging import Hedger, hedger
+from app.services.quota import QuotaBucket
+
+
+@pytest.fixture
+def hedging(monkeypatch) -> Hedger:
+    monkeypatch.setattr(settings, "hedge_enabled", True)
+    monkeypatch.setattr(settings, "hedge_min_samples", 1)
+    monkeypatch.setattr(settings, "hedge_min_delay_ms", 20)
+    h = Hedger()
+    h.window("src").add(0.001)
+    return h
+
+
+def slow_then_fast():
+    calls = []
+
+    async def fn() -> str:
+        calls.append(1)
+        # первый вызов «завис», второй отвечает сразу
+        await asyncio.sleep(1.0 if len(calls) == 1 else 0.0)
+        return f"call{len(calls)}"
+
+    return fn, calls
+
+
+@pytest.mark.anyio
+async def test_hedge_wins_when_primary_is_slow(hedging):
+    fn, calls = slow_then_fast()
+    assert await hedging.call("src", fn) == "call2"
+    assert len(calls) == 2
+    assert hedging.stats()["src"]["hedge_wins"] == 1
+
+
+@pytest.mark.anyio
+async def test_hedge_not_sent_without_quota(hedging):
+    fn, calls = slow_then_fast()
+    task = asyncio.ensure_future(hedging.call("src", fn, admit=lambda: False))
+    await asyncio.sleep(0.1)
+    assert len(calls) == 1
+    assert hedging.stats()["src"]["hedge_denied"] == 1
+    task.cancel()
+
+
+@pytest.mark.anyio
+async def test_hedge_takes_quota_token():
+    bucket = QuotaBucket("src", per_minute=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    # токенов нет: hedge не отправляется и в очередь не встаёт
+    assert not bucket.try_acquire()
+    assert bucket.counters.granted == 2
+
+
+@pytest.mark.anyio
+async def test_call_upstream_does_not_hedge_past_quota(hedging, monkeypatch):
+    monkeypatch.setattr(settings, "quota_github_per_minute", 1.0)
+    hedger.window("github").add(0.001)
+    calls = []
+
+    async def fn(client):
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return []
+
+    try:
+        assert await call_upstream("github", fn) == []
+    finally:
+        await http_clients.stop()
+    # единственный токен ушёл на основной запрос
+    assert len(calls) == 1
+    assert hedger.stats()["github"]["hedge_denied"] == 1
+
+
+def test_source_timeout(client, upstreams, monkeypatch):
+    upstreams.github.latency_ms = 1000
+    monkeypatch.setattr(settings, "timeout_github_seconds", 0.05)
+    body = client.get("/v1/search", params={"q": "timeout", "sources": ["github", "hackernews"]}).json()
+    assert [e["type"] for e in body["errors"]] == ["timeout"]
+    assert body["items"]
+
+
+def test_request_deadline(client, upstreams):
+    upstreams.hackernews.latency_ms = 2000
+    r = client.get("/v1/search", params={"q": "deadline", "sources": ["github", "hackernews"], "budget_ms": 300})
+    body = r.json()
+    assert [(e["source"], e["type"]) for e in body["errors"]] == [("hackernews", "deadline_exceeded")]
+    assert body["took_ms"] < 1500
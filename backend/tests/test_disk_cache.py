@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.items import Item
+from app.services.cache import search_cache
+from app.services.disk_cache import DiskCache, decode_items, disk_cache, encode_items
+
+
+def items(n: int, prefix: str = "t") -> list[Item]:
+    ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [Item("github", f"{prefix}{i}", f"https://example.com/{prefix}{i}", "snippet", i, ts) for i in range(n)]
+
+
+@pytest.fixture
+def l2_path(tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "l2.db")
+    monkeypatch.setattr(settings, "cache_l2_path", path)
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", 60.0)
+    monkeypatch.setattr(settings, "cache_stale_seconds", 60.0)
+    return path
+
+
+async def started() -> DiskCache:
+    cache = DiskCache()
+    await cache.start()
+    return cache
+
+
+async def write(cache: DiskCache, q: str, limit: int, data: list[Item]) -> None:
+    cache.store("github", q, limit, data)
+    await cache.stop()
+
+
+def test_encode_decode_roundtrip():
+    original = items(3) + [Item("github", "no ts", "https://example.com/x")]
+    assert decode_items("github", encode_items(original)) == original
+
+
+@pytest.mark.anyio
+async def test_shared_between_instances_and_promoted_to_l1(l2_path):
+    await write(await started(), "Rust Async", 10, items(10))
+
+    # другой воркер или процесс после рестарта
+    other = await started()
+    try:
+        found, status = await other.lookup("github", "rust  async", 5)
+        assert (found, status) == (items(5), "hit")
+        # найденное поднято в L1
+        assert search_cache.lookup("github", "rust async", 5) == (items(5), "hit")
+        assert (await other.lookup("github", "rust async", 20))[1] == "miss"
+    finally:
+        await other.stop()
+
+
+@pytest.mark.anyio
+async def test_exhausted_source_fits_any_limit(l2_path):
+    await write(await started(), "few", 10, items(2))
+    other = await started()
+    try:
+        assert await other.lookup("github", "few", 50) == (items(2), "hit")
+    finally:
+        await other.stop()
+
+
+@pytest.mark.anyio
+async def test_stale_then_expired(l2_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", 0.0)
+    monkeypatch.setattr(settings, "cache_stale_seconds", 0.3)
+    cache = await started()
+    try:
+        cache.store("github", "old", 5, items(5))
+        await cache.stop()
+        cache = await started()
+        assert (await cache.lookup("github", "old", 5))[1] == "stale"
+        time.sleep(0.35)
+        search_cache.for_source("github").clear()
+        assert await cache.lookup("github", "old", 5) == (None, "miss")
+    finally:
+        await cache.stop()
+
+
+@pytest.mark.anyio
+async def test_warm_start_fills_l1(l2_path):
+    cache = await started()
+    for q in ("one", "two"):
+        cache.store("github", q, 3, items(3, prefix=q))
+    await cache.stop()
+    search_cache.for_source("github").clear()
+
+    restarted = await started()
+    try:
+        assert restarted.counters.warmed == 2
+        assert search_cache.lookup("github", "two", 3) == (items(3, prefix="two"), "hit")
+    finally:
+        await restarted.stop()
+
+
+@pytest.mark.anyio
+async def test_size_limit_evicts_least_recently_used(l2_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_l2_maintenance_interval_seconds", 0.0)
+    # ~500 байт: влезают три-четыре записи по ~140
+    monkeypatch.setattr(settings, "cache_l2_max_mb", 500 / 1024 / 1024)
+    cache = await started()
+    try:
+        for i in range(6):
+            cache.store("github", f"q{i}", 10, items(10, prefix=f"q{i}-"))
+            # по записи за раз: accessed_at задаёт порядок вытеснения
+            await cache._run(lambda: None)
+        assert cache.counters.evicted > 0
+        assert cache.stats()["bytes"] <= 500
+        search_cache.for_source("github").clear()
+        assert (await cache.lookup("github", "q0", 10))[1] == "miss"
+        assert (await cache.lookup("github", "q5", 10))[1] == "hit"
+    finally:
+        await cache.stop()
+
+
+@pytest.mark.anyio
+async def test_disabled_without_path_or_on_bad_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_l2_path", "")
+    cache = await started()
+    assert not cache.enabled
+    assert await cache.lookup("github", "q", 5) == (None, "miss")
+
+    monkeypatch.setattr(settings, "cache_l2_path", str(tmp_path / "missing-dir" / "l2.db"))
+    cache = await started()
+    assert not cache.enabled
+
+
+def test_search_uses_l2_after_l1_miss(l2_path, client):
+    first = client.get("/v1/search", params={"q": "l2 search", "sources": "github"}).json()
+    assert first["cache"] == {"github": "miss"}
+    # поток L2 один: пустая задача выполнится после фоновой записи
+    client.portal.call(disk_cache._run, lambda: None)
+    search_cache.for_source("github").clear()
+    second = client.get("/v1/search", params={"q": "l2 search", "sources": "github"}).json()
+    assert second["cache"] == {"github": "hit"}
+    assert second["items"] == first["items"]
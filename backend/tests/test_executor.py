@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.connectors.hackernews import parse_hn
+from app.core.config import settings
+from app.core.executor import CpuExecutor, LoopLagMonitor
+from app.core.timing import Timings, current_timings
+
+
+def thread_name(_: bytes) -> str:
+    return threading.current_thread().name
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_pool_kind", "thread")
+    monkeypatch.setattr(settings, "cpu_inline_threshold_bytes", 1024)
+    ex = CpuExecutor()
+    ex.start()
+    yield ex
+    ex.stop()
+
+
+@pytest.mark.anyio
+async def test_small_payload_runs_inline(executor):
+    assert await executor.run(thread_name, b"x", size=10) == threading.current_thread().name
+    stats = executor.stats()
+    assert (stats["inline_calls"], stats["offloaded_calls"], stats["pool"]) == (1, 0, "thread")
+
+
+@pytest.mark.anyio
+async def test_large_payload_goes_to_pool(executor):
+    assert (await executor.run(thread_name, b"x", size=4096)).startswith("cpu")
+    assert executor.stats()["offloaded_calls"] == 1
+
+
+@pytest.mark.anyio
+async def test_pool_disabled_runs_everything_inline(monkeypatch):
+    monkeypatch.setattr(settings, "cpu_pool_kind", "none")
+    ex = CpuExecutor()
+    ex.start()
+    assert await ex.run(thread_name, b"x", size=10**6) == threading.current_thread().name
+    assert ex.stats()["pool"] is None
+
+
+@pytest.mark.anyio
+async def test_timing_goes_to_server_timing(executor):
+    timings = Timings()
+    token = current_timings.set(timings)
+    try:
+        await executor.run(thread_name, b"x", size=4096, timing="parse-test")
+    finally:
+        current_timings.reset(token)
+    assert [name for name, _ in timings.items()] == ["parse-test"]
+
+
+@pytest.mark.anyio
+async def test_loop_lag_monitor_sees_blocking_work(monkeypatch):
+    monkeypatch.setattr(settings, "loop_lag_interval_ms", 10)
+    monkeypatch.setattr(settings, "loop_stall_threshold_ms", 30)
+    monitor = LoopLagMonitor()
+    monitor.start()
+    try:
+        await asyncio.sleep(0.03)
+        # синхронная работа в event loop — ровно то, что пул должен убрать
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+    finally:
+        await monitor.stop()
+    stats = monitor.stats()
+    assert stats["stalls"] >= 1
+    assert stats["max_lag_ms"] >= 50
+
+
+def test_parse_hn():
+    content = json.dumps(
+        {
+            "hits": [
+                {"title": "A", "url": "https://a.example", "points": 10, "created_at": "2024-01-01T00:00:00Z"},
+                {"story_title": "B", "story_url": "https://b.example", "points": None},
+                {"title": None, "url": None},
+            ]
+        }
+    ).encode()
+    items = parse_hn(content, limit=5)
+    assert [(i.title, i.score) for i in items] == [("A", 10), ("B", None)]
+    assert items[0].timestamp.isoformat() == "2024-01-01T00:00:00+00:00"
+    assert len(parse_hn(content, limit=1)) == 1
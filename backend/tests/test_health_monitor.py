@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.http import http_clients
+from app.services.source_probe import ProbeResult
+from app.services.sources_status import HealthCheck, HealthMonitor, SourceHealth
+
+
+def check(ok: bool, latency_ms: int, error: str | None = None) -> HealthCheck:
+    return HealthCheck(ok, latency_ms, error, "probe", datetime.now(timezone.utc))
+
+
+def test_snapshot_uptime_and_percentiles():
+    h = SourceHealth("github")
+    assert h.snapshot()["ok"] is None
+    for latency in (10, 20, 30):
+        h.add(check(True, latency))
+    h.add(check(False, 3000, "timeout"))
+    snap = h.snapshot()
+    assert (snap["ok"], snap["error"], snap["checks"], snap["uptime"]) == (False, "timeout", 4, 0.75)
+    # перцентили — только по успешным проверкам
+    assert (snap["latency_p50_ms"], snap["latency_p95_ms"]) == (20, 30)
+
+
+def test_history_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "health_history_size", 3)
+    h = SourceHealth("github")
+    for i in range(5):
+        h.add(check(True, i))
+    assert [c.latency_ms for c in h.history] == [2, 3, 4]
+
+
+def test_passive_successes_are_throttled():
+    monitor = HealthMonitor()
+    for _ in range(5):
+        monitor.record_passive("github", ok=True, latency_ms=10)
+    # ошибки пишутся всегда
+    monitor.record_passive("github", ok=False, latency_ms=10, error="bad_status")
+    history = monitor.health("github").history
+    assert [(c.ok, c.kind) for c in history] == [(True, "passive"), (False, "passive")]
+
+
+@pytest.mark.anyio
+async def test_probe_skipped_after_recent_real_call(monkeypatch):
+    monitor = HealthMonitor()
+    calls = []
+
+    async def probe(timeout_s: float) -> ProbeResult:
+        calls.append(timeout_s)
+        return ProbeResult(ok=True, latency_ms=5)
+
+    monkeypatch.setattr("app.services.sources_status.connector_registry.probe_fn", lambda source: probe)
+    await monitor.check("github")
+    monitor.record_passive("github", ok=True, latency_ms=10)
+    await monitor.check("github")
+    assert len(calls) == 1
+    assert monitor.stats()["github"] == {"probes": 1, "probes_skipped": 1, "checks": 2}
+
+
+@pytest.mark.anyio
+async def test_real_probe_through_pool(upstreams):
+    monitor = HealthMonitor()
+    try:
+        await monitor.check("hackernews")
+    finally:
+        await http_clients.stop()
+    snap = monitor.health("hackernews").snapshot()
+    assert (snap["ok"], snap["check"], snap["error"]) == (True, "probe", None)
+
+
+def test_sources_endpoint_reads_memory_only(client, upstreams):
+    # без проб и вызовов статус неизвестен, а ответ не ждёт сеть
+    upstreams.github.latency_ms = 5000
+    body = client.get("/v1/sources").json()
+    assert {s["source"] for s in body} >= {"github", "hackernews", "rss"}
+    github = next(s for s in body if s["source"] == "github")
+    assert github["ok"] is None
+    assert github["circuit"]["state"] == "closed"
+    # поиск пишет пассивную проверку
+    client.get("/v1/search", params={"q": "health", "sources": "hackernews"})
+    hn = next(s for s in client.get("/v1/sources").json() if s["source"] == "hackernews")
+    assert (hn["ok"], hn["check"]) == (True, "passive")
+
+
+def test_rss_health_comes_from_feed_fetches_not_index_searches(client, upstreams):
+    from app.services.rss_index import rss_ingester
+    from app.services.sources_status import health_monitor
+
+    assert client.get("/v1/search", params={"q": "first", "sources": "rss"}).status_code == 200
+    rss = health_monitor.health("rss")
+    rss.history.clear()
+    rss.last_passive_ok_at = 0.0
+    # поиск по индексу в сеть не ходит — и здоровье rss не подтверждает
+    for i in range(3):
+        client.get("/v1/search", params={"q": f"index {i}", "sources": "rss"})
+    assert (rss.last_passive_ok_at, len(rss.history)) == (0.0, 0)
+
+    # а неудачная загрузка фида видна в /v1/sources
+    upstreams.rss.error_rate = 1.0
+    client.portal.call(rss_ingester.refresh_all)
+    status = next(s for s in client.get("/v1/sources").json() if s["source"] == "rss")
+    assert (status["ok"], status["check"]) == (False, "passive")
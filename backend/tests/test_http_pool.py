@@ -0,0 +1,84 @@
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.http import HttpClients, PoolStats, USER_AGENT, http_clients
+from app.services.source_probe import probe_github
+
+
+def mock_upstream(status: int = 200, headers: dict | None = None):
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(status, json={"ok": status < 400}, headers=headers)
+
+    return (lambda inner: httpx.MockTransport(handler)), seen
+
+
+@pytest.mark.anyio
+async def test_one_client_per_source_until_stop():
+    clients = HttpClients()
+    clients.wrap_transport, _ = mock_upstream()
+    github = clients.get("github")
+    assert clients.get("github") is github
+    assert clients.get("hackernews") is not github
+
+    await clients.stop()
+    assert github.is_closed
+    # после остановки — новый пул, а не закрытый клиент
+    fresh = clients.get("github")
+    assert fresh is not github
+    await clients.stop()
+
+
+@pytest.mark.anyio
+async def test_pool_settings_and_stats(monkeypatch):
+    monkeypatch.setattr(settings, "timeout_github_seconds", 1.5)
+    clients = HttpClients()
+    clients.wrap_transport, seen = mock_upstream(status=503)
+    client = clients.get("github")
+    try:
+        assert client.timeout.read == 1.5
+        await client.get("https://api.github.com/a")
+        await client.get("https://api.github.com/b")
+    finally:
+        await clients.stop()
+
+    assert seen[0].headers["user-agent"] == USER_AGENT
+    stats = clients.stats()["github"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 2
+
+
+@pytest.mark.anyio
+async def test_response_listeners_see_every_response():
+    clients = HttpClients()
+    clients.wrap_transport, _ = mock_upstream(headers={"X-RateLimit-Remaining": "7"})
+    seen = []
+    clients.response_listeners.append(lambda source, r: seen.append((source, r.headers["x-ratelimit-remaining"])))
+    try:
+        await clients.get("hackernews").get("https://hn.algolia.com/api/v1/search")
+    finally:
+        await clients.stop()
+    assert seen == [("hackernews", "7")]
+
+
+def test_pool_stats_reuse_ratio():
+    assert PoolStats().as_dict()["reuse_ratio"] is None
+    stats = PoolStats(requests=10, connections_opened=2).as_dict()
+    assert stats["reused"] == 8
+    assert stats["reuse_ratio"] == 0.8
+
+
+@pytest.mark.anyio
+async def test_probe_uses_search_pool(upstreams):
+    try:
+        client = http_clients.get("github")
+        before = http_clients.stats()["github"]["requests"]
+        result = await probe_github(timeout_s=1.0)
+        assert result.ok
+        assert http_clients.get("github") is client
+        assert http_clients.stats()["github"]["requests"] == before + 1
+    finally:
+        await http_clients.stop()
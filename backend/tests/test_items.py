@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.responses import FastJSONResponse, dumps
+from app.models.items import Item, is_http_url, make_item
+from app.models.search import SearchItem
+
+TS = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "url, ok",
+    [
+        ("https://github.com/a/b", True),
+        ("http://example.com", True),
+        ("https://user@host.example/path?q=1#x", True),
+        ("ftp://example.com", False),
+        ("https:///no-host", False),
+        ("https://bad host/", False),
+        ("javascript:alert(1)", False),
+    ],
+)
+def test_is_http_url(url, ok):
+    assert is_http_url(url) is ok
+    # та же граница, что у Pydantic HttpUrl для этих случаев
+    try:
+        SearchItem(source="github", title="t", url=url)
+    except ValueError:
+        assert not ok
+
+
+@pytest.mark.parametrize(
+    "title, url",
+    [(None, "https://a.example"), ("", "https://a.example"), (42, "https://a.example"), ("t", None), ("t", "nope")],
+)
+def test_make_item_rejects_bad_rows(title, url):
+    assert make_item("github", title, url) is None
+
+
+def test_make_item_normalizes_snippet():
+    assert make_item("rss", "t", "https://a.example", snippet="").snippet is None
+    assert make_item("rss", "t", "https://a.example", snippet=["x"]).snippet is None
+    assert make_item("rss", "t", "https://a.example", snippet="s").snippet == "s"
+
+
+def test_item_serializes_like_search_item():
+    item = Item("github", "title", "https://github.com/a/b", "snippet", 5, TS)
+    fast = json.loads(dumps({"items": [item]}))["items"][0]
+    schema = SearchItem.model_validate(item.to_dict()).model_dump(mode="json")
+    # Pydantic пишет UTC как "Z", isoformat — как "+00:00": момент тот же
+    assert datetime.fromisoformat(fast.pop("timestamp")) == datetime.fromisoformat(schema.pop("timestamp")) == TS
+    assert fast == schema
+
+
+def test_fast_json_response_renders_items_and_models():
+    body = FastJSONResponse({"items": [Item("rss", "t", "https://a.example")], "at": TS}).body
+    assert json.loads(body) == {
+        "items": [{"source": "rss", "title": "t", "url": "https://a.example", "snippet": None, "score": None, "timestamp": None}],
+        "at": "2024-01-01T12:00:00+00:00",
+    }
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_search_response_items_are_valid_schema(client):
+    body = client.get("/v1/search", params={"q": "schema", "sources": ["github", "hackernews"]}).json()
+    assert body["items"]
+    for item in body["items"]:
+        SearchItem.model_validate(item)
@@ -0,0 +1,87 @@
+import pytest
+
+import app.services.logs as logs_module
+from app.core.config import settings
+from app.services.logs import LogWriter
+
+
+def row(i: int) -> dict:
+    return {
+        "request_id": f"r{i}",
+        "path": "/v1/search",
+        "q": f"q{i}",
+        "sources": ["github"],
+        "limit": 10,
+        "took_ms": 10,
+        "items_count": 1,
+        "errors_count": 0,
+        "errors": [],
+    }
+
+
+async def count_rows(sessionmaker) -> int:
+    from sqlalchemy import func, select
+
+    from app.db.models import RequestLog
+
+    async with sessionmaker() as session:
+        return await session.scalar(select(func.count()).select_from(RequestLog))
+
+
+@pytest.mark.anyio
+async def test_rows_written_in_batches(db, monkeypatch):
+    monkeypatch.setattr(settings, "log_batch_size", 4)
+    writer = LogWriter()
+    writer.start()
+    for i in range(10):
+        writer.enqueue(row(i))
+    await writer.stop()
+
+    stats = writer.stats()
+    assert (stats["enqueued"], stats["written"], stats["batches"]) == (10, 10, 3)
+    assert stats["running"] is False
+    assert await count_rows(db) == 10
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_new", ["q0", "q1"]), ("drop_oldest", ["q2", "q3"])])
+@pytest.mark.anyio
+async def test_overflow_policy(db, monkeypatch, policy, kept):
+    monkeypatch.setattr(settings, "log_queue_size", 2)
+    monkeypatch.setattr(settings, "log_overflow_policy", policy)
+    writer = LogWriter()
+    writer.start()
+    # фоновая задача ещё не получила управление — очередь заполняется синхронно
+    for i in range(4):
+        writer.enqueue(row(i))
+    assert [r["q"] for r in writer._queue._queue] == kept
+    assert writer.counters.dropped == 2
+    await writer.stop()
+
+
+@pytest.mark.anyio
+async def test_flush_failure_is_counted(db, monkeypatch):
+    async def broken(rows):
+        raise RuntimeError("db is down")
+
+    monkeypatch.setattr(logs_module, "write_search_logs", broken)
+    writer = LogWriter()
+    writer.start()
+    writer.enqueue(row(1))
+    await writer.stop()
+    assert (writer.counters.failed, writer.counters.written) == (1, 0)
+
+
+@pytest.mark.anyio
+async def test_disabled_without_database():
+    writer = LogWriter()
+    writer.start()
+    writer.enqueue(row(1))
+    stats = writer.stats()
+    assert (stats["enqueued"], stats["queued"], stats["running"]) == (0, 0, False)
+
+
+def test_search_request_is_logged(sqlite_url, client, wait_until):
+    client.get("/v1/search", params={"q": "logged", "sources": "github"})
+    assert wait_until(lambda: client.get("/v1/logs").json() != [])
+    logged = client.get("/v1/logs").json()
+    assert [(r["q"], r["sources"], r["cache"]) for r in logged] == [("logged", ["github"], {"github": "miss"})]
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.items import as_utc
+from app.services.logs import write_search_logs
+
+T0 = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def row(ts: datetime, q: str, sources: list[str], errors: list[dict] | None = None, took_ms: int = 100) -> dict:
+    errors = errors or []
+    return {
+        "ts": ts,
+        "request_id": q,
+        "path": "/v1/search",
+        "q": q,
+        "sources": sources,
+        "limit": 10,
+        "took_ms": took_ms,
+        "items_count": 5,
+        "errors_count": len(errors),
+        "errors": errors,
+        "cache": None,
+    }
+
+
+@pytest.fixture
+def logs_client(sqlite_url, client):
+    rows = [
+        row(T0, "a", ["github"]),
+        row(T0 + timedelta(hours=1), "b", ["hackernews"], errors=[{"source": "hackernews", "type": "timeout"}]),
+        row(T0 + timedelta(hours=2), "c", ["github", "rss"]),
+    ]
+    client.portal.call(write_search_logs, rows)
+    return client
+
+
+def qs(response) -> list[str]:
+    return [r["q"] for r in response.json()]
+
+
+def test_as_utc():
+    assert as_utc(datetime(2024, 1, 1, 13, 30)) == datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc)
+    msk = timezone(timedelta(hours=3))
+    assert as_utc(datetime(2024, 1, 1, 13, 30, tzinfo=msk)).hour == 10
+
+
+def test_keyset_pagination(logs_client):
+    first = logs_client.get("/v1/logs", params={"limit": 2})
+    assert qs(first) == ["c", "b"]
+    cursor = first.headers["x-next-cursor"]
+    second = logs_client.get("/v1/logs", params={"limit": 2, "cursor": cursor})
+    assert qs(second) == ["a"]
+    assert "x-next-cursor" not in second.headers
+
+
+@pytest.mark.parametrize(
+    "since, expected",
+    [
+        # 13:30+03:00 — это 10:30 UTC: строки 11:00 и 12:00
+        ("2024-01-01T13:30:00+03:00", ["c", "b"]),
+        ("2024-01-01T10:30:00Z", ["c", "b"]),
+        # без зоны — UTC
+        ("2024-01-01T10:30:00", ["c", "b"]),
+        ("2024-01-01T05:30:00-05:00", ["c", "b"]),
+    ],
+)
+def test_since_with_offset(logs_client, since, expected):
+    assert qs(logs_client.get("/v1/logs", params={"since": since})) == expected
+
+
+def test_until_and_filters(logs_client):
+    assert qs(logs_client.get("/v1/logs", params={"until": "2024-01-01T14:00:00+03:00"})) == ["a"]
+    assert qs(logs_client.get("/v1/logs", params={"source": "github"})) == ["c", "a"]
+    assert qs(logs_client.get("/v1/logs", params={"has_errors": True})) == ["b"]
+
+
+def test_stats_from_rollups(sqlite_url, client):
+    now = datetime.now(timezone.utc)
+    client.portal.call(
+        write_search_logs,
+        [row(now, "x", ["github"], took_ms=40), row(now, "y", ["github"], errors=[{"source": "github"}], took_ms=900)],
+    )
+    stats = client.get("/v1/logs/stats", params={"minutes": 10}).json()
+    assert stats["totals"]["count"] == 2
+    assert stats["totals"]["errors"] == 1
+    assert stats["totals"]["max_ms"] == 900
@@ -0,0 +1,74 @@
+import pytest
+
+import app.core.metrics as metrics_module
+from app.core.metrics import CounterFamily, Histogram, HistogramFamily, bucket_quantile
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake = FakeTime()
+    monkeypatch.setattr(metrics_module, "time", fake)
+    return fake
+
+
+def test_bucket_quantile_interpolates():
+    bounds = (1.0, 2.0, 4.0)
+    assert bucket_quantile(bounds, [0, 0, 0, 0], 0.5) is None
+    # 10 значений в (1, 2]: медиана — середина корзины
+    assert bucket_quantile(bounds, [0, 10, 0, 0], 0.5) == pytest.approx(1.5)
+    assert bucket_quantile(bounds, [5, 5, 0, 0], 0.5) == pytest.approx(1.0)
+    # хвост в +Inf — верхняя конечная граница
+    assert bucket_quantile(bounds, [0, 0, 0, 3], 0.99) == 4.0
+
+
+def test_histogram_window_forgets_old_slots(clock, monkeypatch):
+    monkeypatch.setattr(metrics_module.settings, "metrics_window_seconds", 60)
+    h = Histogram((0.1, 1.0))
+    h.observe(0.05)
+    clock.now += 30
+    h.observe(0.5)
+    assert h.window_counts() == [1, 1, 0]
+    clock.now += 45
+    # первое значение выпало из окна, накопительные счётчики — нет
+    assert h.window_counts() == [0, 1, 0]
+    assert (h.counts, h.count) == ([1, 1, 0], 2)
+    assert h.sum == pytest.approx(0.55)
+
+
+def test_histogram_family_renders_prometheus_text(clock):
+    family = HistogramFamily("t_seconds", "Test latency", ("source",), (0.1, 1.0))
+    family.observe(0.05, "github")
+    family.observe(2.0, "github")
+    lines = list(family.render())
+    assert lines[:2] == ["# HELP t_seconds Test latency", "# TYPE t_seconds histogram"]
+    assert 't_seconds_bucket{source="github",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{source="github",le="1.0"} 1' in lines
+    assert 't_seconds_bucket{source="github",le="+Inf"} 2' in lines
+    assert 't_seconds_count{source="github"} 2' in lines
+    assert any(line.startswith('t_seconds_window{source="github",quantile="0.99"}') for line in lines)
+    assert family.stats()["github"]["count"] == 2
+
+
+def test_counter_family_escapes_labels():
+    family = CounterFamily("t_total", "Test", ("route",))
+    family.inc('a"b')
+    family.inc('a"b', amount=2)
+    assert list(family.render())[-1] == 't_total{route="a\\"b"} 3'
+
+
+def test_metrics_endpoint(client):
+    client.get("/v1/search", params={"q": "metrics", "sources": "github"})
+    r = client.get("/metrics")
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    assert 'apifusion_http_responses_total{method="GET",route="/v1/search",status="200"}' in text
+    assert 'apifusion_source_results_total{source="github",cache="miss",outcome="ok"}' in text
+    assert 'apifusion_source_latency_seconds_count{source="github"}' in text
@@ -0,0 +1,39 @@
+import json
+
+
+def server_timing(response) -> dict[str, float]:
+    out = {}
+    for part in response.headers["server-timing"].split(","):
+        name, _, dur = part.strip().partition(";dur=")
+        out[name] = float(dur)
+    return out
+
+
+def test_request_meta_headers(client):
+    r = client.get("/v1/search", params={"q": "meta", "sources": "github"})
+    assert len(r.headers["x-request-id"]) == 32
+    assert int(r.headers["x-took-ms"]) >= 0
+    assert r.headers["timing-allow-origin"] == "*"
+    stages = server_timing(r)
+    assert {"fetch-github", "parse-github", "merge", "serialize", "total"} <= set(stages)
+    assert stages["total"] >= max(v for k, v in stages.items() if k != "total")
+
+
+def test_request_id_is_propagated(client):
+    r = client.get("/health", headers={"X-Request-Id": "abc123"})
+    assert r.headers["x-request-id"] == "abc123"
+
+
+def test_streaming_response_keeps_meta_headers(client):
+    r = client.get("/v1/search/stream", params={"q": "meta stream", "sources": "github"})
+    assert "x-request-id" in r.headers
+    assert "total" in server_timing(r)
+    # тело стрима не буферизуется и не портится middleware
+    assert json.loads(r.text.splitlines()[-1])["type"] == "done"
+
+
+def test_search_log_gets_request_id(sqlite_url, client, wait_until):
+    r = client.get("/v1/search", params={"q": "request id", "sources": "github"}, headers={"X-Request-Id": "rid-1"})
+    assert r.status_code == 200
+    assert wait_until(lambda: client.get("/v1/logs").json() != [])
+    assert client.get("/v1/logs").json()[0]["request_id"] == "rid-1"
@@ -0,0 +1,102 @@
+import pytest
+
+import app.services.pagination as pagination_module
+from app.core.config import settings
+from app.core.http import http_clients
+from app.models.items import Item
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor, page_cache, search_page
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pages():
+    for cache in page_cache._caches.values():
+        cache.clear()
+
+
+def upstream_requests() -> int:
+    return sum(s["requests"] for s in http_clients.stats().values())
+
+
+def test_cursor_roundtrip_is_bound_to_query():
+    cursor = encode_cursor("Rust  Async", ["hackernews", "github"], 30, {"github": [1, 5]})
+    assert decode_cursor(cursor, "rust async", ["github", "hackernews"]) == (30, {"github": [1, 5]})
+    with pytest.raises(InvalidCursorError, match="different query"):
+        decode_cursor(cursor, "python", ["github", "hackernews"])
+    with pytest.raises(InvalidCursorError, match="different query"):
+        decode_cursor(cursor, "rust async", ["github"])
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64 at all!",
+        "e30",  # {}
+        encode_cursor("q", ["github"], 0, {}),
+        encode_cursor("q", ["github"], 30, {"github": [-1, 0]}),
+    ],
+)
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "q", ["github"])
+
+
+def test_pages_cover_all_items_once(client, upstreams):
+    upstreams.github.items = 45
+    upstreams.hackernews.items = 25
+    params = {"q": "pages", "sources": ["github", "hackernews"], "limit": 20}
+    urls: list[str] = []
+    cursor = None
+    for _ in range(10):
+        body = client.get("/v1/search/page", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        assert body["errors"] == []
+        urls += [i["url"] for i in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(urls) == 70
+    assert len(set(urls)) == 70
+
+
+def test_continuation_reads_partly_consumed_page_from_cache(client, upstreams):
+    upstreams.github.items = 100
+    params = {"q": "continue", "sources": "github", "limit": 10}
+    first = client.get("/v1/search/page", params=params).json()
+    before = upstream_requests()
+    # вторая десятка — из той же страницы upstream'а (30 элементов): наружу не ходим
+    second = client.get("/v1/search/page", params={**params, "cursor": first["next_cursor"]}).json()
+    assert upstream_requests() == before
+    assert second["cache"] == {"github": "hit"}
+    assert not {i["url"] for i in first["items"]} & {i["url"] for i in second["items"]}
+
+
+def test_invalid_cursor_is_400(client):
+    r = client.get("/v1/search/page", params={"q": "x", "sources": "github", "cursor": "garbage"})
+    assert r.status_code == 400
+    other = encode_cursor("other", ["github"], 30, {"github": [0, 10]})
+    assert client.get("/v1/search/page", params={"q": "x", "sources": "github", "cursor": other}).status_code == 400
+
+
+@pytest.mark.anyio
+async def test_same_url_from_two_sources_once_per_page(monkeypatch):
+    monkeypatch.setattr(settings, "rank_recency_weight", 0.0)
+    pages = {
+        "hackernews": [
+            Item("hackernews", "shared", "https://example.com/shared", score=1000),
+            Item("hackernews", "low", "https://example.com/low", score=0),
+        ],
+        "rss": [
+            Item("rss", "shared copy", "https://www.example.com/shared/?utm_source=rss"),
+            Item("rss", "rss only", "https://example.com/rss"),
+        ],
+    }
+
+    async def fetch_page(source, q, page, per_page):
+        return (pages[source] if page == 0 else []), "miss"
+
+    monkeypatch.setattr(pagination_module, "fetch_page", fetch_page)
+    first = await search_page("dup", ["hackernews", "rss"], limit=2)
+    assert [i.title for i in first.items] == ["shared", "rss only"]
+    # копия пропущена, но позиция rss ушла за неё: на следующей странице её нет
+    second = await search_page("dup", ["hackernews", "rss"], limit=2, cursor=first.next_cursor)
+    assert [i.title for i in second.items] == ["low"]
+    assert second.next_cursor is None
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.deadline import Deadline, current_deadline
+from app.services.quota import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    QuotaBucket,
+    QuotaExceededError,
+    QuotaScheduler,
+)
+
+
+def response(status: int = 200, **headers: str) -> httpx.Response:
+    return httpx.Response(status, headers={k.replace("_", "-"): v for k, v in headers.items()})
+
+
+@pytest.mark.anyio
+async def test_waits_for_token_then_sheds(monkeypatch):
+    monkeypatch.setattr(settings, "quota_max_wait_ms", 200)
+    # 600 в минуту = токен каждые 100 мс
+    bucket = QuotaBucket("github", per_minute=600)
+    bucket.tokens = 0.0
+    await bucket.acquire(PRIORITY_INTERACTIVE)
+    assert bucket.counters.waited == 1
+
+    bucket.tokens = 0.0
+    bucket.server_remaining, bucket.server_reset_at = 0, time.time() + 60
+    with pytest.raises(QuotaExceededError) as e:
+        await bucket.acquire(PRIORITY_INTERACTIVE)
+    assert e.value.retry_in_s > 50
+    assert bucket.counters.shed == 1
+
+
+@pytest.mark.anyio
+async def test_background_calls_are_shed_first():
+    bucket = QuotaBucket("github", per_minute=60)
+    bucket.tokens = 0.0
+    with pytest.raises(QuotaExceededError):
+        await bucket.acquire(PRIORITY_BACKGROUND)
+
+
+@pytest.mark.anyio
+async def test_deadline_limits_wait(monkeypatch):
+    monkeypatch.setattr(settings, "quota_max_wait_ms", 5000)
+    bucket = QuotaBucket("github", per_minute=60)
+    bucket.tokens = 0.0
+    token = current_deadline.set(Deadline.after_ms(100))
+    try:
+        # токен будет через секунду, а у запроса осталось 100 мс
+        with pytest.raises(QuotaExceededError):
+            await bucket.acquire(PRIORITY_INTERACTIVE)
+    finally:
+        current_deadline.reset(token)
+
+
+@pytest.mark.anyio
+async def test_waiters_served_in_arrival_order(monkeypatch):
+    monkeypatch.setattr(settings, "quota_max_wait_ms", 2000)
+    bucket = QuotaBucket("github", per_minute=1200)
+    bucket.tokens = 0.0
+    order = []
+
+    async def take(name: str):
+        await bucket.acquire(PRIORITY_INTERACTIVE)
+        order.append(name)
+
+    await asyncio.gather(take("first"), take("second"), take("third"))
+    assert order == ["first", "second", "third"]
+    assert bucket.counters.waited == 3
+
+
+def test_learns_limit_from_headers():
+    bucket = QuotaBucket("github", per_minute=10)
+    reset = time.time() + 30
+    bucket.observe(response(x_ratelimit_limit="30", x_ratelimit_remaining="0", x_ratelimit_reset=str(reset)))
+    snap = bucket.snapshot()
+    assert (snap["limit"], snap["remaining"], snap["learned"]) == (30, 0, True)
+    assert bucket.low()
+    assert not bucket.try_acquire()
+
+
+def test_ignores_other_github_resource():
+    bucket = QuotaBucket("github", per_minute=10)
+    bucket.observe(response(x_ratelimit_resource="core", x_ratelimit_limit="5000", x_ratelimit_remaining="4999"))
+    assert bucket.snapshot()["learned"] is False
+
+
+def test_retry_after_blocks_until_reset():
+    bucket = QuotaBucket("github", per_minute=10)
+    bucket.observe(response(403, retry_after="120"))
+    assert bucket.retry_in() > 100
+    assert not bucket.try_acquire()
+
+
+def test_scheduler_without_quota_is_unlimited(monkeypatch):
+    scheduler = QuotaScheduler()
+    monkeypatch.setattr(settings, "quota_github_per_minute", 30.0)
+    assert scheduler.snapshot("github")["limit"] == 30
+    monkeypatch.setattr(settings, "quota_enabled", False)
+    assert scheduler.bucket("github") is None
+    assert scheduler.try_acquire("github")
+    assert not scheduler.low("github")
+
+
+def test_search_falls_back_to_expired_cache_without_quota(client, monkeypatch):
+    monkeypatch.setattr(settings, "quota_github_per_minute", 1.0)
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", 0.0)
+    monkeypatch.setattr(settings, "cache_stale_seconds", 0.0)
+    first = client.get("/v1/search", params={"q": "quota", "sources": "github"}).json()
+    assert first["cache"] == {"github": "miss"}
+
+    # единственный токен минуты потрачен: отдаём просроченный ответ вместо очереди
+    again = client.get("/v1/search", params={"q": "quota", "sources": "github"}).json()
+    assert again["cache"] == {"github": "stale"}
+    assert again["items"] == first["items"]
+
+    other = client.get("/v1/search", params={"q": "other", "sources": "github"}).json()
+    assert [e["type"] for e in other["errors"]] == ["rate_limited"]
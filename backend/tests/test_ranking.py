@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.items import Item
+from app.services.ranking import Ranker, RankingStage, canonical_url
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("https://www.example.com/post/", "http://example.com/post"),
+        ("https://example.com:443/post#comments", "https://example.com/post"),
+        ("https://example.com/p?utm_source=x&id=1&ref=hn", "https://example.com/p?id=1"),
+        ("https://example.com/p?b=2&a=1", "https://example.com/p?a=1&b=2"),
+        ("https://Example.COM/Path", "https://example.com/Path"),
+    ],
+)
+def test_canonical_url_same_document(a, b):
+    assert canonical_url(a) == canonical_url(b)
+
+
+def test_canonical_url_keeps_distinct_documents():
+    assert canonical_url("https://example.com/a") != canonical_url("https://example.com/b")
+    assert canonical_url("https://example.com/p?id=1") != canonical_url("https://example.com/p?id=2")
+    # регистр пути значим
+    assert canonical_url("https://example.com/A") != canonical_url("https://example.com/a")
+
+
+def test_scores_are_comparable_across_sources(monkeypatch):
+    monkeypatch.setattr(settings, "rank_recency_weight", 0.0)
+    ranker = Ranker(now=NOW.timestamp())
+    assert ranker.score(Item("rss", "t", "https://a.example")) == settings.rank_unscored
+    assert ranker.score(Item("github", "t", "https://a.example", score=0)) == 0.0
+    # очень популярный элемент упирается в 1, а не уходит в бесконечность
+    assert ranker.score(Item("github", "t", "https://a.example", score=10**9)) == 1.0
+    low = ranker.score(Item("hackernews", "t", "https://a.example", score=5))
+    high = ranker.score(Item("hackernews", "t", "https://a.example", score=500))
+    assert 0 < low < high < 1
+
+
+def test_recency_half_life(monkeypatch):
+    monkeypatch.setattr(settings, "rank_recency_weight", 1.0)
+    monkeypatch.setattr(settings, "rank_half_life_hours", 10.0)
+    ranker = Ranker(now=NOW.timestamp())
+    fresh = Item("rss", "t", "https://a.example", timestamp=NOW)
+    old = Item("rss", "t", "https://a.example", timestamp=NOW - timedelta(hours=10))
+    assert ranker.score(fresh) == 1.0
+    assert ranker.score(old) == pytest.approx(0.5)
+
+
+def test_rank_keeps_best_copy_and_limit(monkeypatch):
+    monkeypatch.setattr(settings, "rank_recency_weight", 0.0)
+    stage = RankingStage()
+    items = [
+        Item("hackernews", "copy low", "https://example.com/x?utm_source=hn", score=1),
+        Item("github", "other", "https://example.com/y", score=5000),
+        Item("hackernews", "copy high", "https://www.example.com/x", score=900),
+        Item("rss", "third", "https://example.com/z"),
+    ]
+    top = stage.rank(items, limit=2)
+    assert [i.title for i in top] == ["copy high", "other"]
+    # до дедупликации дошли только извлечённые кандидаты
+    assert stage.counters.candidates == 4
+    assert stage.counters.canonicalized == 2
+    assert [i.title for i in stage.rank(items, limit=10)] == ["copy high", "other", "third"]
+    assert stage.counters.duplicates == 1
+
+
+def test_rank_ties_keep_input_order(monkeypatch):
+    monkeypatch.setattr(settings, "rank_recency_weight", 0.0)
+    items = [Item("rss", f"t{i}", f"https://example.com/{i}") for i in range(5)]
+    assert [i.title for i in RankingStage().rank(items, limit=5)] == ["t0", "t1", "t2", "t3", "t4"]
+
+
+def test_search_returns_deduplicated_top_k(client):
+    body = client.get("/v1/search", params={"q": "rank", "sources": ["github", "hackernews", "rss"], "limit": 15}).json()
+    urls = [canonical_url(i["url"]) for i in body["items"]]
+    assert len(urls) == 15
+    assert len(set(urls)) == 15
@@ -0,0 +1,143 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import app.core.ratelimit as ratelimit_module
+from app.core.config import settings
+from app.core.ratelimit import LocalSharedStore, MemoryBackend, RateLimitMiddleware, SharedBackend, forwarded_client
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeTime:
+    fake = FakeTime()
+    monkeypatch.setattr(ratelimit_module, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def limited(monkeypatch) -> TestClient:
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_per_minute", 60.0)
+    monkeypatch.setattr(settings, "rate_limit_burst", 2.0)
+    monkeypatch.setattr(settings, "rate_limit_trust_forwarded", True)
+    monkeypatch.setattr(settings, "rate_limit_trusted_hops", 1)
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    inner = Starlette(routes=[Route("/v1/ping", ok)])
+    return TestClient(RateLimitMiddleware(inner, backend=MemoryBackend()))
+
+
+@pytest.mark.parametrize(
+    "header, hops, expected",
+    [
+        ("1.1.1.1", 1, "1.1.1.1"),
+        # клиент подделал начало заголовка, наш прокси дописал реальный адрес
+        ("6.6.6.6, 2.2.2.2", 1, "2.2.2.2"),
+        ("6.6.6.6, 2.2.2.2, 10.0.0.1", 2, "2.2.2.2"),
+        # записей меньше, чем своих прокси — заголовку не верим
+        ("2.2.2.2", 2, None),
+        ("", 1, None),
+        (None, 1, None),
+    ],
+)
+def test_forwarded_client(header, hops, expected):
+    assert forwarded_client(header, hops) == expected
+
+
+@pytest.mark.anyio
+async def test_memory_backend_bucket(clock):
+    backend = MemoryBackend(shards=1)
+    assert (await backend.hit("k", rate=1.0, burst=2)).allowed
+    assert (await backend.hit("k", rate=1.0, burst=2)).allowed
+    denied = await backend.hit("k", rate=1.0, burst=2)
+    assert not denied.allowed
+    assert denied.retry_after_s == pytest.approx(1.0)
+    clock.now += 1
+    assert (await backend.hit("k", rate=1.0, burst=2)).allowed
+
+
+@pytest.mark.anyio
+async def test_full_shard_evicts_least_recently_used(clock):
+    backend = MemoryBackend(shards=1, max_keys=2)
+    await backend.hit("a", rate=1.0, burst=10)
+    await backend.hit("b", rate=1.0, burst=10)
+    clock.now += 1
+    # «a» обновлён позже «b» — при переполнении уходит «b», хотя оба ещё активны
+    await backend.hit("a", rate=1.0, burst=10)
+    await backend.hit("c", rate=1.0, burst=10)
+    assert list(backend._shards[0]) == ["a", "c"]
+
+
+@pytest.mark.anyio
+async def test_sweep_drops_idle_keys_from_the_front(clock):
+    backend = MemoryBackend(shards=1, max_keys=3)
+    for key in ("a", "b", "c"):
+        await backend.hit(key, rate=1.0, burst=2)
+        clock.now += 1
+    # «a» и «b» простаивают дольше burst/rate, «c» — нет
+    clock.now += 0.5
+    await backend.hit("d", rate=1.0, burst=2)
+    assert list(backend._shards[0]) == ["c", "d"]
+
+
+@pytest.mark.anyio
+async def test_shared_backend_fails_open():
+    class BrokenStore:
+        async def take(self, key, rate, burst, cost):
+            raise ConnectionError("redis down")
+
+    backend = SharedBackend(BrokenStore())
+    assert (await backend.hit("k", rate=1.0, burst=5)).allowed
+    assert backend.errors == 1
+
+    shared = SharedBackend(LocalSharedStore())
+    assert (await shared.hit("k", rate=1.0, burst=1)).allowed
+    assert not (await shared.hit("k", rate=1.0, burst=1)).allowed
+
+
+def test_middleware_limits_by_trusted_hop(limited):
+    spoofed = [{"x-forwarded-for": f"6.6.6.{i}, 2.2.2.2"} for i in range(3)]
+    first = limited.get("/v1/ping", headers=spoofed[0])
+    assert first.headers["x-ratelimit-limit"] == "60"
+    assert limited.get("/v1/ping", headers=spoofed[1]).status_code == 200
+    # подмена первого адреса не даёт нового bucket'а
+    blocked = limited.get("/v1/ping", headers=spoofed[2])
+    assert blocked.status_code == 429
+    assert blocked.headers["retry-after"] == "1"
+    assert limited.get("/v1/ping", headers={"x-forwarded-for": "3.3.3.3"}).status_code == 200
+
+
+def test_middleware_api_key_and_other_paths(limited, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_api_key_per_minute", 600.0)
+    monkeypatch.setattr(settings, "rate_limit_api_keys_csv", "secret, other")
+    r = limited.get("/v1/ping", headers={"x-api-key": "secret"})
+    assert r.headers["x-ratelimit-limit"] == "600"
+    monkeypatch.setattr(settings, "rate_limit_path_prefix", "/v2")
+    assert "x-ratelimit-limit" not in limited.get("/v1/ping").headers
+
+
+def test_unknown_api_keys_share_the_ip_bucket(limited, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_api_key_per_minute", 600.0)
+    monkeypatch.setattr(settings, "rate_limit_api_keys_csv", "secret")
+    ip = {"x-forwarded-for": "4.4.4.4"}
+    statuses = [limited.get("/v1/ping", headers={**ip, "x-api-key": f"random-{i}"}).status_code for i in range(5)]
+    assert statuses == [200, 200, 429, 429, 429]
+    # выданный ключ считается отдельно от IP
+    r = limited.get("/v1/ping", headers={**ip, "x-api-key": "secret"})
+    assert r.status_code == 200
+    assert r.headers["x-ratelimit-limit"] == "600"
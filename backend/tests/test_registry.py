@@ -0,0 +1,70 @@
+import pytest
+
+from app.connectors.registry import BUILTIN_CONNECTORS, ConnectorRegistry, ConnectorSpec, discover_connectors
+from app.core.config import settings
+
+# подключается через connectors_extra_csv="test_registry:EXTRA"
+EXTRA = ConnectorSpec(name="extra", search="app.connectors.rss:search_rss", cache_ttl_s=5.0, default=True)
+NOT_A_SPEC = object()
+
+
+@pytest.fixture(autouse=True)
+def _no_entry_points(monkeypatch):
+    monkeypatch.setattr(settings, "connectors_entry_points", False)
+
+
+def test_builtin_connectors():
+    specs = discover_connectors()
+    assert [s.name for s in specs] == ["github", "hackernews", "rss"]
+    registry = ConnectorRegistry(specs)
+    assert registry.default_sources() == ["github", "hackernews"]
+    assert registry.pageable("rss")
+    assert not registry.pageable("missing")
+    assert registry.probed() == ["github", "hackernews", "rss"]
+
+
+def test_extra_connector_and_enabled_list(monkeypatch):
+    monkeypatch.setattr(settings, "connectors_extra_csv", "test_registry:EXTRA")
+    assert [s.name for s in discover_connectors()][-1] == "extra"
+
+    monkeypatch.setattr(settings, "connectors_enabled_csv", "extra, github")
+    assert [s.name for s in discover_connectors()] == ["extra", "github"]
+
+    monkeypatch.setattr(settings, "connectors_enabled_csv", "github,nope")
+    with pytest.raises(ValueError, match="nope"):
+        discover_connectors()
+
+
+def test_extra_must_be_spec(monkeypatch):
+    monkeypatch.setattr(settings, "connectors_extra_csv", "test_registry:NOT_A_SPEC")
+    with pytest.raises(TypeError, match="expected ConnectorSpec"):
+        discover_connectors()
+
+
+def test_code_is_imported_lazily():
+    registry = ConnectorRegistry(list(BUILTIN_CONNECTORS))
+    assert registry.stats()["github"]["import_ms"] == {}
+    fn = registry.search_fn("github")
+    assert fn.__name__ == "search_github"
+    assert registry.search_fn("github") is fn
+    assert set(registry.stats()["github"]["import_ms"]) == {"search"}
+    with pytest.raises(KeyError):
+        ConnectorRegistry([EXTRA]).page_fn("extra")
+
+
+def test_policies_from_spec_overridden_by_env(monkeypatch):
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", None)
+    assert settings.cache_ttl_for("github") == 300.0
+    monkeypatch.setattr(settings, "cache_ttl_github_seconds", 7.0)
+    assert settings.cache_ttl_for("github") == 7.0
+    # у RSS квоты нет — без ограничения
+    assert settings.quota_per_minute_for("rss") is None
+
+
+def test_empty_registry_rejected():
+    with pytest.raises(ValueError):
+        ConnectorRegistry([])
+
+
+def test_unknown_source_is_422(client):
+    assert client.get("/v1/search", params={"q": "x", "sources": "nope"}).status_code == 422
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.http import http_clients
+from app.models.items import Item
+from app.services.rss_index import RssIndex, RssIngester
+
+NOW = datetime.now(timezone.utc)
+
+
+def entry(n: int, title: str, snippet: str | None = None, age_h: float = 0) -> Item:
+    return Item("rss", title, f"https://rss.example/{n}", snippet, None, NOW - timedelta(hours=age_h))
+
+
+@pytest.fixture
+def index() -> RssIndex:
+    idx = RssIndex()
+    idx.add(entry(1, "Python 3.13 released", "faster CPython interpreter", age_h=1))
+    idx.add(entry(2, "Rust async book", "async/await in depth", age_h=2))
+    idx.add(entry(3, "Why C++ templates", None, age_h=3))
+    return idx
+
+
+def titles(items: list[Item]) -> list[str]:
+    return [i.title for i in items]
+
+
+@pytest.mark.parametrize("q", ["python", "PYTH", "ython", "ho", "on 3.1", "cpython inter"])
+def test_substring_semantics(index, q):
+    # как при линейном проходе по фиду: q — подстрока заголовка или описания, в том числе часть слова
+    assert titles(index.search(q, 10)) == ["Python 3.13 released"]
+
+
+def test_query_spanning_words_and_punctuation(index):
+    assert titles(index.search("c/awaits", 10)) == []
+    assert titles(index.search("c/awa", 10)) == ["Rust async book"]
+    assert titles(index.search("++", 10)) == ["Why C++ templates"]
+
+
+def test_no_match(index):
+    assert index.search("golang", 10) == []
+    assert index.search("python rust", 10) == []
+
+
+def test_newest_first_with_offset(index):
+    assert titles(index.search("y", 10)) == ["Python 3.13 released", "Rust async book", "Why C++ templates"]
+    assert titles(index.search("y", 1, offset=1)) == ["Rust async book"]
+
+
+def test_updated_and_pruned_entries_leave_index(index):
+    index.add(entry(1, "Go 1.23 released", age_h=1))
+    assert index.search("pyth", 10) == []
+    assert titles(index.search("go 1", 10)) == ["Go 1.23 released"]
+
+    assert index.prune(max_age=timedelta(hours=2.5), max_entries=10) == 1
+    assert index.search("templ", 10) == []
+    assert index.stats()["entries"] == 2
+    # токены и триграммы удалённых записей не остаются в словаре
+    assert "templates" not in index._postings
+    assert all("templates" not in tokens for tokens in index._trigrams.values())
+
+
+def test_search_rss_through_api(client):
+    body = client.get("/v1/search", params={"q": "ytho", "sources": "rss"}).json()
+    assert body["errors"] == []
+    assert body["items"]
+    assert all("ytho" in (i["title"] + (i["snippet"] or "")).lower() for i in body["items"])
+
+
+@pytest.mark.anyio
+async def test_validators_saved_only_after_ingest(upstreams, monkeypatch):
+    ingester = RssIngester(RssIndex())
+    feed = settings.rss_feeds[0]
+
+    async def broken(body: str) -> None:
+        raise RuntimeError("parse failed")
+
+    monkeypatch.setattr(ingester, "_ingest", broken)
+    try:
+        with pytest.raises(RuntimeError):
+            await ingester.refresh_feed(feed)
+        # без ETag следующий запрос — полный, а не 304 по неразобранному фиду
+        assert ingester._feeds[feed].etag is None
+
+        monkeypatch.undo()
+        await ingester.refresh_feed(feed)
+    finally:
+        await http_clients.stop()
+    assert ingester._feeds[feed].etag is not None
+    assert len(ingester.index) > 0
+
+
+def test_stop_resets_readiness(upstreams):
+    from app.main import app
+    from app.services.rss_index import rss_ingester
+
+    with TestClient(app) as c:
+        assert c.get("/v1/search", params={"q": "pyth", "sources": "rss"}).json()["items"]
+    # следующий старт в том же процессе снова ждёт первый прогон, а не отвечает пустым индексом
+    assert not rss_ingester._ready.is_set()
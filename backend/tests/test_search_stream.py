@@ -0,0 +1,40 @@
+import json
+
+
+def frames(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_sources_stream_in_completion_order(client, upstreams):
+    upstreams.github.latency_ms = 300
+    upstreams.hackernews.latency_ms = 0
+    r = client.get("/v1/search/stream", params={"q": "stream order", "sources": ["github", "hackernews"], "limit": 3})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = frames(r)
+    assert [(f["type"], f.get("source")) for f in lines] == [
+        ("source", "hackernews"),
+        ("source", "github"),
+        ("done", None),
+    ]
+    assert all(len(f["items"]) <= 3 for f in lines)
+
+
+def test_done_frame_matches_plain_search(client):
+    params = {"q": "same result", "sources": ["github", "hackernews"], "limit": 5}
+    done = frames(client.get("/v1/search/stream", params=params))[-1]
+    plain = client.get("/v1/search", params=params).json()
+    assert done["type"] == "done"
+    assert [i["url"] for i in done["items"]] == [i["url"] for i in plain["items"]]
+    assert done["errors"] == plain["errors"] == []
+
+
+def test_slow_source_reported_as_deadline_frame(client, upstreams):
+    upstreams.hackernews.latency_ms = 2000
+    r = client.get("/v1/search/stream", params={"q": "slow", "sources": ["github", "hackernews"], "budget_ms": 300})
+    lines = frames(r)
+    by_source = {f["source"]: f for f in lines if f["type"] == "source"}
+    assert by_source["github"]["error"] is None
+    assert by_source["hackernews"]["items"] == []
+    assert by_source["hackernews"]["error"]["type"] == "deadline_exceeded"
+    assert lines[-1]["type"] == "done"
+    assert lines[-1]["took_ms"] < 1500
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.aggregator import connector_flight
+from app.services.singleflight import SingleFlight
+
+
+def slow_call(result: str = "r", delay_s: float = 0.05):
+    calls = []
+
+    async def fn() -> str:
+        calls.append(1)
+        await asyncio.sleep(delay_s)
+        return result
+
+    return fn, calls
+
+
+@pytest.mark.anyio
+async def test_identical_calls_share_one_upstream():
+    flight = SingleFlight()
+    fn, calls = slow_call()
+    results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+    assert results == ["r"] * 5
+    assert len(calls) == 1
+    stats = flight.stats()
+    assert (stats["calls"], stats["upstream"], stats["collapsed"], stats["in_flight"]) == (5, 1, 4, 0)
+
+
+@pytest.mark.anyio
+async def test_different_keys_and_later_calls_are_separate():
+    flight = SingleFlight()
+    fn, calls = slow_call()
+    await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+    # завершённый вызов не кэшируется: следующий идёт заново
+    await flight.do("a", fn)
+    assert len(calls) == 3
+
+
+@pytest.mark.anyio
+async def test_error_is_shared_by_all_waiters():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(flight.do("k", boom), flight.do("k", boom), return_exceptions=True)
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert flight.stats()["upstream"] == 1
+
+
+@pytest.mark.anyio
+async def test_one_waiter_leaving_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    fn, calls = slow_call(delay_s=0.1)
+    leaving = asyncio.ensure_future(flight.do("k", fn))
+    staying = asyncio.ensure_future(flight.do("k", fn))
+    await asyncio.sleep(0.01)
+    leaving.cancel()
+    assert await staying == "r"
+    assert flight.stats()["cancelled"] == 0
+
+
+@pytest.mark.anyio
+async def test_upstream_cancelled_when_all_waiters_leave():
+    flight = SingleFlight()
+    started, finished = asyncio.Event(), []
+
+    async def fn():
+        started.set()
+        await asyncio.sleep(1.0)
+        finished.append(1)
+
+    waiter = asyncio.ensure_future(flight.do("k", fn))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.sleep(0.01)
+    stats = flight.stats()
+    assert (stats["cancelled"], stats["in_flight"]) == (1, 0)
+    assert finished == []
+
+
+def test_concurrent_searches_collapse_into_one_upstream_call(client, upstreams):
+    upstreams.github.latency_ms = 100
+    before = connector_flight.stats()
+
+    async def burst():
+        transport = httpx.ASGITransport(client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            params = {"q": "flight", "sources": "github"}
+            return await asyncio.gather(*(c.get("/v1/search", params=params) for _ in range(4)))
+
+    responses = client.portal.call(burst)
+    assert {r.status_code for r in responses} == {200}
+    assert len({tuple(i["url"] for i in r.json()["items"]) for r in responses}) == 1
+    # счётчики пула тут не годятся: фоновая проба монитора ходит в тот же пул
+    after = connector_flight.stats()
+    assert after["upstream"] - before["upstream"] == 1
+    assert after["collapsed"] - before["collapsed"] == 3
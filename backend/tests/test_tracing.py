@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from app.core.config import settings
+from app.core.profiler import ProfileResult, ProfilerBusyError, SamplingProfiler
+from app.core.tracing import Tracer, parse_traceparent, tracer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_traces():
+    tracer.recent.clear()
+
+
+@pytest.fixture
+def admin(monkeypatch) -> dict[str, str]:
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    return {"X-Admin-Token": "secret"}
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (f"00-{TRACE_ID}-{PARENT_ID}-01", (TRACE_ID, PARENT_ID, True)),
+        (f"00-{TRACE_ID}-{PARENT_ID}-00", (TRACE_ID, PARENT_ID, False)),
+        (None, None),
+        ("garbage", None),
+        (f"00-{'0' * 32}-{PARENT_ID}-01", None),
+        (f"00-{TRACE_ID}-{PARENT_ID}-zz", None),
+    ],
+)
+def test_parse_traceparent(value, expected):
+    assert parse_traceparent(value) == expected
+
+
+def test_tail_keeps_slow_and_error_traces(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "tracing_slow_ms", 10_000)
+    t = Tracer()
+    with t.trace("fast"):
+        with t.span("child"):
+            pass
+    assert t.counters.discarded == 1
+
+    with pytest.raises(ValueError):
+        with t.trace("failing"):
+            with t.span("child"):
+                raise ValueError
+    assert t.recent[-1]["kept"] == "error"
+    assert [s["error"] for s in t.recent[-1]["spans"]] == ["ValueError", "ValueError"]
+
+    monkeypatch.setattr(settings, "tracing_slow_ms", 0)
+    with t.trace("slow"):
+        pass
+    assert t.recent[-1]["kept"] == "slow"
+
+
+def test_span_tree_and_limit(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_max_spans", 3)
+    t = Tracer()
+    with t.trace("root", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01"):
+        with t.span("outer"):
+            with t.span("inner"):
+                pass
+            t.add_span("extra", time.perf_counter(), time.perf_counter())
+    data = t.recent[-1]
+    assert data["trace_id"] == TRACE_ID
+    assert data["kept"] == "head"
+    root, outer, inner = data["spans"]
+    assert root["parent_id"] == PARENT_ID
+    assert outer["parent_id"] == root["span_id"]
+    assert inner["parent_id"] == outer["span_id"]
+    assert data["dropped_spans"] == 1
+    # вне трассы спаны ничего не стоят и никуда не пишутся
+    with t.span("orphan") as span:
+        assert span is None
+
+
+def test_disabled_tracing(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_enabled", False)
+    t = Tracer()
+    with t.trace("root") as root:
+        assert root is None
+    assert t.counters.traces == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fmt", ["jsonl", "otlp_json"])
+async def test_export_to_file(tmp_path, monkeypatch, fmt):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "tracing_export", fmt)
+    monkeypatch.setattr(settings, "tracing_export_path", str(path))
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1.0)
+    t = Tracer()
+    t.start()
+    with t.trace("GET /x", **{"http.method": "GET"}):
+        with t.span("child", n=1):
+            pass
+    await t.stop()
+
+    assert t.counters.exported == 1
+    line = json.loads(path.read_text())
+    if fmt == "jsonl":
+        assert [s["name"] for s in line["spans"]] == ["GET /x", "child"]
+    else:
+        spans = line["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert [(s["name"], s["kind"]) for s in spans] == [("GET /x", 2), ("child", 1)]
+        assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+        assert spans[1]["attributes"] == [{"key": "n", "value": {"intValue": "1"}}]
+
+
+def test_request_trace_via_admin(client, admin):
+    r = client.get(
+        "/v1/search",
+        params={"q": "traced", "sources": "github"},
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+    assert r.headers["X-Trace-Id"] == TRACE_ID
+
+    listed = client.get("/admin/traces", params={"kept": "head"}, headers=admin).json()
+    assert [t["trace_id"] for t in listed] == [TRACE_ID]
+    data = client.get(f"/admin/traces/{TRACE_ID}", headers=admin).json()
+    assert data["name"] == "GET /v1/search"
+    names = {s["name"] for s in data["spans"]}
+    assert {"aggregate", "connector"} <= names
+    assert client.get(f"/admin/traces/{'1' * 32}", headers=admin).status_code == 404
+
+
+def test_admin_requires_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.get("/admin/traces").status_code == 404
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/admin/traces").status_code == 403
+    assert client.get("/admin/traces", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def busy_target() -> None:
+    deadline = time.monotonic() + 0.3
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+def test_profiler_samples_target_thread():
+    profiler = SamplingProfiler()
+    worker = threading.Thread(target=busy_target)
+    worker.start()
+    try:
+        result = profiler.run(worker.ident, 0.1, 0.005)
+    finally:
+        worker.join()
+    assert result.samples > 0
+    # стеки снимаются от корня потока: busy_target есть в каждом
+    top = {row["function"].split(" ")[0]: row for row in result.top(50)}
+    assert top["busy_target"]["total"] == result.samples
+    assert profiler.counters.profiles == 1
+
+
+def test_profiler_rejects_concurrent_run():
+    profiler = SamplingProfiler()
+    profiler._lock.acquire()
+    try:
+        with pytest.raises(ProfilerBusyError):
+            profiler.run(threading.get_ident(), 0.01, 0.005)
+    finally:
+        profiler._lock.release()
+    assert profiler.counters.rejected == 1
+
+
+def test_profile_result_top_counts_recursion_once():
+    result = ProfileResult(1.0, 5.0, 4, Counter({"main;f;f": 3, "main;g": 1}))
+    top = {row["function"]: row for row in result.top()}
+    assert (top["f"]["self"], top["f"]["total"], top["f"]["self_pct"]) == (3, 3, 75.0)
+    assert result.collapsed() == "main;f;f 3\nmain;g 1\n"
+
+
+def test_profile_endpoint(client, admin, monkeypatch):
+    monkeypatch.setattr(settings, "profile_max_seconds", 1.0)
+    assert client.post("/admin/profile", params={"seconds": 5}, headers=admin).status_code == 422
+    body = client.post("/admin/profile", params={"seconds": 0.05, "interval_ms": 5}, headers=admin).json()
+    assert body["samples"] > 0
+    assert body["top"]
+    text = client.post("/admin/profile", params={"seconds": 0.05, "format": "collapsed"}, headers=admin).text
+    assert text.strip()
@@ -22,15 +22,50 @@ export type SearchResponse = {
   sources: string[];
   items: SearchItem[];
   errors: SearchError[];
+  cache?: Record<string, "hit" | "stale" | "miss">;
   took_ms?: number | null;
 };
 
+export type SearchSourceFrame = {
+  type: "source";
+  source: string;
+  items: SearchItem[];
+  error: SearchError | null;
+  cache: string;
+};
+
+export type SearchDoneFrame = SearchResponse & { type: "done" };
+
+export type SearchStreamFrame = SearchSourceFrame | SearchDoneFrame;
+
+export type CircuitStatus = {
+  state: "closed" | "open" | "half_open";
+  consecutive_failures: number;
+  retry_in_s: number | null;
+  last_failure: string | null;
+};
+
+export type QuotaStatus = {
+  limit: number;
+  remaining: number;
+  reset_in_s: number | null;
+  learned: boolean;
+  queued: number;
+};
+
 export type SourceStatus = {
   source: string;
-  ok: boolean;
-  last_checked_at: string;
-  latency_ms: number;
+  ok: boolean | null; // null — ещё не проверялся
+  last_checked_at: string | null;
+  latency_ms: number | null;
   error: string | null;
+  check?: "probe" | "passive" | null;
+  uptime?: number | null;
+  latency_p50_ms?: number | null;
+  latency_p95_ms?: number | null;
+  checks?: number;
+  circuit?: CircuitStatus | null;
+  quota?: QuotaStatus | null;
 };
 
 export type LogRow = {
@@ -42,6 +77,39 @@ export type LogRow = {
   took_ms: number | null;
   items_count: number;
   errors_count: number;
+  cache?: Record<string, string> | null;
+  // только у POST /v1/search/batch: по строке на подзапрос
+  details?: Array<{
+    q: string;
+    sources: string[];
+    limit: number;
+    took_ms: number;
+    items_count: number;
+    errors_count: number;
+    cache: Record<string, string>;
+    same_as: number | null;
+  }> | null;
+};
+
+export type LogStatsSummary = {
+  count: number;
+  errors: number;
+  error_rate: number;
+  avg_items?: number | null;
+  avg_ms?: number | null;
+  max_ms?: number | null;
+  p50_ms?: number | null;
+  p95_ms?: number | null;
+  p99_ms?: number | null;
+};
+
+export type LogStatsResponse = {
+  granularity: "minute" | "hour";
+  since: string;
+  source: string;
+  totals: LogStatsSummary;
+  by_source: Record<string, LogStatsSummary>;
+  buckets: (LogStatsSummary & { ts: string })[];
 };
 
 export async function apiGet<T>(path: string, signal?: AbortSignal): Promise<{ data: T; headers: Headers }> {
@@ -61,8 +129,22 @@ export async function getSources(signal?: AbortSignal): Promise<SourceStatus[]>
   return data;
 }
 
-export async function getLogs(limit = 50, signal?: AbortSignal): Promise<LogRow[]> {
-  const { data } = await apiGet<LogRow[]>(`/v1/logs?limit=${limit}`, signal);
+// следующая страница — по курсору из заголовка X-Next-Cursor (null — страниц больше нет)
+export async function getLogs(
+  limit = 50,
+  cursor?: string | null,
+  signal?: AbortSignal
+): Promise<{ rows: LogRow[]; nextCursor: string | null }> {
+  const params = new URLSearchParams();
+  params.set("limit", String(limit));
+  if (cursor) params.set("cursor", cursor);
+
+  const { data, headers } = await apiGet<LogRow[]>(`/v1/logs?${params.toString()}`, signal);
+  return { rows: data, nextCursor: headers.get("X-Next-Cursor") };
+}
+
+export async function getLogStats(minutes = 60, signal?: AbortSignal): Promise<LogStatsResponse> {
+  const { data } = await apiGet<LogStatsResponse>(`/v1/logs/stats?minutes=${minutes}`, signal);
   return data;
 }
 
@@ -78,4 +160,40 @@ export async function search(
   sources.forEach((s) => params.append("sources", s));
 
   return apiGet<SearchResponse>(`/v1/search?${params.toString()}`, signal);
-}
\ No newline at end of file
+}
+
+// NDJSON-стрим: onFrame вызывается на каждый источник по мере готовности, последним — "done"
+export async function searchStream(
+  q: string,
+  sources: SourceName[],
+  limit: number,
+  onFrame: (frame: SearchStreamFrame) => void,
+  signal?: AbortSignal
+): Promise<void> {
+  const params = new URLSearchParams();
+  params.set("q", q);
+  params.set("limit", String(limit));
+  sources.forEach((s) => params.append("sources", s));
+
+  const res = await fetch(`${API_URL}/v1/search/stream?${params.toString()}`, { signal });
+  if (!res.ok || !res.body) {
+    const txt = await res.text().catch(() => "");
+    throw new Error(`HTTP ${res.status}: ${txt || res.statusText}`);
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buf = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += value;
+
+    let nl: number;
+    while ((nl = buf.indexOf("\n")) >= 0) {
+      const line = buf.slice(0, nl).trim();
+      buf = buf.slice(nl + 1);
+      if (line) onFrame(JSON.parse(line) as SearchStreamFrame);
+    }
+  }
+  if (buf.trim()) onFrame(JSON.parse(buf) as SearchStreamFrame);
+}
@@ -1,11 +1,14 @@
 import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
-import { apiGet } from "../lib/api";
-import type { LogRow } from "../lib/api";
+import { getLogs, getLogStats } from "../lib/api";
+import type { LogRow, LogStatsSummary } from "../lib/api";
 
 export default function LogsPage() {
   const [rows, setRows] = useState<LogRow[] | null>(null);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [stats, setStats] = useState<LogStatsSummary | null>(null);
 
   useEffect(() => {
     let cancelled = false;
@@ -13,8 +16,11 @@ export default function LogsPage() {
     (async () => {
       try {
         setError(null);
-        const { data } = await apiGet<LogRow[]>("/v1/logs?limit=50");
-        if (!cancelled) setRows(data);
+        const page = await getLogs(50);
+        if (!cancelled) {
+          setRows(page.rows);
+          setNextCursor(page.nextCursor);
+        }
       } catch (e: any) {
         if (!cancelled) {
           setRows(null);
@@ -23,15 +29,48 @@ export default function LogsPage() {
       }
     })();
 
+    // сводка за последний час — из агрегатов, не из самих логов
+    getLogStats(60)
+      .then((s) => {
+        if (!cancelled) setStats(s.totals);
+      })
+      .catch(() => {});
+
     return () => {
       cancelled = true;
     };
   }, []);
 
+  async function loadMore() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await getLogs(50, nextCursor);
+      setRows((prev) => [...(prev ?? []), ...page.rows]);
+      setNextCursor(page.nextCursor);
+    } catch (e: any) {
+      setError(e?.message ?? "Ошибка загрузки логов");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   return (
     <div className="rounded-2xl border border-zinc-800 bg-zinc-950/40 p-4">
       <div className="text-sm text-zinc-400">Request logs</div>
 
+      {stats && stats.count > 0 ? (
+        <div className="mt-2 flex flex-wrap gap-2 text-xs text-zinc-400">
+          <span className="rounded-full border border-zinc-800 bg-zinc-900 px-2 py-0.5">last hour: {stats.count} req</span>
+          <span className="rounded-full border border-zinc-800 bg-zinc-900 px-2 py-0.5">
+            errors: {(stats.error_rate * 100).toFixed(1)}%
+          </span>
+          <span className="rounded-full border border-zinc-800 bg-zinc-900 px-2 py-0.5">
+            p95: {typeof stats.p95_ms === "number" ? `${Math.round(stats.p95_ms)}ms` : "—"}
+          </span>
+        </div>
+      ) : null}
+
       {error ? (
         <div className="mt-4 rounded-xl border border-red-500/20 bg-red-500/10 p-3 text-sm text-red-100">
           {error}
@@ -78,6 +117,16 @@ export default function LogsPage() {
               </div>
             </motion.div>
           ))}
+
+          {nextCursor ? (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="mt-2 rounded-xl border border-zinc-800 bg-zinc-900 px-3 py-2 text-sm text-zinc-300 hover:bg-zinc-800 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading…" : "Load more"}
+            </button>
+          ) : null}
         </div>
       )}
     </div>
@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useRef, useState } from "react";
 import { motion, AnimatePresence } from "framer-motion";
-import { apiGet } from "../lib/api";
-import type { SearchItem, SearchResponse, SourceName } from "../lib/api";
+import { searchStream } from "../lib/api";
+import type { SearchItem, SourceName } from "../lib/api";
 import { useDebouncedValue } from "../lib/useDebouncedValue";
 
 const ALL_SOURCES: { key: SourceName; label: string }[] = [
@@ -126,6 +126,11 @@ export default function SearchPage() {
     return params.toString();
   }, [debouncedQ, limit, selectedSources]);
 
+  // предварительная сортировка, пока не пришёл финальный кадр
+  function byScore(a: SearchItem, b: SearchItem) {
+    return (b.score ?? 0) - (a.score ?? 0);
+  }
+
   useEffect(() => {
     const qq = debouncedQ.trim();
     if (!qq) {
@@ -145,12 +150,29 @@ export default function SearchPage() {
       setFatal(null);
 
       try {
-        const { data, headers } = await apiGet<SearchResponse>(`/v1/search?${queryString}`, ac.signal);
-        setItems(data.items ?? []);
-        setErrors(data.errors ?? []);
-
-        const took = headers.get("x-took-ms");
-        setTookMs(took ? Number(took) : null);
+        // источники приходят по мере готовности: первые карточки — с latency самого быстрого
+        let first = true;
+        await searchStream(
+          qq,
+          selectedSources,
+          limit,
+          (frame) => {
+            if (frame.type === "source") {
+              const reset = first;
+              first = false;
+              setItems((prev) => [...(reset ? [] : prev), ...frame.items].sort(byScore).slice(0, limit));
+              setErrors((prev) => {
+                const base = reset ? [] : prev;
+                return frame.error ? [...base, frame.error] : base;
+              });
+              return;
+            }
+            setItems(frame.items ?? []);
+            setErrors(frame.errors ?? []);
+            setTookMs(typeof frame.took_ms === "number" ? frame.took_ms : null);
+          },
+          ac.signal
+        );
       } catch (e: any) {
         if (e?.name === "AbortError") return;
         setFatal(e?.message ?? "Неизвестная ошибка");
@@ -66,14 +66,36 @@ export default function SourcePage() {
                   <span
                     className={[
                       "h-2.5 w-2.5 rounded-full",
-                      s.ok ? "bg-emerald-400" : "bg-red-400",
+                      s.ok === null ? "bg-zinc-500" : s.ok ? "bg-emerald-400" : "bg-red-400",
                     ].join(" ")}
                   />
                   <div className="text-sm font-medium">{s.source}</div>
+                  {s.circuit && s.circuit.state !== "closed" ? (
+                    <span
+                      className={[
+                        "rounded-full border px-2 py-0.5 text-xs",
+                        s.circuit.state === "open"
+                          ? "border-red-500/30 bg-red-500/10 text-red-200"
+                          : "border-amber-500/30 bg-amber-500/10 text-amber-200",
+                      ].join(" ")}
+                      title={s.circuit.last_failure ?? undefined}
+                    >
+                      {s.circuit.state === "open"
+                        ? `circuit open${s.circuit.retry_in_s != null ? ` • ${Math.ceil(s.circuit.retry_in_s)}s` : ""}`
+                        : "half-open"}
+                    </span>
+                  ) : null}
                 </div>
 
                 <div className="text-xs text-zinc-500">
-                  {typeof s.latency_ms === "number" ? `${s.latency_ms} ms` : "—"} •{" "}
+                  {s.quota ? `quota ${s.quota.remaining}/${s.quota.limit} • ` : ""}
+                  {typeof s.uptime === "number" ? `uptime ${(s.uptime * 100).toFixed(0)}% • ` : ""}
+                  {typeof s.latency_p50_ms === "number"
+                    ? `p50 ${s.latency_p50_ms} ms`
+                    : typeof s.latency_ms === "number"
+                      ? `${s.latency_ms} ms`
+                      : "—"}{" "}
+                  •{" "}
                   {s.last_checked_at ? new Date(s.last_checked_at).toLocaleTimeString() : "—"}
                 </div>
               </div>